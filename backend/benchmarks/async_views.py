@@ -0,0 +1,72 @@
+"""
+Concurrency benchmark: sync DRF endpoints vs their async variants.
+
+Start the app under ASGI with a fixed, small worker count, e.g.
+
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker WEB_CONCURRENCY=2 \
+        gunicorn -c python:config.gunicorn config.asgi:application
+
+then run
+
+    python benchmarks/async_views.py --token <access token> --concurrency 50
+
+Each endpoint pair is hit with the same number of concurrent clients and the
+script prints throughput and latency percentiles for both variants.
+"""
+
+import argparse
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ENDPOINTS = [
+    ('stats/', 'async/stats/'),
+    ('sessions/', 'async/sessions/'),
+    ('exercises/', 'async/exercises/'),
+    ('routines/', 'async/routines/'),
+]
+
+
+def fetch(url, token):
+    request = urllib.request.Request(url, headers={'Authorization': f'Bearer {token}'})
+    started = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - started
+
+
+def run(url, token, concurrency, total):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(lambda _: fetch(url, token), range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'rps': total / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p95': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--base-url', default='http://localhost:8000/api/workouts/')
+    parser.add_argument('--token', required=True, help='JWT access token')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f'{"endpoint":<22}{"variant":<8}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}')
+    for sync_path, async_path in ENDPOINTS:
+        for label, path in (('sync', sync_path), ('async', async_path)):
+            result = run(args.base_url + path, args.token, args.concurrency, args.requests)
+            print(
+                f'{sync_path:<22}{label:<8}{result["rps"]:>10.1f}'
+                f'{result["p50"]:>10.1f}{result["p95"]:>10.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
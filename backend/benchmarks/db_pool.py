@@ -0,0 +1,145 @@
+"""
+Benchmark: throughput at a fixed budget of PostgreSQL connections.
+
+Runs in-process against the PostgreSQL database the settings point to:
+
+    DJANGO_SETTINGS_MODULE=config.settings python benchmarks/db_pool.py --budgets 2,4,8
+
+For every budget N it runs the same request loop two ways: ``--pre-ms`` of
+work before the first query (parsing, authentication), a few reads,
+``--post-ms`` of rendering while the connection is still held, then the
+end-of-request connection cleanup.
+
+    persistent  N threads, each holding its own persistent connection
+                (what CONN_MAX_AGE allows within N connections)
+    pooled      --threads-per-connection x N threads sharing a config.db_pool
+                pool of max_size N
+
+and prints requests/second, latency percentiles and pool wait times.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+from django.conf import settings  # noqa: E402
+
+PERSISTENT = 'bench_persistent'
+
+
+def pooled_alias(budget):
+    return f'bench_pooled_{budget}'
+
+
+def configure(budgets):
+    """Extra aliases on the default database: one persistent, one pool per budget"""
+    base = {**settings.DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+    options = {k: v for k, v in base.get('OPTIONS', {}).items() if k != 'pool'}
+    settings.DATABASES[PERSISTENT] = {
+        **base,
+        'ENGINE': 'django.db.backends.postgresql',
+        'OPTIONS': options,
+        'CONN_MAX_AGE': None,
+    }
+    for budget in budgets:
+        settings.DATABASES[pooled_alias(budget)] = {
+            **base,
+            'ENGINE': 'config.db_pool',
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {**options, 'pool': {'min_size': budget, 'max_size': budget, 'timeout': 30}},
+        }
+
+
+def percentile(samples, fraction):
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)] * 1000
+
+
+def run(alias, threads, requests_per_thread, pre, post, user_id):
+    from django.db import close_old_connections, connections
+    from workouts.models import Exercise, WorkoutSession
+
+    latencies = []
+    lock = threading.Lock()
+    start = threading.Barrier(threads + 1)
+
+    def worker():
+        start.wait()
+        own = []
+        for _ in range(requests_per_thread):
+            started = time.perf_counter()
+            time.sleep(pre)
+            list(
+                WorkoutSession.objects.using(alias).filter(user_id=user_id)
+                .order_by('-start_time').values('id', 'name', 'total_volume')[:20]
+            )
+            Exercise.objects.using(alias).count()
+            time.sleep(post)
+            # request_finished: pooled connections go back to the pool here
+            close_old_connections()
+            own.append(time.perf_counter() - started)
+        connections[alias].close()
+        with lock:
+            latencies.extend(own)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    latencies.sort()
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p95': percentile(latencies, 0.95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--budgets', default='2,4,8', help='Connection budgets to compare')
+    parser.add_argument('--threads-per-connection', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per run')
+    parser.add_argument('--pre-ms', type=float, default=5.0, help='Work before the first query')
+    parser.add_argument('--post-ms', type=float, default=1.0, help='Work after the last query')
+    args = parser.parse_args()
+
+    budgets = [int(value) for value in args.budgets.split(',')]
+    configure(budgets)
+
+    import django
+    django.setup()
+
+    from config.db_pool import pool_stats
+    from workouts.models import WorkoutSession
+
+    user_id = WorkoutSession.objects.values_list('user_id', flat=True).first()
+
+    print(f'{"budget":>6}  {"mode":<10} {"threads":>7} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"wait p95 ms":>11}')
+    for budget in budgets:
+        for mode, alias, threads in (
+            ('persistent', PERSISTENT, budget),
+            ('pooled', pooled_alias(budget), budget * args.threads_per_connection),
+        ):
+            result = run(
+                alias, threads, max(args.requests // threads, 1),
+                args.pre_ms / 1000, args.post_ms / 1000, user_id
+            )
+            wait = pool_stats().get(alias, {}).get('wait_ms_p95', 0.0)
+            print(
+                f'{budget:>6}  {mode:<10} {threads:>7} {result["rps"]:>8.0f} '
+                f'{result["p50"]:>8.1f} {result["p95"]:>8.1f} {wait:>11.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: serializer + JSONRenderer vs FieldMap + ORJSONRenderer.
+
+Runs in-process against whatever database the settings point to, e.g. after
+``manage.py generate_load_data``:
+
+    DJANGO_SETTINGS_MODULE=config.settings python benchmarks/fast_json.py --email load_user_0@example.com
+
+For each hot list endpoint it checks that both paths produce identical bytes
+and prints the median time of each.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from config.renderers import ORJSONRenderer  # noqa: E402
+from workouts.models import WorkoutSession  # noqa: E402
+from workouts.serializers import (  # noqa: E402
+    ExerciseSerializer,
+    ExerciseSetSerializer,
+    WorkoutSessionListSerializer
+)
+from workouts.views import (  # noqa: E402
+    EXERCISE_FIELD_MAP,
+    EXERCISE_SET_FIELD_MAP,
+    SESSION_LIST_FIELD_MAP,
+    exercise_queryset,
+    session_list_queryset
+)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = fn()
+        samples.append(time.perf_counter() - started)
+    return output, statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--sessions', type=int, default=50, help='Sessions per page')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    user = get_user_model().objects.get(email=args.email)
+    latest = WorkoutSession.objects.filter(user=user).first()
+
+    cases = [
+        ('exercises', lambda: exercise_queryset({}), ExerciseSerializer, EXERCISE_FIELD_MAP),
+        (
+            'sessions',
+            lambda: session_list_queryset(user, {})[:args.sessions],
+            WorkoutSessionListSerializer,
+            SESSION_LIST_FIELD_MAP,
+        ),
+        (
+            'session sets',
+            lambda: latest.exercise_sets.select_related('exercise'),
+            ExerciseSetSerializer,
+            EXERCISE_SET_FIELD_MAP,
+        ),
+    ]
+
+    print(f'{"endpoint":<16}{"serializer ms":>15}{"fast ms":>10}{"speedup":>10}  identical')
+    for name, queryset, serializer_class, field_map in cases:
+        slow_bytes, slow_ms = timed(
+            lambda: JSONRenderer().render(serializer_class(queryset(), many=True).data),
+            args.repeat
+        )
+        fast_bytes, fast_ms = timed(
+            lambda: ORJSONRenderer().render(field_map.render(field_map.values(queryset()))),
+            args.repeat
+        )
+        print(
+            f'{name:<16}{slow_ms:>15.2f}{fast_ms:>10.2f}{slow_ms / fast_ms:>9.1f}x'
+            f'  {slow_bytes == fast_bytes}'
+        )
+
+
+if __name__ == '__main__':
+    main()
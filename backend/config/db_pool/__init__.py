@@ -0,0 +1,298 @@
+"""
+In-process PostgreSQL connection pool for the ``config.db_pool`` backend.
+
+Each process keeps one bounded pool per database; Django checks a connection
+out when a request first queries and hands it back when the request ends
+(CONN_MAX_AGE = 0), so the number of server connections is capped by
+``max_size`` per process instead of one per worker thread. Configure it the
+way Django 5.1 configures ``OPTIONS['pool']``:
+
+    'ENGINE': 'config.db_pool',
+    'CONN_MAX_AGE': 0,
+    'OPTIONS': {'pool': {'min_size': 1, 'max_size': 4, 'timeout': 10}},
+
+Checkouts that find the pool full wait up to ``timeout`` seconds, then fail
+with an OperationalError. Wait times and saturation are kept per pool and
+reported by ``pool_stats()``.
+"""
+
+import collections
+import os
+import threading
+import time
+
+import psycopg2
+
+DEFAULT_POOL_OPTIONS = {
+    'min_size': 1,
+    'max_size': 4,
+    'timeout': 10.0,
+    # Connections are closed once this old, and when idle this long while
+    # the pool holds more than min_size
+    'max_lifetime': 1800.0,
+    'max_idle': 300.0,
+}
+
+# Recent checkout waits kept for percentiles
+WAIT_SAMPLES = 1024
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """No connection became free within the pool timeout"""
+
+
+def pool_options(options):
+    """``OPTIONS['pool']`` (True or a dict) merged over the defaults"""
+    if options is True:
+        options = {}
+    unknown = set(options) - set(DEFAULT_POOL_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown pool options: {', '.join(sorted(unknown))}")
+    return {**DEFAULT_POOL_OPTIONS, **options}
+
+
+class _Waiter:
+    __slots__ = ('ready', 'connection')
+
+    def __init__(self):
+        self.ready = threading.Event()
+        # Set when handed a connection; left None when handed a free slot
+        self.connection = None
+
+
+class ConnectionPool:
+    """Bounded LIFO pool of raw DB-API connections, safe across threads"""
+
+    def __init__(self, connect, name, min_size, max_size, timeout, max_lifetime, max_idle):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError('Pool sizes need 0 <= min_size <= max_size and max_size >= 1')
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self._connect = connect
+        self._lock = threading.Lock()
+        self._waiters = collections.deque()
+        # (connection, opened_at, returned_at); the newest idle one is reused first
+        self._idle = collections.deque()
+        self._opened_at = {}
+        # Slots reserved by checkouts still opening their connection
+        self._pending = 0
+        self._in_use = 0
+
+        self._requests = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._recent_waits = collections.deque(maxlen=WAIT_SAMPLES)
+        self._peak_in_use = 0
+        self._opened = 0
+        self._closed = 0
+
+    @property
+    def size(self):
+        return len(self._opened_at) + self._pending
+
+    def _expired(self, opened_at, returned_at, now):
+        if now - opened_at >= self.max_lifetime:
+            return True
+        return now - returned_at >= self.max_idle and self.size > self.min_size
+
+    def _take_idle(self, now, stale):
+        while self._idle:
+            connection, opened_at, returned_at = self._idle.pop()
+            if connection.closed or self._expired(opened_at, returned_at, now):
+                self._forget(connection)
+                stale.append(connection)
+                continue
+            return connection
+        return None
+
+    def _forget(self, connection):
+        self._opened_at.pop(id(connection), None)
+        self._closed += 1
+
+    def getconn(self):
+        started = time.monotonic()
+        stale = []
+        waiter = None
+
+        with self._lock:
+            self._requests += 1
+            connection = self._take_idle(started, stale)
+            opening = connection is None and self.size < self.max_size
+            if opening:
+                # Reserve the slot, open the connection outside the lock
+                self._pending += 1
+            if connection is not None or opening:
+                self._check_out()
+            else:
+                waiter = _Waiter()
+                self._waiters.append(waiter)
+        self._close_all(stale)
+
+        if waiter is not None:
+            # Returned connections go to the longest waiter first, so a busy
+            # thread can't keep grabbing its own connection back
+            if not waiter.ready.wait(self.timeout):
+                with self._lock:
+                    if not waiter.ready.is_set():
+                        self._waiters.remove(waiter)
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f'No connection available in pool {self.name!r} '
+                            f'within {self.timeout}s (max_size={self.max_size})'
+                        )
+            connection = waiter.connection
+            opening = connection is None
+
+        waited = time.monotonic() - started
+        with self._lock:
+            self._recent_waits.append(waited)
+            if waiter is not None:
+                self._waits += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+
+        if not opening:
+            return connection
+
+        try:
+            connection = self._connect()
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+                self._in_use -= 1
+                self._hand_over_slot()
+            raise
+        with self._lock:
+            self._pending -= 1
+            self._opened_at[id(connection)] = time.monotonic()
+            self._opened += 1
+        return connection
+
+    def _check_out(self):
+        self._in_use += 1
+        self._peak_in_use = max(self._peak_in_use, self._in_use)
+
+    def _hand_over_slot(self):
+        """A slot freed up: let the longest waiter open a new connection"""
+        if self._waiters and self.size < self.max_size:
+            waiter = self._waiters.popleft()
+            self._pending += 1
+            self._check_out()
+            waiter.ready.set()
+
+    def putconn(self, connection):
+        """Return a checked-out connection; broken or expired ones are closed"""
+        usable = self._reset(connection)
+        now = time.monotonic()
+        stale = []
+        with self._lock:
+            opened_at = self._opened_at.get(id(connection), now)
+            if not usable or now - opened_at >= self.max_lifetime:
+                self._in_use -= 1
+                self._forget(connection)
+                stale.append(connection)
+                self._hand_over_slot()
+            elif self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.connection = connection
+                waiter.ready.set()
+            else:
+                self._in_use -= 1
+                self._idle.append((connection, opened_at, now))
+                # The least recently used connections sit at the left
+                while self._idle and self._expired(*self._idle[0][1:], now):
+                    idle_connection = self._idle.popleft()[0]
+                    self._forget(idle_connection)
+                    stale.append(idle_connection)
+        self._close_all(stale)
+
+    def _reset(self, connection):
+        """Roll back anything left open; False when the connection is unusable"""
+        if connection.closed:
+            return False
+        status = connection.info.transaction_status
+        if status == psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            return True
+        if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        try:
+            connection.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def _close_all(self, connections):
+        for connection in connections:
+            try:
+                connection.close()
+            except psycopg2.Error:
+                pass
+
+    def close_idle(self):
+        """Close every idle connection (e.g. before dropping the database)"""
+        with self._lock:
+            idle = [connection for connection, *_ in self._idle]
+            self._idle.clear()
+            for connection in idle:
+                self._forget(connection)
+        self._close_all(idle)
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._recent_waits)
+            size = self.size
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'waiting': len(self._waiters),
+                'saturation': round(self._in_use / self.max_size, 3),
+                'peak_in_use': self._peak_in_use,
+                'requests': self._requests,
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'wait_ms_total': round(self._wait_total * 1000, 3),
+                'wait_ms_max': round(self._wait_max * 1000, 3),
+                'wait_ms_p50': _percentile_ms(waits, 0.50),
+                'wait_ms_p95': _percentile_ms(waits, 0.95),
+                'wait_ms_p99': _percentile_ms(waits, 0.99),
+                'connections_opened': self._opened,
+                'connections_closed': self._closed,
+            }
+
+
+def _percentile_ms(samples, fraction):
+    if not samples:
+        return 0.0
+    index = min(int(len(samples) * fraction), len(samples) - 1)
+    return round(samples[index] * 1000, 3)
+
+
+def get_pool(key, name, connect, options):
+    """The process's pool for ``key``, created on first use (and after a fork)"""
+    key = (os.getpid(), key)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(connect, name, **options)
+    return pool
+
+
+def pool_stats():
+    """``{pool name: stats}`` for the pools of this process"""
+    pid = os.getpid()
+    return {pool.name: pool.stats() for (owner, _), pool in list(_pools.items()) if owner == pid}
+
@@ -0,0 +1,86 @@
+"""
+PostgreSQL backend whose connections come from the process pool in
+config.db_pool. Closing a connection (at the end of every request, with
+CONN_MAX_AGE = 0) returns it to the pool instead of disconnecting.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base, creation
+
+from . import get_pool, pool_options
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would keep the test database in use
+        self.connection.close_pool()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    @property
+    def pool_key(self):
+        params = self.get_connection_params()
+        return (
+            self.alias, params.get('dbname'), params.get('service'),
+            params.get('host'), params.get('port'), params.get('user'),
+        )
+
+    def _open_connection(self, conn_params):
+        connection = self.Database.connect(**conn_params)
+        if not base.is_psycopg3:
+            # Same dummy jsonb loads() as the stock backend
+            base.psycopg2.extras.register_default_jsonb(
+                conn_or_curs=connection, loads=lambda x: x
+            )
+        return connection
+
+    def get_pool(self, conn_params=None):
+        conn_params = conn_params or self.get_connection_params()
+        options = self.settings_dict['OPTIONS'].get('pool', True)
+        try:
+            options = pool_options(options)
+        except (TypeError, ValueError) as e:
+            raise ImproperlyConfigured(f"DATABASES['{self.alias}']['OPTIONS']['pool']: {e}")
+        return get_pool(
+            self.pool_key, self.alias,
+            lambda: self._open_connection(conn_params),
+            options
+        )
+
+    def get_new_connection(self, conn_params):
+        # The stock backend derives isolation_level from OPTIONS per
+        # connection; pooled connections keep the level they were opened with
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        try:
+            self.isolation_level = base.IsolationLevel(
+                base.IsolationLevel.READ_COMMITTED if isolation_level is None else isolation_level
+            )
+        except ValueError:
+            raise ImproperlyConfigured(
+                f'Invalid transaction isolation level {isolation_level} '
+                f'specified. Use one of the psycopg.IsolationLevel values.'
+            )
+
+        # Kept so closing returns the connection to the pool it came from
+        self._pool = self.get_pool(conn_params)
+        connection = self._pool.getconn()
+        if isolation_level is not None:
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self._pool.putconn(self.connection)
+
+    def close_pool(self):
+        self.close()
+        self.get_pool().close_idle()
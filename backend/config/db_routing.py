@@ -0,0 +1,151 @@
+"""
+Read/write splitting between the primary database and read replicas.
+
+Views opt in to replica reads with ``@read_from_replica`` (function views,
+above ``@api_view``) or ``db_routing = REPLICA`` (class views); ``@use_primary``
+/ ``db_routing = PRIMARY`` pins a view to the primary explicitly. Everything
+else, every non-GET/HEAD/OPTIONS request and anything inside a transaction
+reads from the primary. Once a user writes, their reads stay on the primary
+for READ_YOUR_WRITES_SECONDS so replica lag never hides what they just saved.
+
+With DATABASE_REPLICAS empty the router sends everything to ``default`` and
+the middleware does nothing.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+REPLICA = 'replica'
+PRIMARY = 'primary'
+
+DEFAULT_STICKY_SECONDS = 5
+
+# Alias the current request reads from (None: primary)
+_read_alias = ContextVar('db_read_alias', default=None)
+# Whether the current request has written anything
+_wrote = ContextVar('db_wrote', default=False)
+
+_jwt = JWTAuthentication()
+
+
+def replica_aliases():
+    return [
+        alias for alias in getattr(settings, 'DATABASE_REPLICAS', [])
+        if alias in settings.DATABASES
+    ]
+
+
+def sticky_seconds():
+    return getattr(settings, 'READ_YOUR_WRITES_SECONDS', DEFAULT_STICKY_SECONDS)
+
+
+def _sticky_key(user_id):
+    return f'db:primary-reads:{user_id}'
+
+
+def read_from_replica(view):
+    """Let GET requests to ``view`` read from a replica"""
+    view.db_routing = REPLICA
+    return view
+
+
+def use_primary(view):
+    """Keep every read of ``view`` on the primary"""
+    view.db_routing = PRIMARY
+    return view
+
+
+def view_routing(view_func):
+    """REPLICA, PRIMARY or None for a resolved view (function or as_view())"""
+    routing = getattr(view_func, 'db_routing', None)
+    if routing is None:
+        routing = getattr(getattr(view_func, 'view_class', None), 'db_routing', None)
+    return routing
+
+
+class ReplicaRouter:
+    """Reads go where the middleware pointed this request; writes to default"""
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # Whatever this request reads next must see the write
+        _read_alias.set(None)
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema and rows from the primary
+        if db in replica_aliases():
+            return False
+        return None
+
+
+def _request_user_id(request):
+    """Authenticated user id, decoding the JWT when DRF hasn't run yet"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+
+    header = _jwt.get_header(request)
+    raw_token = _jwt.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        return _jwt.get_validated_token(raw_token)[jwt_settings.USER_ID_CLAIM]
+    except (InvalidToken, TokenError, KeyError):
+        return None
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """
+    Points safe requests to opted-in views at a replica unless the user wrote
+    recently, and records writes for read-your-writes stickiness.
+    Goes after AuthenticationMiddleware.
+    """
+
+    def process_request(self, request):
+        _read_alias.set(None)
+        _wrote.set(False)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in SAFE_METHODS or view_routing(view_func) != REPLICA:
+            return None
+        aliases = replica_aliases()
+        if not aliases:
+            return None
+
+        user_id = _request_user_id(request)
+        if user_id is not None and cache.get(_sticky_key(user_id)):
+            return None
+        _read_alias.set(random.choice(aliases))
+        return None
+
+    def process_response(self, request, response):
+        if replica_aliases() and (_wrote.get() or request.method not in SAFE_METHODS):
+            user_id = _request_user_id(request)
+            if user_id is not None:
+                cache.set(_sticky_key(user_id), True, sticky_seconds())
+
+        _read_alias.set(None)
+        _wrote.set(False)
+        return response
@@ -0,0 +1,138 @@
+"""
+Sparse fieldsets and expansion control shared by every API serializer.
+
+    ?fields=id,name,exercise_details.name   keep only these (dotted = nested)
+    ?expand=exercise_sets                   embed only these expandable fields
+
+Nested serializers listed in ``Meta.expandable_fields`` are embedded by
+default; once a request passes ``expand`` only the listed ones are.
+Both parameters apply to GET requests only, so writes always see every field.
+Views add SparseQuerysetMixin to prune the query to match: ``only()`` on the
+columns that are still rendered and related loads only for the fields that
+need them.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_field_tree(value):
+    """'id,exercise_details.name' -> {'id': {}, 'exercise_details': {'name': {}}}"""
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for part in path.strip().split('.'):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+def requested_selection(request):
+    """``(fields_tree, expand_tree)`` from the query string; None when absent"""
+    if request is None or request.method not in SAFE_METHODS:
+        return None, None
+
+    params = getattr(request, 'query_params', request.GET)
+    fields = params.get('fields')
+    expand = params.get('expand')
+    return (
+        parse_field_tree(fields) if fields else None,
+        parse_field_tree(expand) if expand is not None else None,
+    )
+
+
+class SparseFieldsMixin:
+    """Serializer mixin: prune ``self.fields`` from ``?fields=`` / ``?expand=``"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields_tree, expand_tree = requested_selection(self.context.get('request'))
+        if fields_tree is not None or expand_tree is not None:
+            self.apply_selection(fields_tree, expand_tree)
+
+    def apply_selection(self, fields_tree, expand_tree):
+        expandable = set(getattr(self.Meta, 'expandable_fields', []))
+
+        for name in list(self.fields):
+            if fields_tree and name not in fields_tree:
+                self.fields.pop(name)
+                continue
+            if (
+                expand_tree is not None
+                and name in expandable
+                and name not in expand_tree
+                and not (fields_tree and name in fields_tree)
+            ):
+                self.fields.pop(name)
+                continue
+
+            # Hand the nested part of the selection to nested serializers
+            field = self.fields[name]
+            nested = field.child if isinstance(field, serializers.ListSerializer) else field
+            if isinstance(nested, SparseFieldsMixin):
+                nested.apply_selection(
+                    (fields_tree or {}).get(name) or None,
+                    (expand_tree or {}).get(name) if expand_tree is not None else None,
+                )
+
+
+def prune_queryset(queryset, serializer, loaders):
+    """
+    Restrict ``queryset`` to what ``serializer`` (already pruned) renders.
+    ``loaders`` maps non-column fields to how they're loaded:
+    ``{'name': {'select_related': [...], 'prefetch_related': [...], 'only': [...]}}``,
+    or to a function of the pruned serializer field returning that spec.
+    Fields that are neither columns nor in ``loaders`` disable ``only()``.
+    """
+    model = queryset.model
+    queryset = queryset.select_related(None).prefetch_related(None)
+    columns = {model._meta.pk.name}
+    prefetches = {}
+    restrict = True
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+
+        if name in loaders:
+            spec = loaders[name]
+            if callable(spec):
+                spec = spec(field)
+            if spec.get('select_related'):
+                queryset = queryset.select_related(*spec['select_related'])
+            # Several fields may share one prefetch; Django rejects repeats
+            for lookup in spec.get('prefetch_related', []):
+                prefetches.setdefault(getattr(lookup, 'prefetch_to', lookup), lookup)
+            columns.update(spec.get('only', []))
+            continue
+
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            restrict = False
+            continue
+        if not model_field.concrete:
+            restrict = False
+            continue
+        columns.add(field.source)
+
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches.values())
+    return queryset.only(*columns) if restrict else queryset
+
+
+class SparseQuerysetMixin:
+    """
+    View mixin: when a GET request selects fields, rebuild the related loads
+    from ``sparse_loaders`` and defer unrendered columns.
+    """
+
+    sparse_loaders = {}
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields_tree, expand_tree = requested_selection(self.request)
+        if fields_tree is None and expand_tree is None:
+            return queryset
+        return prune_queryset(queryset, self.get_serializer(), self.sparse_loaders)
@@ -0,0 +1,47 @@
+"""
+Gunicorn config for the web process.
+
+Used with ``gunicorn -c python:config.gunicorn config.wsgi:application``.
+To serve the async read endpoints, point it at ``config.asgi:application``
+with ``GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker``.
+Migrations and seeding run in the release phase (``manage.py release``),
+so booting a worker only costs importing the app.
+"""
+
+import multiprocessing
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+workers = _env_int('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 4))
+threads = _env_int('GUNICORN_THREADS', 1)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread' if threads > 1 else 'sync')
+
+# Import Django once in the master and fork already-initialised workers
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Recycle workers periodically; jitter keeps them from restarting together
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+timeout = _env_int('GUNICORN_TIMEOUT', 120)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    # Never share a database socket opened in the master with forked workers
+    if not server.cfg.preload_app:
+        return
+    from django.db import connections
+    connections.close_all()
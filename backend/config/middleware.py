@@ -0,0 +1,107 @@
+"""
+Response compression with a size threshold.
+
+Brotli is used when the client accepts it and the ``brotli`` package is
+installed, gzip otherwise. Bodies smaller than COMPRESSION_MIN_SIZE and
+content types that don't compress well (images, archives) pass through.
+
+Against BREACH, gzip output gets the same random-length header padding as
+Django's GZipMiddleware, and paths under COMPRESSION_EXCLUDE_PATHS (the ones
+whose bodies carry tokens, credentials or profile data) are never compressed,
+since brotli has no equivalent padding.
+"""
+
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only
+    brotli = None
+
+DEFAULT_MIN_SIZE = 1024
+
+DEFAULT_EXCLUDE_PATHS = (
+    '/api/users/auth/',
+    '/api/users/profile/',
+    '/api/users/change-password/',
+    '/admin/',
+)
+
+# As GZipMiddleware.max_random_bytes
+GZIP_MAX_RANDOM_BYTES = 100
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'application/msgpack',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'text/',
+)
+
+_accepts_br = re.compile(r'\bbr\b')
+_accepts_gzip = re.compile(r'\bgzip\b')
+
+
+def _weaken_etag(response):
+    # The compressed body differs byte-wise, so a strong validator becomes weak
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response.headers['ETag'] = 'W/' + etag
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Brotli/gzip for compressible responses of at least COMPRESSION_MIN_SIZE bytes"""
+
+    def process_response(self, request, response):
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if response.has_header('Content-Encoding') or response.status_code == 304:
+            return response
+        content_type = response.get('Content-Type', '')
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+        if request.path.startswith(getattr(settings, 'COMPRESSION_EXCLUDE_PATHS', DEFAULT_EXCLUDE_PATHS)):
+            return response
+
+        accept = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        use_br = brotli is not None and _accepts_br.search(accept)
+        if not use_br and not _accepts_gzip.search(accept):
+            return response
+
+        if response.streaming:
+            # Size is unknown up front; stream through gzip
+            if not _accepts_gzip.search(accept):
+                return response
+            response.streaming_content = compress_sequence(
+                response.streaming_content, max_random_bytes=GZIP_MAX_RANDOM_BYTES
+            )
+            del response.headers['Content-Length']
+            encoding = 'gzip'
+        else:
+            min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE)
+            if len(response.content) < min_size:
+                return response
+
+            if use_br:
+                compressed = brotli.compress(response.content, quality=5)
+                encoding = 'br'
+            else:
+                compressed = compress_string(response.content, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+                encoding = 'gzip'
+
+            # Don't send a larger body than the original
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        _weaken_etag(response)
+        response.headers['Content-Encoding'] = encoding
+        return response
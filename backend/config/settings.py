@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'workouts',
     'nutrition',
     'social',
+    'sync',
 ]
 
 REST_FRAMEWORK = {
@@ -50,6 +51,18 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'config.renderers.ORJSONRenderer',
+        'config.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    # Token buckets per user (per IP when anonymous), see config/throttling.py
+    'DEFAULT_THROTTLE_RATES': {
+        'login': '10/min',
+        'set_writes': '120/min',
+        'analytics': '60/min',
+        'search': '120/min',
+    },
 }
 
 
@@ -57,10 +70,12 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'config.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'config.db_routing.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -100,6 +115,48 @@ DATABASES = {
     }
 }
 
+# Read replicas: aliases in DATABASES that views marked read_from_replica may
+# read from (config/db_routing.py). Set DB_REPLICA_NAME to try it locally
+# against a second database on the same server.
+if config('DB_REPLICA_NAME', default=''):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': config('DB_REPLICA_NAME'),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Pooled connections (config/db_pool), see settings_prod.py
+if config('DB_POOL', default=False, cast=bool):
+    for database in DATABASES.values():
+        database.update({'ENGINE': 'config.db_pool', 'CONN_MAX_AGE': 0})
+        database.setdefault('OPTIONS', {})['pool'] = {
+            'max_size': config('DB_POOL_MAX_SIZE', default=4, cast=int),
+        }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['config.db_routing.ReplicaRouter']
+
+# Seconds a user's reads stay on the primary after they write
+READ_YOUR_WRITES_SECONDS = 5
+
+
+# Channel layer for live workout events (in-memory: single process only)
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    }
+}
+
+
+# Responses smaller than this (bytes) are sent uncompressed
+COMPRESSION_MIN_SIZE = 1024
+
+# Seconds clients may reuse a completed session without revalidating
+COMPLETED_SESSION_MAX_AGE = 60
+
+# Completed sessions older than this (days) move into per-user yearly archives
+SESSION_ARCHIVE_HORIZON_DAYS = 730
+
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
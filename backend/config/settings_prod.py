@@ -94,16 +94,19 @@ INSTALLED_APPS = [
     'workouts.apps.WorkoutsConfig',
     'nutrition.apps.NutritionConfig',
     'social.apps.SocialConfig',
+    'sync.apps.SyncConfig',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'config.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'config.db_routing.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -140,6 +143,89 @@ DATABASES = {
     )
 }
 
+# Read replicas, comma-separated; views marked read_from_replica read from
+# them (config/db_routing.py)
+for index, url in enumerate(parse_csv(os.environ.get('DATABASE_REPLICA_URLS')), start=1):
+    DATABASES[f'replica_{index}'] = dj_database_url.parse(
+        url,
+        conn_max_age=600,
+        conn_health_checks=True,
+    )
+    DATABASES[f'replica_{index}']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['config.db_routing.ReplicaRouter']
+
+# Pooled connections (config/db_pool): each process opens at most
+# DB_POOL_MAX_SIZE connections per database, shared by all its threads, and
+# returns them to the pool at the end of every request. Size it so
+# instances x WEB_CONCURRENCY x DB_POOL_MAX_SIZE fits max_connections.
+DB_POOL = os.environ.get('DB_POOL', 'true').lower() == 'true'
+
+if DB_POOL:
+    for database in DATABASES.values():
+        if database.get('ENGINE') != 'django.db.backends.postgresql':
+            continue
+        database['ENGINE'] = 'config.db_pool'
+        database['CONN_MAX_AGE'] = 0
+        database['CONN_HEALTH_CHECKS'] = False
+        database.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 4)),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', 1800)),
+            'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+        }
+
+# Seconds a user's reads stay on the primary after they write; needs a cache
+# shared by every instance (Redis below) to hold across workers
+READ_YOUR_WRITES_SECONDS = int(os.environ.get('READ_YOUR_WRITES_SECONDS', 5))
+
+# ============================================================================
+# CHANNEL LAYERS (live workout events)
+# ============================================================================
+
+# Redis fans events out across instances; without it events only reach
+# subscribers connected to the same process
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [REDIS_URL]},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
+
+# Cache shared by every instance (read-your-writes stickiness); without Redis
+# each process keeps its own
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
+# ============================================================================
+# RESPONSE COMPRESSION & CACHING
+# ============================================================================
+
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPLETED_SESSION_MAX_AGE = int(os.environ.get('COMPLETED_SESSION_MAX_AGE', 60))
+
+# ============================================================================
+# SESSION ARCHIVAL
+# ============================================================================
+
+SESSION_ARCHIVE_HORIZON_DAYS = int(os.environ.get('SESSION_ARCHIVE_HORIZON_DAYS', 730))
+
 # ============================================================================
 # PASSWORD VALIDATION
 # ============================================================================
@@ -189,14 +275,39 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'config.renderers.ORJSONRenderer',
+        'config.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_THROTTLE_RATES': {
+        'login': os.environ.get('THROTTLE_RATE_LOGIN', '10/min'),
+        'set_writes': os.environ.get('THROTTLE_RATE_SET_WRITES', '120/min'),
+        'analytics': os.environ.get('THROTTLE_RATE_ANALYTICS', '60/min'),
+        'search': os.environ.get('THROTTLE_RATE_SEARCH', '120/min'),
+    },
+    # Railway's edge proxy appends the client address to X-Forwarded-For
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 1)),
 }
 
+# Serializer-free rendering of hot list endpoints (workouts/fastpath.py)
+FAST_LIST_RENDERING = os.environ.get('FAST_LIST_RENDERING', 'False').lower() == 'true'
+
+# Throttle buckets shared by every instance; per process without Redis
+THROTTLE_REDIS_URL = os.environ.get('THROTTLE_REDIS_URL', REDIS_URL)
+
+# Feed timelines (social/timelines.py); per process without Redis
+FEED_REDIS_URL = os.environ.get('FEED_REDIS_URL', REDIS_URL)
+
+# Leaderboards (workouts/leaderboards.py); per process without Redis
+LEADERBOARD_REDIS_URL = os.environ.get('LEADERBOARD_REDIS_URL', REDIS_URL)
+
 # JWT
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
@@ -0,0 +1,213 @@
+"""
+Token-bucket request throttles.
+
+Every scope has a bucket per user (or per client IP when anonymous) holding
+up to N tokens that refill at N per period; a request takes one token or is
+rejected with 429 and a Retry-After of the time until the next token.
+Rates use DRF's format in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']:
+
+    'login': '10/min', 'set_writes': '120/min', ...
+
+Buckets live in Redis when THROTTLE_REDIS_URL is set: one EVALSHA of a Lua
+script reads, refills and takes a token atomically, so every instance shares
+the limit. Without Redis, or while it is unreachable, buckets are kept per
+process.
+"""
+
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+try:
+    import redis
+except ImportError:  # optional, in-process buckets only
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+KEY_PREFIX = 'throttle'
+
+# Local buckets kept before refilled (idle) ones are dropped
+LOCAL_MAX_BUCKETS = 100_000
+
+# KEYS[1] bucket; ARGV capacity, refill rate (tokens/s), now (s)
+# Returns {allowed, seconds until a token is available}
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(wait)}
+"""
+
+
+def parse_rate(rate):
+    """'10/min' -> (capacity 10, refill 10/60 tokens per second)"""
+    num, period = rate.split('/')
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+def _take(tokens, ts, capacity, rate, now):
+    tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+    if tokens >= 1:
+        return tokens - 1, True, 0.0
+    return tokens, False, (1 - tokens) / rate
+
+
+class LocalBuckets:
+    """Per-process buckets, for development and when Redis is unavailable"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts, _ = self._buckets.get(key, (capacity, now, now))
+            tokens, allowed, wait = _take(tokens, ts, capacity, rate, now)
+            # Once refilled to capacity a bucket is the same as a missing one
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            if len(self._buckets) > LOCAL_MAX_BUCKETS:
+                self._prune(now)
+        return allowed, wait
+
+    def _prune(self, now):
+        for key, (_, _, full_at) in list(self._buckets.items()):
+            if full_at <= now:
+                del self._buckets[key]
+
+
+class RedisBuckets:
+    """Buckets shared by every instance through one atomic Lua call"""
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url, socket_timeout=0.05, socket_connect_timeout=0.05)
+        self.script = self.client.register_script(TOKEN_BUCKET_LUA)
+
+    def consume(self, key, capacity, rate):
+        allowed, wait = self.script(keys=[key], args=[capacity, rate, time.time()])
+        return bool(allowed), float(wait)
+
+
+_local = LocalBuckets()
+_redis = None
+_redis_lock = threading.Lock()
+_redis_down_until = 0.0
+
+# Seconds to stay on local buckets after Redis fails, so an outage doesn't
+# add a connect timeout to every request
+REDIS_RETRY_INTERVAL = 5
+
+
+def _redis_buckets():
+    global _redis
+    url = getattr(settings, 'THROTTLE_REDIS_URL', None)
+    if not url or redis is None or time.monotonic() < _redis_down_until:
+        return None
+    if _redis is None:
+        with _redis_lock:
+            if _redis is None:
+                _redis = RedisBuckets(url)
+    return _redis
+
+
+def consume(key, capacity, rate):
+    """Take one token from ``key``: ``(allowed, seconds until the next token)``"""
+    global _redis_down_until
+    buckets = _redis_buckets()
+    if buckets is not None:
+        try:
+            return buckets.consume(key, capacity, rate)
+        except redis.RedisError as e:
+            _redis_down_until = time.monotonic() + REDIS_RETRY_INTERVAL
+            logger.warning('Throttle store unavailable, using local buckets: %s', e)
+    return _local.consume(key, capacity, rate)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle over ``consume()``; subclasses set ``scope``"""
+
+    scope = None
+
+    def __init__(self):
+        self.retry_after = None
+
+    def applies(self, request, view):
+        return True
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        return f'{KEY_PREFIX}:{self.scope}:{ident}'
+
+    def allow_request(self, request, view):
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        if rate is None or not self.applies(request, view):
+            return True
+
+        capacity, refill = parse_rate(rate)
+        allowed, wait = consume(self.get_cache_key(request, view), capacity, refill)
+        self.retry_after = None if allowed else wait
+        return allowed
+
+    def wait(self):
+        # Whole seconds, rounded up, for the Retry-After header
+        return math.ceil(self.retry_after) if self.retry_after else None
+
+
+class LoginRateThrottle(TokenBucketThrottle):
+    """Login and registration attempts, per client IP"""
+
+    scope = 'login'
+
+    def get_cache_key(self, request, view):
+        return f'{KEY_PREFIX}:{self.scope}:ip:{self.get_ident(request)}'
+
+
+class SetWriteRateThrottle(TokenBucketThrottle):
+    """Creating, editing and deleting exercise sets"""
+
+    scope = 'set_writes'
+
+    def applies(self, request, view):
+        return request.method not in SAFE_METHODS
+
+
+class AnalyticsRateThrottle(TokenBucketThrottle):
+    """Stats, history and other aggregate reads"""
+
+    scope = 'analytics'
+
+
+class SearchRateThrottle(TokenBucketThrottle):
+    """Catalog requests that carry a ``?search=`` term"""
+
+    scope = 'search'
+
+    def applies(self, request, view):
+        return bool(request.query_params.get('search'))
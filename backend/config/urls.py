@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from config.views import db_pool_metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -9,6 +10,9 @@ urlpatterns = [
     # API endpoints
     path('api/users/', include('users.urls')),
     path('api/workouts/', include('workouts.urls')),
+    path('api/sync/', include('sync.urls')),
+    path('api/social/', include('social.urls')),
+    path('api/metrics/db-pool/', db_pool_metrics, name='db_pool_metrics'),
 ]
 
 # Serve media files in development
@@ -0,0 +1,17 @@
+import os
+
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from config.db_pool import pool_stats
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def db_pool_metrics(request):
+    """
+    GET /api/metrics/db-pool/
+    Connection pool wait times and saturation of the worker process that
+    served the request (one pool per database alias)
+    """
+    return Response({'pid': os.getpid(), 'pools': pool_stats()})
@@ -1,6 +1,8 @@
 """
-One-time script to run migrations on Railway
-Save this as: backend/init_db.py
+Backwards-compatible entry point for the release phase.
+
+Prefer ``python manage.py release`` (see the Procfile ``release`` process);
+this script only exists for environments still calling init_db.py.
 """
 
 import os
@@ -10,27 +12,6 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings_prod')
 django.setup()
 
-# Run migrations
 from django.core.management import call_command
 
-print("=" * 80)
-print("RUNNING DATABASE MIGRATIONS")
-print("=" * 80)
-
-call_command('migrate', '--noinput')
-
-print("=" * 80)
-print("MIGRATIONS COMPLETE!")
-print("=" * 80)
-
-print("\nSeeding exercises...")
-try:
-    call_command('seed_exercises')
-    print("Exercises seeded successfully!")
-except Exception as e:
-    print(f"Could not seed exercises: {e}")
-    print("You can seed manually later with: python manage.py seed_exercises")
-
-print("\n" + "=" * 80)
-print("DATABASE INITIALIZATION COMPLETE!")
-print("=" * 80)
+call_command('release')
@@ -1,3 +1,19 @@
 from django.contrib import admin
+from .models import Activity, Follow
 
-# Register your models here.
+
+@admin.register(Follow)
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ['follower', 'following', 'created_at']
+    search_fields = ['follower__username', 'following__username']
+    raw_id_fields = ['follower', 'following']
+    ordering = ['-created_at']
+
+
+@admin.register(Activity)
+class ActivityAdmin(admin.ModelAdmin):
+    list_display = ['user', 'verb', 'object_id', 'created_at']
+    list_filter = ['verb', 'created_at']
+    search_fields = ['user__username']
+    raw_id_fields = ['user']
+    ordering = ['-id']
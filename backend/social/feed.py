@@ -0,0 +1,207 @@
+"""
+Follow graph and activity feed.
+
+Publishing an activity fans it out on write: after the transaction commits
+its id is pushed onto the timeline of every follower (and the author's own).
+Authors with FANOUT_FOLLOWER_LIMIT followers or more are skipped, so one post
+doesn't mean a push per follower; their followers pull those activities on
+read instead and merge them into the page.
+
+A feed page is one range fetch from the reader's timeline plus one query for
+the activities (and one for followed high-follower authors, if any). With
+the timeline store down pages come from the database alone.
+
+Follower, following and post counts on UserStats are kept with F()
+expressions in the same transaction as the rows they count.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from users.models import UserStats
+from .models import Activity, Follow
+from .timelines import TIMELINE_LENGTH, STORE_ERRORS, get_timelines, store_failed
+
+User = get_user_model()
+
+# Authors at or above this many followers are read from, not fanned out
+FANOUT_FOLLOWER_LIMIT = 5000
+
+FEED_PAGE_SIZE = 20
+FEED_MAX_PAGE_SIZE = 100
+
+
+def _bump(user_id, **deltas):
+    """Add ``deltas`` to the user's UserStats counters in SQL (never below 0)"""
+    UserStats.objects.get_or_create(user_id=user_id)
+    UserStats.objects.filter(user_id=user_id).update(**{
+        field: Greatest(F(field) + delta, Value(0)) for field, delta in deltas.items()
+    })
+
+
+def _forget_timeline(user_id):
+    # Rebuilt from the new graph on next read
+    timelines = get_timelines()
+    if timelines is None:
+        return
+    try:
+        timelines.drop(user_id)
+    except STORE_ERRORS as e:
+        store_failed(e)
+
+
+# ============= GRAPH =============
+
+def follow(follower, following):
+    """Returns False if already following"""
+    if follower.pk == following.pk:
+        raise ValueError('You cannot follow yourself')
+    try:
+        with transaction.atomic():
+            Follow.objects.create(follower=follower, following=following)
+            _bump(follower.pk, following_count=1)
+            _bump(following.pk, followers_count=1)
+    except IntegrityError:
+        return False
+    transaction.on_commit(lambda: _forget_timeline(follower.pk))
+    return True
+
+
+def unfollow(follower, following):
+    """Returns False if not following"""
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(follower=follower, following=following).delete()
+        if not deleted:
+            return False
+        _bump(follower.pk, following_count=-1)
+        _bump(following.pk, followers_count=-1)
+    transaction.on_commit(lambda: _forget_timeline(follower.pk))
+    return True
+
+
+def _followers_count(user_id):
+    return UserStats.objects.filter(user_id=user_id).values_list('followers_count', flat=True).first() or 0
+
+
+def _pulled_authors(user_id):
+    """Followed authors whose activities aren't fanned out"""
+    return list(Follow.objects.filter(
+        follower_id=user_id,
+        following__stats__followers_count__gte=FANOUT_FOLLOWER_LIMIT,
+    ).values_list('following_id', flat=True))
+
+
+def _pushed_authors(user_id):
+    """Authors whose activities are fanned out to the user's timeline"""
+    followed = Follow.objects.filter(follower_id=user_id).exclude(
+        following__stats__followers_count__gte=FANOUT_FOLLOWER_LIMIT
+    ).values_list('following_id', flat=True)
+    return [user_id, *followed]
+
+
+# ============= PUBLISHING =============
+
+def publish(user_id, verb, object_id, data):
+    """Record an activity and fan it out once the transaction commits"""
+    with transaction.atomic():
+        activity = Activity.objects.create(user_id=user_id, verb=verb, object_id=object_id, data=data)
+        _bump(user_id, posts_count=1)
+    transaction.on_commit(lambda: fan_out(activity.pk, user_id))
+    return activity
+
+
+def publish_session(session):
+    return publish(session.user_id, 'session_completed', session.pk, {
+        'name': session.name,
+        'routine': session.routine_id,
+        'duration_minutes': session.duration_minutes,
+        'total_volume': str(session.total_volume),
+        'total_sets': session.total_sets,
+    })
+
+
+def publish_record(exercise_set):
+    return publish(exercise_set.user_id, 'personal_record', exercise_set.pk, {
+        'exercise': exercise_set.exercise_id,
+        'exercise_name': exercise_set.exercise.name,
+        'session': exercise_set.session_id,
+        'reps': exercise_set.reps,
+        'weight': str(exercise_set.weight) if exercise_set.weight is not None else None,
+    })
+
+
+def publish_routine(routine):
+    return publish(routine.user_id, 'routine_published', routine.pk, {
+        'name': routine.name,
+        'description': routine.description,
+    })
+
+
+def fan_out(activity_id, author_id):
+    """Push an activity to its author's and followers' timelines"""
+    timelines = get_timelines()
+    if timelines is None:
+        return
+    recipients = [author_id]
+    if _followers_count(author_id) < FANOUT_FOLLOWER_LIMIT:
+        recipients += Follow.objects.filter(following_id=author_id).values_list('follower_id', flat=True)
+    try:
+        timelines.push(recipients, activity_id)
+    except STORE_ERRORS as e:
+        store_failed(e)
+
+
+# ============= READING =============
+
+def _recent_ids(author_ids, before, limit):
+    queryset = Activity.objects.filter(user_id__in=author_ids)
+    if before:
+        queryset = queryset.filter(pk__lt=before)
+    return list(queryset.order_by('-pk').values_list('pk', flat=True)[:limit])
+
+
+def rebuild_timeline(user_id):
+    """Store the user's timeline from the database; returns its ids, oldest first"""
+    activity_ids = _recent_ids(_pushed_authors(user_id), None, TIMELINE_LENGTH)[::-1]
+    timelines = get_timelines()
+    if timelines is not None:
+        try:
+            timelines.store(user_id, activity_ids)
+        except STORE_ERRORS as e:
+            store_failed(e)
+    return activity_ids
+
+
+def _timeline_page(user_id, before, limit):
+    timelines = get_timelines()
+    if timelines is not None:
+        try:
+            page = timelines.page(user_id, before, limit)
+        except STORE_ERRORS as e:
+            store_failed(e)
+        else:
+            if page is not None:
+                return page
+            ids = rebuild_timeline(user_id)[::-1]
+            return [activity_id for activity_id in ids if not before or activity_id < before][:limit]
+    return _recent_ids(_pushed_authors(user_id), before, limit)
+
+
+def feed_page(user, before=None, limit=FEED_PAGE_SIZE):
+    """
+    Newest activities for the user below the ``before`` id: ``(activities,
+    next cursor or None)``. Activities of private profiles are left out.
+    """
+    ids = _timeline_page(user.pk, before, limit)
+    pulled = _pulled_authors(user.pk)
+    if pulled:
+        ids = sorted(set(ids) | set(_recent_ids(pulled, before, limit)), reverse=True)[:limit]
+
+    activities = {
+        activity.pk: activity
+        for activity in Activity.objects.filter(pk__in=ids).select_related('user')
+        if activity.user.is_profile_public or activity.user_id == user.pk
+    }
+    cursor = ids[-1] if len(ids) == limit else None
+    return [activities[pk] for pk in ids if pk in activities], cursor
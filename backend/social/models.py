@@ -1,3 +1,55 @@
 from django.db import models
+from django.contrib.auth import get_user_model
 
-# Create your models here.
+User = get_user_model()
+
+
+class Follow(models.Model):
+    """``follower`` follows ``following``"""
+
+    follower = models.ForeignKey(User, on_delete=models.CASCADE, related_name='following')
+    following = models.ForeignKey(User, on_delete=models.CASCADE, related_name='followers')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['follower', 'following'], name='unique_follow'),
+            models.CheckConstraint(check=~models.Q(follower=models.F('following')), name='no_self_follow'),
+        ]
+        indexes = [
+            models.Index(fields=['following', 'follower']),
+        ]
+
+    def __str__(self):
+        return f"{self.follower_id} -> {self.following_id}"
+
+
+class Activity(models.Model):
+    """
+    One feed item. ``data`` holds what the feed shows, so rendering it never
+    joins the session, set or routine (which may be archived or deleted since).
+    The auto-increment id orders timelines.
+    """
+
+    VERB_CHOICES = [
+        ('session_completed', 'Completed a workout'),
+        ('personal_record', 'Set a personal record'),
+        ('routine_published', 'Published a routine'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activities')
+    verb = models.CharField(max_length=30, choices=VERB_CHOICES)
+    object_id = models.BigIntegerField()
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-id']
+        verbose_name_plural = 'activities'
+        indexes = [
+            models.Index(fields=['user', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.verb} {self.object_id}"
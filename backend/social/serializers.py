@@ -0,0 +1,36 @@
+from rest_framework import serializers
+from config.fieldsets import SparseFieldsMixin
+from .models import Activity, Follow
+
+
+class ActivitySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer for feed activities"""
+    
+    username = serializers.CharField(source='user.username', read_only=True)
+    
+    class Meta:
+        model = Activity
+        fields = ['id', 'user', 'username', 'verb', 'object_id', 'data', 'created_at']
+        read_only_fields = fields
+
+
+class FollowerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """A user following someone"""
+    
+    user = serializers.IntegerField(source='follower_id', read_only=True)
+    username = serializers.CharField(source='follower.username', read_only=True)
+    
+    class Meta:
+        model = Follow
+        fields = ['user', 'username', 'created_at']
+
+
+class FollowingSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """A user someone follows"""
+    
+    user = serializers.IntegerField(source='following_id', read_only=True)
+    username = serializers.CharField(source='following.username', read_only=True)
+    
+    class Meta:
+        model = Follow
+        fields = ['user', 'username', 'created_at']
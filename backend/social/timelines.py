@@ -0,0 +1,158 @@
+"""
+Per-user feed timelines: the ids of the newest activities a user should see.
+
+A timeline is a Redis sorted set of activity ids (scored by id, so a page is
+one ZREVRANGEBYSCORE from a cursor) when FEED_REDIS_URL is set, and a sorted
+list per user in process memory otherwise (development and tests).
+
+Every stored timeline holds the sentinel member 0, so "empty" and "not built"
+differ: pushes only go to timelines that exist, and a missing one (never
+built, expired, evicted) is rebuilt from the database on read. Timelines keep
+the newest TIMELINE_LENGTH ids and expire TIMELINE_TTL after the last read.
+"""
+
+import bisect
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+try:
+    import redis
+except ImportError:  # optional, in-process timelines only
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'feed:timeline'
+
+TIMELINE_LENGTH = 800
+TIMELINE_TTL = 14 * 86400
+
+# Followers pushed to per Redis round trip
+PUSH_BATCH_SIZE = 1000
+
+# KEYS timelines; ARGV activity id, length. Pushes only to existing timelines
+# and trims past the newest ARGV[2] ids (rank 0 is the sentinel).
+PUSH_LUA = """
+for _, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('ZADD', key, ARGV[1], ARGV[1])
+        redis.call('ZREMRANGEBYRANK', key, 1, -(tonumber(ARGV[2]) + 1))
+    end
+end
+return 0
+"""
+
+
+class LocalTimelines:
+    """Timelines in this process's memory, for development and tests"""
+
+    def __init__(self):
+        self._timelines = {}
+        self._lock = threading.Lock()
+
+    def push(self, user_ids, activity_id):
+        with self._lock:
+            for user_id in user_ids:
+                timeline = self._timelines.get(user_id)
+                if timeline is not None and activity_id not in timeline:
+                    bisect.insort(timeline, activity_id)
+                    del timeline[:-TIMELINE_LENGTH]
+
+    def store(self, user_id, activity_ids):
+        with self._lock:
+            self._timelines[user_id] = sorted(set(activity_ids))[-TIMELINE_LENGTH:]
+
+    def page(self, user_id, before, limit):
+        """Up to ``limit`` ids below ``before``, newest first; None if not built"""
+        with self._lock:
+            timeline = self._timelines.get(user_id)
+            if timeline is None:
+                return None
+            end = bisect.bisect_left(timeline, before) if before else len(timeline)
+            return timeline[max(end - limit, 0):end][::-1]
+
+    def drop(self, user_id):
+        with self._lock:
+            self._timelines.pop(user_id, None)
+
+
+class RedisTimelines:
+    """Timelines shared by every instance"""
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self.script = self.client.register_script(PUSH_LUA)
+
+    @staticmethod
+    def key(user_id):
+        return f'{KEY_PREFIX}:{user_id}'
+
+    def push(self, user_ids, activity_id):
+        user_ids = list(user_ids)
+        pipe = self.client.pipeline(transaction=False)
+        for offset in range(0, len(user_ids), PUSH_BATCH_SIZE):
+            keys = [self.key(user_id) for user_id in user_ids[offset:offset + PUSH_BATCH_SIZE]]
+            self.script(keys=keys, args=[activity_id, TIMELINE_LENGTH], client=pipe)
+        pipe.execute()
+
+    def store(self, user_id, activity_ids):
+        key = self.key(user_id)
+        members = {0: 0, **{activity_id: activity_id for activity_id in activity_ids[-TIMELINE_LENGTH:]}}
+        pipe = self.client.pipeline()
+        pipe.delete(key)
+        pipe.zadd(key, members)
+        pipe.expire(key, TIMELINE_TTL)
+        pipe.execute()
+
+    def page(self, user_id, before, limit):
+        key = self.key(user_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zrevrangebyscore(key, f'({before}' if before else '+inf', '(0', start=0, num=limit)
+        pipe.expire(key, TIMELINE_TTL)
+        ids, exists = pipe.execute()
+        if not exists:
+            return None
+        return [int(activity_id) for activity_id in ids]
+
+    def drop(self, user_id):
+        self.client.delete(self.key(user_id))
+
+
+_local = LocalTimelines()
+_redis = None
+_redis_lock = threading.Lock()
+_redis_down_until = 0.0
+
+# Seconds to skip Redis after it fails, so an outage doesn't add a connect
+# timeout to every feed read
+REDIS_RETRY_INTERVAL = 5
+
+# What a timeline call raises when its store is down
+STORE_ERRORS = (redis.RedisError,) if redis is not None else ()
+
+
+def get_timelines():
+    """
+    The shared timelines, this process's when there is no Redis, or None
+    while Redis is failing (callers read from the database meanwhile)
+    """
+    global _redis
+    url = getattr(settings, 'FEED_REDIS_URL', None)
+    if not url or redis is None:
+        return _local
+    if time.monotonic() < _redis_down_until:
+        return None
+    if _redis is None:
+        with _redis_lock:
+            if _redis is None:
+                _redis = RedisTimelines(url)
+    return _redis
+
+
+def store_failed(error):
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + REDIS_RETRY_INTERVAL
+    logger.warning('Feed timelines unavailable, using the database: %s', error)
@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import FollowerListView, FollowingListView, feed, follow_user
+
+urlpatterns = [
+    path('feed/', feed, name='social_feed'),
+    path('users/<int:user_id>/follow/', follow_user, name='follow_user'),
+    path('users/<int:user_id>/followers/', FollowerListView.as_view(), name='user_followers'),
+    path('users/<int:user_id>/following/', FollowingListView.as_view(), name='user_following'),
+]
@@ -1,3 +1,90 @@
-from django.shortcuts import render
+from django.contrib.auth import get_user_model
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from .feed import FEED_MAX_PAGE_SIZE, FEED_PAGE_SIZE, feed_page, follow, unfollow
+from .models import Follow
+from .serializers import ActivitySerializer, FollowerSerializer, FollowingSerializer
 
-# Create your views here.
+User = get_user_model()
+
+
+def _visible_user(request, user_id):
+    """A user whose connections the requester may see (public profile or self)"""
+    user = get_object_or_404(User, pk=user_id)
+    if user != request.user and not user.is_profile_public:
+        raise NotFound()
+    return user
+
+
+@api_view(['POST', 'DELETE'])
+@permission_classes([permissions.IsAuthenticated])
+def follow_user(request, user_id):
+    """
+    POST/DELETE /api/social/users/<id>/follow/
+    Follow or unfollow a user with a public profile
+    """
+    if request.method == 'DELETE':
+        # Also once the profile went private
+        target = get_object_or_404(User, pk=user_id)
+        if not unfollow(request.user, target):
+            return Response({'error': 'You are not following this user'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'message': 'Unfollowed'}, status=status.HTTP_200_OK)
+    
+    target = _visible_user(request, user_id)
+    if target == request.user:
+        return Response({'error': 'You cannot follow yourself'}, status=status.HTTP_400_BAD_REQUEST)
+    if not follow(request.user, target):
+        return Response({'error': 'You already follow this user'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'message': 'Following'}, status=status.HTTP_201_CREATED)
+
+
+class FollowerListView(generics.ListAPIView):
+    """
+    GET /api/social/users/<id>/followers/
+    Users following a user, newest first
+    """
+    serializer_class = FollowerSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        user = _visible_user(self.request, self.kwargs['user_id'])
+        return Follow.objects.filter(following=user).select_related('follower')
+
+
+class FollowingListView(generics.ListAPIView):
+    """
+    GET /api/social/users/<id>/following/
+    Users a user follows, newest first
+    """
+    serializer_class = FollowingSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        user = _visible_user(self.request, self.kwargs['user_id'])
+        return Follow.objects.filter(follower=user).select_related('following')
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def feed(request):
+    """
+    GET /api/social/feed/?before=<activity id>&limit=20
+    The user's feed, newest first. ``next`` is the ``before`` of the next
+    page, null on the last one.
+    """
+    try:
+        limit = min(int(request.query_params.get('limit', FEED_PAGE_SIZE)), FEED_MAX_PAGE_SIZE)
+        before = int(request.query_params.get('before', 0)) or None
+    except ValueError:
+        return Response({'error': 'limit and before must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    if limit < 1:
+        return Response({'error': 'limit must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    activities, cursor = feed_page(request.user, before, limit)
+    return Response({
+        'results': ActivitySerializer(activities, many=True, context={'request': request}).data,
+        'next': cursor,
+    })
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import ChangeLog
+
+
+@admin.register(ChangeLog)
+class ChangeLogAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'resource', 'object_id', 'action', 'created_at']
+    list_filter = ['resource', 'action']
+    search_fields = ['user__username', 'user__email']
+    ordering = ['-id']
@@ -0,0 +1,59 @@
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.db.models.functions import Cast
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class ChangeLog(models.Model):
+    """
+    Append-only per-user change feed used for delta sync.
+    Entries are read in commit order: by the id of the transaction that wrote
+    them, then by id. Ids alone are allocated before commit, so a transaction
+    that commits late could slip an entry in behind one already read.
+    """
+
+    ACTION_CHOICES = [
+        ('upsert', 'Created or updated'),
+        ('delete', 'Deleted'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='change_log')
+    resource = models.CharField(max_length=30)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # PostgreSQL transaction id (pg_current_xact_id) of the writing transaction
+    txid = models.BigIntegerField(
+        editable=False,
+        db_default=Cast(
+            Cast(models.Func(function='pg_current_xact_id', output_field=models.TextField()), models.TextField()),
+            models.BigIntegerField()
+        ),
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['txid', 'id']
+        indexes = [
+            models.Index(fields=['user', 'txid', 'id']),
+            models.Index(fields=['txid', 'id']),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.action} {self.resource}:{self.object_id}"
+
+    @staticmethod
+    def after(position):
+        """Lookup for entries past ``(txid, id)`` in commit order"""
+        txid, entry_id = position
+        return models.Q(txid__gt=txid) | models.Q(txid=txid, id__gt=entry_id)
+
+
+def settled_txid(using=DEFAULT_DB_ALIAS):
+    """
+    The oldest transaction id still running. Every entry below it is
+    committed or rolled back, so no new entry can appear behind those.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint')
+        return cursor.fetchone()[0]
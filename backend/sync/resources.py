@@ -0,0 +1,86 @@
+"""
+Models exposed through the delta-sync feed.
+
+Each resource names the model, the query path to its owner, a callable that
+resolves the owner id from an instance (used by the signal handlers), and the
+fields sent to clients.
+"""
+
+from users.models import UserGoal
+from workouts.models import (
+    WorkoutSession,
+    ExerciseSet,
+    WorkoutRoutine,
+    RoutineExercise,
+    BodyWeightLog
+)
+
+
+def _routine_owner(routine_exercise):
+    if 'routine' in routine_exercise._state.fields_cache:
+        return routine_exercise.routine.user_id
+    return WorkoutRoutine.objects.filter(pk=routine_exercise.routine_id).values_list(
+        'user_id', flat=True
+    ).first()
+
+
+SYNC_RESOURCES = {
+    'workout_session': {
+        'model': WorkoutSession,
+        'owner_lookup': 'user',
+        'owner': lambda obj: obj.user_id,
+        'fields': [
+            'id', 'routine', 'name', 'notes', 'start_time', 'end_time',
+            'duration_minutes', 'total_volume', 'total_sets', 'is_completed',
+            'created_at',
+        ],
+    },
+    'exercise_set': {
+        'model': ExerciseSet,
+        'owner_lookup': 'user',
+        'owner': lambda obj: obj.user_id,
+        'fields': [
+            'id', 'session', 'exercise', 'set_number', 'set_type', 'reps',
+            'weight', 'rest_seconds', 'duration_seconds', 'distance_meters',
+            'difficulty', 'notes', 'is_personal_record', 'is_planned',
+            'created_at',
+        ],
+    },
+    'workout_routine': {
+        'model': WorkoutRoutine,
+        'owner_lookup': 'user',
+        'owner': lambda obj: obj.user_id,
+        'fields': [
+            'id', 'name', 'description', 'is_public', 'total_uses',
+            'average_duration', 'created_at', 'updated_at',
+        ],
+    },
+    'routine_exercise': {
+        'model': RoutineExercise,
+        'owner_lookup': 'routine__user',
+        'owner': _routine_owner,
+        'fields': [
+            'id', 'routine', 'exercise', 'order', 'default_sets',
+            'default_reps', 'default_weight', 'default_rest_seconds', 'notes',
+            'use_custom_sets', 'custom_sets',
+        ],
+    },
+    'body_weight_log': {
+        'model': BodyWeightLog,
+        'owner_lookup': 'user',
+        'owner': lambda obj: obj.user_id,
+        'fields': ['id', 'weight', 'date', 'notes', 'created_at'],
+    },
+    'user_goal': {
+        'model': UserGoal,
+        'owner_lookup': 'user',
+        'owner': lambda obj: obj.user_id,
+        'fields': [
+            'id', 'title', 'description', 'target_date', 'is_achieved',
+            'achieved_at', 'created_at',
+        ],
+    },
+}
+
+# Reverse lookup used by the signal handlers
+RESOURCE_BY_MODEL = {spec['model']: name for name, spec in SYNC_RESOURCES.items()}
@@ -0,0 +1,69 @@
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete
+from .models import ChangeLog
+from .resources import SYNC_RESOURCES, RESOURCE_BY_MODEL
+
+User = get_user_model()
+
+_state = threading.local()
+
+
+@contextmanager
+def change_log_paused():
+    """
+    Don't log changes made inside the block, for rows that move rather than
+    change (e.g. sessions going to the cold archive)
+    """
+    previous = getattr(_state, 'paused', False)
+    _state.paused = True
+    try:
+        yield
+    finally:
+        _state.paused = previous
+
+
+def record_change(resource, instance, action):
+    """Append one entry to the owner's change log"""
+    if getattr(_state, 'paused', False):
+        return
+    user_id = SYNC_RESOURCES[resource]['owner'](instance)
+    if user_id is None:
+        return
+    ChangeLog.objects.create(
+        user_id=user_id,
+        resource=resource,
+        object_id=instance.pk,
+        action=action,
+    )
+
+
+def record_changes(resource, user_id, object_ids, action):
+    """Append entries for rows written in bulk, which skips the signals"""
+    if getattr(_state, 'paused', False) or user_id is None:
+        return
+    ChangeLog.objects.bulk_create([
+        ChangeLog(user_id=user_id, resource=resource, object_id=object_id, action=action)
+        for object_id in object_ids
+    ])
+
+
+def _on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    record_change(RESOURCE_BY_MODEL[sender], instance, 'upsert')
+
+
+def _on_delete(sender, instance, origin=None, **kwargs):
+    # Deleting the account cascades through its change log as well
+    if isinstance(origin, User) or (isinstance(origin, QuerySet) and origin.model is User):
+        return
+    record_change(RESOURCE_BY_MODEL[sender], instance, 'delete')
+
+
+for model in RESOURCE_BY_MODEL:
+    post_save.connect(_on_save, sender=model, dispatch_uid=f'sync_save_{model._meta.label_lower}')
+    post_delete.connect(_on_delete, sender=model, dispatch_uid=f'sync_delete_{model._meta.label_lower}')
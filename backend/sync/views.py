@@ -0,0 +1,132 @@
+from django.conf import settings
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from .models import ChangeLog, settled_txid
+from .resources import SYNC_RESOURCES
+
+SYNC_PAGE_SIZE = getattr(settings, 'SYNC_PAGE_SIZE', 1000)
+# Suggested wait while an older transaction holds back the rest of a page
+SYNC_RETRY_SECONDS = getattr(settings, 'SYNC_RETRY_SECONDS', 1)
+
+
+def format_token(position):
+    return '%d.%d' % position
+
+
+def parse_token(value):
+    """``(txid, id)`` of a token, or None for a malformed one"""
+    txid, dot, entry_id = value.partition('.')
+    if not dot:
+        return None
+    try:
+        return int(txid), int(entry_id)
+    except ValueError:
+        return None
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def changes(request):
+    """
+    GET /api/sync/changes/?since=<token>
+    Rows created, updated or deleted since ``token``. Without ``since`` (or
+    with a token older than the retained log) the client must do a full
+    resync and continue from the returned token.
+
+    Entries are sent in commit order. The token never moves past an entry
+    while an older transaction is still running, since that one could still
+    commit changes that belong before it. Such entries are sent again from
+    the same token: ``has_more`` is then false and ``retry_after`` suggests
+    when to ask again (null when every entry returned is settled).
+    """
+    user = request.user
+    log = ChangeLog.objects.filter(user=user)
+
+    since = request.query_params.get('since')
+    if since is not None:
+        if since.isdigit():
+            # Id-only token from before commit ordering: start over
+            since = None
+        else:
+            since = parse_token(since)
+            if since is None:
+                return Response(
+                    {'error': 'since must be a change token'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+    # Read first: every entry below it is then visible to the queries below
+    horizon = settled_txid()
+
+    # Pruning removes the oldest entries across all users; a token below the
+    # oldest retained one may have missed tombstones
+    oldest = ChangeLog.objects.order_by('txid', 'id').values_list('txid', 'id').first()
+    if since is None or (oldest and since < oldest):
+        return Response({
+            'token': format_token((horizon, 0)),
+            'full_resync': True,
+            'has_more': False,
+            'retry_after': None,
+            'changes': {},
+        })
+
+    entries = list(
+        log.filter(ChangeLog.after(since)).order_by('txid', 'id').values_list(
+            'id', 'resource', 'object_id', 'action', 'txid'
+        )[:SYNC_PAGE_SIZE + 1]
+    )
+    has_more = len(entries) > SYNC_PAGE_SIZE
+    entries = entries[:SYNC_PAGE_SIZE]
+
+    # Advance the token only over settled entries
+    token = since
+    retry_after = None
+    for entry_id, _, _, _, txid in entries:
+        if txid >= horizon:
+            retry_after = SYNC_RETRY_SECONDS
+            break
+        token = (txid, entry_id)
+    if retry_after is not None:
+        # Asking again now would return the same entries
+        has_more = False
+    elif not has_more:
+        # Nothing else can appear below the horizon: skip to it, so an idle
+        # token keeps up with pruning
+        token = max(token, (horizon, 0))
+
+    # Latest action per object wins
+    latest = {}
+    for _, resource, object_id, action, _ in entries:
+        latest[(resource, object_id)] = action
+
+    result = {}
+    for (resource, object_id), action in latest.items():
+        bucket = result.setdefault(resource, {'upserted': [], 'deleted': []})
+        if action == 'delete':
+            bucket['deleted'].append(object_id)
+        else:
+            bucket['upserted'].append(object_id)
+
+    for resource, bucket in result.items():
+        spec = SYNC_RESOURCES[resource]
+        ids = bucket['upserted']
+        if not ids:
+            continue
+        rows = list(
+            spec['model'].objects.filter(
+                pk__in=ids, **{spec['owner_lookup']: user}
+            ).values(*spec['fields'])
+        )
+        # Upserted and then deleted outside of signals (e.g. bulk delete)
+        found = {row['id'] for row in rows}
+        bucket['deleted'].extend(pk for pk in ids if pk not in found)
+        bucket['upserted'] = rows
+
+    return Response({
+        'token': format_token(token),
+        'full_resync': False,
+        'has_more': has_more,
+        'retry_after': retry_after,
+        'changes': result,
+    })
@@ -0,0 +1,163 @@
+"""
+Streaming export of a user's full training history.
+
+Every resource is read through a server-side cursor
+(``.iterator(chunk_size=...)``) and written out one line at a time, so memory
+stays flat no matter how many sets a user has logged.
+"""
+
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from workouts.archive import iter_archived_rows
+from workouts.models import (
+    Exercise,
+    WorkoutSession,
+    ExerciseSet,
+    WorkoutRoutine,
+    RoutineExercise,
+    BodyWeightLog
+)
+from .models import UserGoal
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _sessions(user):
+    return WorkoutSession.objects.filter(user=user).order_by('start_time', 'id').values(
+        'id', 'routine_id', 'name', 'notes', 'start_time', 'end_time',
+        'duration_minutes', 'total_volume', 'total_sets', 'is_completed',
+        'created_at'
+    )
+
+
+def _sets(user):
+    return ExerciseSet.objects.filter(user=user).order_by(
+        'performed_at', 'session_id', 'set_number', 'id'
+    ).values(
+        'id', 'session_id', 'exercise_id', 'set_number', 'set_type', 'reps',
+        'weight', 'rest_seconds', 'duration_seconds', 'distance_meters',
+        'difficulty', 'notes', 'is_personal_record', 'created_at',
+        exercise_name=F('exercise__name'),
+    )
+
+
+def _routines(user):
+    return WorkoutRoutine.objects.filter(user=user).order_by('created_at', 'id').values(
+        'id', 'name', 'description', 'is_public', 'total_uses',
+        'average_duration', 'created_at', 'updated_at'
+    )
+
+
+def _routine_exercises(user):
+    return RoutineExercise.objects.filter(routine__user=user).order_by(
+        'routine_id', 'order'
+    ).values(
+        'id', 'routine_id', 'exercise_id', 'order', 'default_sets',
+        'default_reps', 'default_weight', 'default_rest_seconds', 'notes',
+        'use_custom_sets', 'custom_sets',
+        exercise_name=F('exercise__name'),
+    )
+
+
+def _body_weight(user):
+    return BodyWeightLog.objects.filter(user=user).order_by('date').values(
+        'id', 'weight', 'date', 'notes', 'created_at'
+    )
+
+
+def _goals(user):
+    return UserGoal.objects.filter(user=user).order_by('created_at', 'id').values(
+        'id', 'title', 'description', 'target_date', 'is_achieved',
+        'achieved_at', 'created_at'
+    )
+
+
+# Export order: (record type, queryset factory)
+EXPORT_RESOURCES = [
+    ('session', _sessions),
+    ('set', _sets),
+    ('routine', _routines),
+    ('routine_exercise', _routine_exercises),
+    ('body_weight', _body_weight),
+    ('goal', _goals),
+]
+
+
+def _archived_sessions(user, columns):
+    for row in iter_archived_rows(user, 'session'):
+        yield {column: row[column] for column in columns}
+
+
+def _archived_sets(user, columns):
+    names = dict(Exercise.objects.values_list('id', 'name'))
+    for row in iter_archived_rows(user, 'set'):
+        row['exercise_name'] = names.get(row['exercise_id'])
+        yield {column: row[column] for column in columns}
+
+
+# Archived rows (older than anything hot) are exported ahead of their resource
+ARCHIVED_RECORDS = {
+    'session': _archived_sessions,
+    'set': _archived_sets,
+}
+
+
+def iter_records(user, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield ``(record_type, row_dict)`` for every exported row of ``user``"""
+    for record_type, queryset_factory in EXPORT_RESOURCES:
+        queryset = queryset_factory(user)
+        if record_type in ARCHIVED_RECORDS:
+            columns = [*queryset.query.values_select, *queryset.query.annotation_select]
+            for row in ARCHIVED_RECORDS[record_type](user, columns):
+                yield record_type, row
+        for row in queryset.iterator(chunk_size=chunk_size):
+            yield record_type, row
+
+
+def iter_ndjson(user, chunk_size=EXPORT_CHUNK_SIZE):
+    """One JSON object per line: ``{"type": ..., "data": {...}}``"""
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for record_type, row in iter_records(user, chunk_size):
+        yield encoder.encode({'type': record_type, 'data': row}) + '\n'
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(user, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    One CSV stream with a section per record type. Every row starts with
+    its record type, and each section opens with its own header row.
+    """
+    writer = csv.writer(_Echo())
+    encoder = DjangoJSONEncoder()
+    current_type = None
+
+    for record_type, row in iter_records(user, chunk_size):
+        if record_type != current_type:
+            current_type = record_type
+            yield writer.writerow(['record_type', *row.keys()])
+
+        values = [
+            encoder.encode(value) if isinstance(value, (list, dict)) else value
+            for value in row.values()
+        ]
+        yield writer.writerow([record_type, *values])
+
+
+def iter_export(user, export_format='ndjson', chunk_size=EXPORT_CHUNK_SIZE):
+    """Return a line iterator for ``export_format`` ('ndjson' or 'csv')"""
+    if export_format == 'csv':
+        return iter_csv(user, chunk_size)
+    return iter_ndjson(user, chunk_size)
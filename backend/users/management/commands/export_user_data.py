@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from users.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, iter_export
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Export full training histories (GDPR data export), one file per user'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'emails',
+            nargs='*',
+            help='Emails of the users to export'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Export every active user'
+        )
+        parser.add_argument(
+            '--output',
+            choices=list(EXPORT_FORMATS),
+            default='ndjson',
+            help='Export format (default: ndjson)'
+        )
+        parser.add_argument(
+            '--output-dir',
+            default='exports',
+            help='Directory the export files are written to'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help='Rows fetched per server-side cursor round trip'
+        )
+
+    def handle(self, *args, **options):
+        if options['all']:
+            users = User.objects.filter(is_active=True)
+        elif options['emails']:
+            users = User.objects.filter(email__in=options['emails'])
+            missing = set(options['emails']) - set(users.values_list('email', flat=True))
+            if missing:
+                raise CommandError(f"Unknown users: {', '.join(sorted(missing))}")
+        else:
+            raise CommandError('Pass one or more emails, or --all')
+
+        output_dir = Path(options['output_dir'])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        export_format = options['output']
+
+        exported = 0
+        for user in users.order_by('pk').iterator():
+            path = output_dir / f"user-{user.pk}.{export_format}"
+            with path.open('w', encoding='utf-8', newline='') as handle:
+                for line in iter_export(user, export_format, options['chunk_size']):
+                    handle.write(line)
+            exported += 1
+            self.stdout.write(f'Exported {user.email} -> {path}')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\nSuccessfully exported {exported} users!')
+        )
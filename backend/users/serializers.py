@@ -1,12 +1,13 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from config.fieldsets import SparseFieldsMixin
 from .models import UserGoal, UserStats
 
 User = get_user_model()
 
 
-class UserStatsSerializer(serializers.ModelSerializer):
+class UserStatsSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for user statistics"""
     
     class Meta:
@@ -18,7 +19,7 @@ class UserStatsSerializer(serializers.ModelSerializer):
         ]
 
 
-class UserGoalSerializer(serializers.ModelSerializer):
+class UserGoalSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for user goals"""
     
     class Meta:
@@ -30,7 +31,7 @@ class UserGoalSerializer(serializers.ModelSerializer):
         read_only_fields = ['achieved_at', 'created_at']
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for user profile (GET requests)"""
     
     stats = UserStatsSerializer(read_only=True)
@@ -47,9 +48,10 @@ class UserProfileSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['email', 'created_at', 'updated_at']
+        expandable_fields = ['stats', 'goals']
 
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+class UserRegistrationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for user registration"""
     
     password = serializers.CharField(
@@ -95,7 +97,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserUpdateSerializer(serializers.ModelSerializer):
+class UserUpdateSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for updating user profile"""
     
     class Meta:
@@ -11,6 +11,7 @@ from .views import (
     UserGoalDetailView,
     check_auth,
     body_weight_log,
+    export_data,
 )
 
 urlpatterns = [
@@ -26,6 +27,7 @@ urlpatterns = [
     path('profile/update/', UserUpdateView.as_view(), name='user_update'),
     path('change-password/', ChangePasswordView.as_view(), name='change_password'),
     path('body-weight/', body_weight_log, name='body_weight_log'),
+    path('export/', export_data, name='export_data'),
     
     # User Goals
     path('goals/', UserGoalListCreateView.as_view(), name='user_goals'),
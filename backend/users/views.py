@@ -3,8 +3,13 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
+from workouts import leaderboards
 from workouts.models import BodyWeightLog
 from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from config.fieldsets import SparseQuerysetMixin, requested_selection
+from config.throttling import LoginRateThrottle
 from .serializers import (
     UserRegistrationSerializer,
     UserProfileSerializer,
@@ -13,6 +18,7 @@ from .serializers import (
     UserGoalSerializer
 )
 from .models import UserGoal
+from .exports import EXPORT_FORMATS, iter_export
 
 User = get_user_model()
 
@@ -25,6 +31,7 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserRegistrationSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [LoginRateThrottle]
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -50,6 +57,7 @@ class LoginView(APIView):
     Login user with email and password
     """
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [LoginRateThrottle]
     
     def post(self, request):
         email = request.data.get('email')
@@ -126,6 +134,9 @@ class UserProfileView(APIView):
     
     def get(self, request):
         serializer = UserProfileSerializer(request.user)
+        fields_tree, expand_tree = requested_selection(request)
+        if fields_tree is not None or expand_tree is not None:
+            serializer.apply_selection(fields_tree, expand_tree)
         return Response(serializer.data)
 
 
@@ -140,6 +151,12 @@ class UserUpdateView(generics.UpdateAPIView):
     def get_object(self):
         return self.request.user
     
+    def perform_update(self, serializer):
+        was_public = serializer.instance.is_profile_public
+        user = serializer.save()
+        if user.is_profile_public != was_public:
+            leaderboards.profile_visibility_changed(user)
+    
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
@@ -175,7 +192,7 @@ class ChangePasswordView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserGoalListCreateView(generics.ListCreateAPIView):
+class UserGoalListCreateView(SparseQuerysetMixin, generics.ListCreateAPIView):
     """
     GET/POST /api/users/goals/
     List and create user goals
@@ -190,7 +207,7 @@ class UserGoalListCreateView(generics.ListCreateAPIView):
         serializer.save(user=self.request.user)
 
 
-class UserGoalDetailView(generics.RetrieveUpdateDestroyAPIView):
+class UserGoalDetailView(SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     GET/PUT/PATCH/DELETE /api/users/goals/<id>/
     Retrieve, update, or delete a specific goal
@@ -237,4 +254,27 @@ def body_weight_log(request):
             'weight': log.weight,
             'date': log.date,
             'notes': log.notes
-        }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
\ No newline at end of file
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def export_data(request):
+    """
+    GET /api/users/export/?output=ndjson|csv
+    Stream the user's full training history (sessions, sets, routines,
+    body-weight logs and goals) as NDJSON or CSV
+    """
+    export_format = request.query_params.get('output', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return Response({
+            'error': f"output must be one of: {', '.join(EXPORT_FORMATS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    filename = f"7fit7-export-{request.user.pk}-{timezone.now():%Y%m%d}.{export_format}"
+    response = StreamingHttpResponse(
+        iter_export(request.user, export_format),
+        content_type=EXPORT_FORMATS[export_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
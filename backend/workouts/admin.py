@@ -5,7 +5,11 @@ from .models import (
     RoutineExercise, 
     WorkoutSession, 
     ExerciseSet,
-    WorkoutLike
+    WorkoutLike,
+    SessionArchive,
+    TrainingCalendar,
+    ExerciseTrend,
+    WorkloadWindow
 )
 
 
@@ -55,10 +59,49 @@ class ExerciseSetAdmin(admin.ModelAdmin):
         'weight', 'set_type', 'is_personal_record'
     ]
     list_filter = ['set_type', 'is_personal_record', 'created_at']
-    search_fields = ['session__user__username', 'exercise__name']
+    search_fields = ['user__username', 'exercise__name']
 
 
 @admin.register(WorkoutLike)
 class WorkoutLikeAdmin(admin.ModelAdmin):
     list_display = ['user', 'routine', 'created_at']
-    search_fields = ['user__username', 'routine__name']
\ No newline at end of file
+    search_fields = ['user__username', 'routine__name']
+
+
+@admin.register(SessionArchive)
+class SessionArchiveAdmin(admin.ModelAdmin):
+    list_display = ['user', 'year', 'session_count', 'set_count', 'updated_at']
+    list_filter = ['year']
+    search_fields = ['user__username']
+    exclude = ['data']
+    readonly_fields = [
+        'user', 'year', 'session_count', 'set_count', 'first_session_id',
+        'last_session_id', 'format_version'
+    ]
+
+
+@admin.register(TrainingCalendar)
+class TrainingCalendarAdmin(admin.ModelAdmin):
+    list_display = ['user', 'year', 'training_days', 'updated_at']
+    list_filter = ['year']
+    search_fields = ['user__username']
+    exclude = ['sessions', 'volume']
+    readonly_fields = ['user', 'year', 'training_days']
+
+
+@admin.register(ExerciseTrend)
+class ExerciseTrendAdmin(admin.ModelAdmin):
+    list_display = [
+        'user', 'exercise', 'sessions', 'latest_e1rm', 'slope_percent',
+        'is_plateau', 'deload_suggested', 'computed_at'
+    ]
+    list_filter = ['is_plateau', 'deload_suggested']
+    search_fields = ['user__username', 'exercise__name']
+
+
+@admin.register(WorkloadWindow)
+class WorkloadWindowAdmin(admin.ModelAdmin):
+    list_display = ['user', 'end_date', 'updated_at']
+    search_fields = ['user__username']
+    exclude = ['data']
+    readonly_fields = ['user', 'end_date']
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class WorkoutsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'workouts'
+
+    def ready(self):
+        from . import muscles, training_calendar, workload
+        muscles.connect_signals()
+        training_calendar.connect_signals()
+        workload.connect_signals()
@@ -0,0 +1,536 @@
+"""
+Cold archival of old completed sessions.
+
+Completed sessions that started before the archive horizon are moved, with
+their sets, out of WorkoutSession/ExerciseSet into one SessionArchive row per
+user and year. The blob is columnar: every column of a NumPy structured array
+is stored as its own array in a compressed ``.npz``, so similar values sit
+together and compress well, and nothing is pickled.
+
+Reads hydrate archived rows back into unsaved WorkoutSession/ExerciseSet
+instances with their sets "prefetched", so the regular serializers render
+them exactly like hot sessions. Archived sessions are read-only.
+"""
+
+import io
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from sync.signals import change_log_paused
+from .models import (
+    Exercise,
+    WorkoutRoutine,
+    WorkoutSession,
+    ExerciseSet,
+    SessionArchive
+)
+from .training_calendar import calendar_unchanged
+from .trends import MAX_REPS
+
+ARCHIVE_FORMAT_VERSION = 1
+
+DEFAULT_HORIZON_DAYS = 730
+
+# Stand-ins for NULL: -1 where the column can't be negative, INT64_MIN otherwise
+NULL = -1
+NULL_I8 = np.iinfo(np.int64).min
+
+SESSION_DTYPE = np.dtype([
+    ('id', 'i8'),
+    ('routine_id', 'i8'),
+    ('start_time', 'i8'),
+    ('end_time', 'i8'),
+    ('duration_minutes', 'i4'),
+    ('total_volume', 'i8'),
+    ('total_sets', 'i4'),
+    ('version', 'i4'),
+    ('created_at', 'i8'),
+    ('updated_at', 'i8'),
+])
+
+SET_DTYPE = np.dtype([
+    ('id', 'i8'),
+    ('session_id', 'i8'),
+    ('exercise_id', 'i8'),
+    ('set_number', 'i4'),
+    ('set_type', 'u1'),
+    ('reps', 'i4'),
+    ('weight', 'i8'),
+    ('rest_seconds', 'i4'),
+    ('duration_seconds', 'i4'),
+    ('distance_meters', 'i8'),
+    ('difficulty', 'i2'),
+    ('is_personal_record', '?'),
+    ('created_at', 'i8'),
+    ('performed_at', 'i8'),
+])
+
+SESSION_TEXT_FIELDS = ['name', 'notes']
+SET_TEXT_FIELDS = ['notes']
+
+# Decimal columns are stored as integer hundredths
+DECIMAL_FIELDS = {'total_volume', 'weight', 'distance_meters'}
+DATETIME_FIELDS = {'start_time', 'end_time', 'created_at', 'updated_at', 'performed_at'}
+NULLABLE_FIELDS = {
+    'routine_id', 'end_time', 'duration_minutes', 'weight', 'rest_seconds',
+    'duration_seconds', 'distance_meters', 'difficulty',
+}
+
+SET_TYPES = [choice[0] for choice in ExerciseSet.SET_TYPE_CHOICES]
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def horizon_days():
+    return getattr(settings, 'SESSION_ARCHIVE_HORIZON_DAYS', DEFAULT_HORIZON_DAYS)
+
+
+# ============= COLUMN CODECS =============
+
+def _null_for(name):
+    return NULL_I8 if name in DECIMAL_FIELDS or name in DATETIME_FIELDS else NULL
+
+
+def _encode_value(name, value):
+    if value is None:
+        return _null_for(name)
+    if name in DATETIME_FIELDS:
+        return (value - _EPOCH) // timedelta(microseconds=1)
+    if name in DECIMAL_FIELDS:
+        return int(Decimal(value).scaleb(2).to_integral_value())
+    if name == 'set_type':
+        return SET_TYPES.index(value)
+    return value
+
+
+def _decode_value(name, value):
+    value = value.item()
+    if name in NULLABLE_FIELDS and value == _null_for(name):
+        return None
+    if name in DATETIME_FIELDS:
+        return _EPOCH + timedelta(microseconds=value)
+    if name in DECIMAL_FIELDS:
+        return Decimal(value).scaleb(-2)
+    if name == 'set_type':
+        return SET_TYPES[value]
+    return value
+
+
+def _to_array(rows, dtype):
+    array = np.empty(len(rows), dtype=dtype)
+    for name in dtype.names:
+        array[name] = [_encode_value(name, row[name]) for row in rows]
+    return array
+
+
+def _pack_text(values):
+    """Strings as one UTF-8 buffer plus end offsets (no object arrays/pickle)"""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.cumsum([len(value) for value in encoded], dtype=np.int64)
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_text(buffer, offsets):
+    raw = buffer.tobytes()
+    starts = np.concatenate(([0], offsets[:-1])) if len(offsets) else []
+    return [raw[start:end].decode('utf-8') for start, end in zip(starts, offsets)]
+
+
+class ArchiveData:
+    """Decoded contents of one SessionArchive blob"""
+
+    def __init__(self, sessions, sets, session_text, set_text):
+        self.sessions = sessions          # SESSION_DTYPE array
+        self.sets = sets                  # SET_DTYPE array
+        self.session_text = session_text  # {field: [str, ...]} aligned with sessions
+        self.set_text = set_text          # {field: [str, ...]} aligned with sets
+
+    @classmethod
+    def from_rows(cls, session_rows, set_rows):
+        return cls(
+            _to_array(session_rows, SESSION_DTYPE),
+            _to_array(set_rows, SET_DTYPE),
+            {name: [row[name] for row in session_rows] for name in SESSION_TEXT_FIELDS},
+            {name: [row[name] for row in set_rows] for name in SET_TEXT_FIELDS},
+        )
+
+    @classmethod
+    def from_bytes(cls, blob):
+        with np.load(io.BytesIO(bytes(blob)), allow_pickle=False) as columns:
+            sessions = np.empty(len(columns['session.id']), dtype=SESSION_DTYPE)
+            for name in SESSION_DTYPE.names:
+                sessions[name] = columns[f'session.{name}']
+            sets = np.empty(len(columns['set.id']), dtype=SET_DTYPE)
+            for name in SET_DTYPE.names:
+                sets[name] = columns[f'set.{name}']
+            session_text = {
+                name: _unpack_text(columns[f'session.{name}'], columns[f'session.{name}.offsets'])
+                for name in SESSION_TEXT_FIELDS
+            }
+            set_text = {
+                name: _unpack_text(columns[f'set.{name}'], columns[f'set.{name}.offsets'])
+                for name in SET_TEXT_FIELDS
+            }
+        return cls(sessions, sets, session_text, set_text)
+
+    def to_bytes(self):
+        columns = {}
+        for name in SESSION_DTYPE.names:
+            columns[f'session.{name}'] = self.sessions[name]
+        for name in SET_DTYPE.names:
+            columns[f'set.{name}'] = self.sets[name]
+        for name, values in self.session_text.items():
+            columns[f'session.{name}'], columns[f'session.{name}.offsets'] = _pack_text(values)
+        for name, values in self.set_text.items():
+            columns[f'set.{name}'], columns[f'set.{name}.offsets'] = _pack_text(values)
+
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **columns)
+        return buffer.getvalue()
+
+    def merge(self, other):
+        """Append ``other``'s sessions and sets (sessions stay sorted by start)"""
+        sessions = np.concatenate([self.sessions, other.sessions])
+        order = np.argsort(sessions['start_time'], kind='stable')
+        sets = np.concatenate([self.sets, other.sets])
+        set_order = np.lexsort((sets['set_number'], sets['session_id']))
+
+        session_text = {}
+        for name in SESSION_TEXT_FIELDS:
+            values = self.session_text[name] + other.session_text[name]
+            session_text[name] = [values[i] for i in order]
+        set_text = {}
+        for name in SET_TEXT_FIELDS:
+            values = self.set_text[name] + other.set_text[name]
+            set_text[name] = [values[i] for i in set_order]
+
+        return ArchiveData(sessions[order], sets[set_order], session_text, set_text)
+
+    def session_rows(self, mask=None):
+        """Sessions as column dicts (model field values), oldest first"""
+        indices = np.flatnonzero(mask) if mask is not None else range(len(self.sessions))
+        for i in indices:
+            record = self.sessions[i]
+            row = {name: _decode_value(name, record[name]) for name in SESSION_DTYPE.names}
+            for name in SESSION_TEXT_FIELDS:
+                row[name] = self.session_text[name][i]
+            row['is_completed'] = True
+            yield row
+
+    def e1rm_bests(self):
+        """
+        Best estimated 1RM per exercise id (a string key) over the sets that
+        count for leaderboards.py: weighted, non-warm-up, reps <= MAX_REPS
+        """
+        sets = self.sets
+        sets = sets[
+            (sets['weight'] > 0) & (sets['reps'] > 0) & (sets['reps'] <= MAX_REPS)
+            & (sets['set_type'] != SET_TYPES.index('warmup'))
+        ]
+        if not len(sets):
+            return {}
+        e1rm = sets['weight'] / 100 * (1 + sets['reps'] / 30)
+        exercise_ids, rows = np.unique(sets['exercise_id'], return_inverse=True)
+        best = np.zeros(len(exercise_ids))
+        np.maximum.at(best, rows, e1rm)
+        return {str(exercise_id): round(float(score), 2) for exercise_id, score in zip(exercise_ids, best)}
+
+    def set_rows(self, session_ids=None, indices=None):
+        """
+        Sets as column dicts, grouped by session and ordered by set number,
+        or those at ``indices`` in that order
+        """
+        if indices is None:
+            if session_ids is None:
+                indices = range(len(self.sets))
+            else:
+                indices = np.flatnonzero(np.isin(self.sets['session_id'], list(session_ids)))
+        for i in indices:
+            record = self.sets[i]
+            row = {name: _decode_value(name, record[name]) for name in SET_DTYPE.names}
+            for name in SET_TEXT_FIELDS:
+                row[name] = self.set_text[name][i]
+            yield row
+
+
+# ============= ARCHIVING =============
+
+SESSION_COLUMNS = [
+    'id', 'routine_id', 'name', 'notes', 'start_time', 'end_time',
+    'duration_minutes', 'total_volume', 'total_sets', 'version',
+    'created_at', 'updated_at',
+]
+
+SET_COLUMNS = [
+    'id', 'session_id', 'exercise_id', 'set_number', 'set_type', 'reps',
+    'weight', 'rest_seconds', 'duration_seconds', 'distance_meters',
+    'difficulty', 'notes', 'is_personal_record', 'created_at', 'performed_at',
+]
+
+
+def archive_candidates(cutoff, user=None):
+    """``(user_id, year)`` pairs with completed sessions older than ``cutoff``"""
+    queryset = WorkoutSession.objects.filter(is_completed=True, start_time__lt=cutoff)
+    if user is not None:
+        queryset = queryset.filter(user=user)
+    return queryset.values_list('user_id', 'start_time__year').distinct().order_by(
+        'user_id', 'start_time__year'
+    )
+
+
+def archive_user_year(user_id, year, cutoff):
+    """
+    Move one user's completed sessions of ``year`` started before ``cutoff``
+    into their SessionArchive. Returns ``(sessions, sets)`` moved.
+    """
+    with transaction.atomic():
+        sessions = WorkoutSession.objects.select_for_update().filter(
+            user_id=user_id,
+            is_completed=True,
+            start_time__year=year,
+            start_time__lt=cutoff,
+        )
+        session_rows = list(sessions.order_by('start_time', 'id').values(*SESSION_COLUMNS))
+        if not session_rows:
+            return 0, 0
+
+        session_ids = [row['id'] for row in session_rows]
+        set_rows = list(
+            ExerciseSet.objects.filter(user_id=user_id, session_id__in=session_ids)
+            .order_by('session_id', 'set_number', 'id')
+            .values(*SET_COLUMNS)
+        )
+        data = ArchiveData.from_rows(session_rows, set_rows)
+
+        archive = SessionArchive.objects.select_for_update().filter(
+            user_id=user_id, year=year
+        ).first()
+        if archive is None:
+            archive = SessionArchive(user_id=user_id, year=year)
+        else:
+            data = ArchiveData.from_bytes(archive.data).merge(data)
+
+        archive.data = data.to_bytes()
+        archive.format_version = ARCHIVE_FORMAT_VERSION
+        archive.session_count = len(data.sessions)
+        archive.set_count = len(data.sets)
+        archive.first_session_id = int(data.sessions['id'].min())
+        archive.last_session_id = int(data.sessions['id'].max())
+        archive.e1rm_bests = data.e1rm_bests()
+        archive.save()
+
+        # The rows still exist for the user, just elsewhere: not a sync
+        # delete, and still on their training calendar
+        with change_log_paused(), calendar_unchanged():
+            ExerciseSet.objects.filter(user_id=user_id, session_id__in=session_ids).delete()
+            WorkoutSession.objects.filter(pk__in=session_ids).delete()
+
+    return len(session_rows), len(set_rows)
+
+
+def archive_sessions(days=None, user=None):
+    """Archive everything older than the horizon; yields per user-year results"""
+    cutoff = timezone.now() - timedelta(days=horizon_days() if days is None else days)
+    for user_id, year in list(archive_candidates(cutoff, user)):
+        sessions, sets = archive_user_year(user_id, year, cutoff)
+        yield user_id, year, sessions, sets
+
+
+# ============= READING =============
+
+def _hydrate(archive, data, mask):
+    """Unsaved WorkoutSession instances (newest first) with their sets attached"""
+    session_rows = list(data.session_rows(mask))
+    if not session_rows:
+        return []
+
+    set_rows = list(data.set_rows({row['id'] for row in session_rows}))
+    exercises = Exercise.objects.in_bulk({row['exercise_id'] for row in set_rows})
+    routines = WorkoutRoutine.objects.in_bulk(
+        {row['routine_id'] for row in session_rows if row['routine_id']}
+    )
+
+    sets_by_session = {}
+    for row in set_rows:
+        exercise = exercises.get(row['exercise_id'])
+        if exercise is None:
+            # The exercise was deleted since; hot sets would have cascaded
+            continue
+        exercise_set = ExerciseSet(user_id=archive.user_id, **row)
+        exercise_set.exercise = exercise
+        exercise_set._state.adding = False
+        sets_by_session.setdefault(row['session_id'], []).append(exercise_set)
+
+    sessions = []
+    for row in reversed(session_rows):
+        routine = routines.get(row['routine_id'])
+        row['routine_id'] = routine.pk if routine else None
+        session = WorkoutSession(user_id=archive.user_id, **row)
+        session.routine = routine
+        session._state.adding = False
+
+        session_sets = ExerciseSet.objects.none()
+        session_sets._result_cache = sets_by_session.get(session.pk, [])
+        session_sets._prefetch_done = True
+        session._prefetched_objects_cache = {'exercise_sets': session_sets}
+        sessions.append(session)
+    return sessions
+
+
+def _date_mask(data, start=None, end=None):
+    mask = np.ones(len(data.sessions), dtype=bool)
+    if start is not None:
+        mask &= data.sessions['start_time'] >= _encode_value('start_time', start)
+    if end is not None:
+        mask &= data.sessions['start_time'] <= _encode_value('start_time', end)
+    return mask
+
+
+def find_archived_session(user, session_id):
+    """The archived session ``session_id`` of ``user`` hydrated, or None"""
+    archives = SessionArchive.objects.filter(
+        user=user,
+        first_session_id__lte=session_id,
+        last_session_id__gte=session_id,
+    )
+    for archive in archives:
+        data = ArchiveData.from_bytes(archive.data)
+        found = _hydrate(archive, data, data.sessions['id'] == session_id)
+        if found:
+            return found[0]
+    return None
+
+
+def has_archives(user):
+    return SessionArchive.objects.filter(user=user).exists()
+
+
+class ArchivedSessions:
+    """
+    A user's archived sessions, newest first, as a lazily decoded sequence.
+    Only the archives a requested slice touches are decompressed; without a
+    date filter the count comes from the stored per-archive counts.
+    """
+
+    def __init__(self, user, start=None, end=None):
+        self.start = start
+        self.end = end
+        archives = SessionArchive.objects.filter(user=user).defer('data')
+        if start is not None:
+            archives = archives.filter(year__gte=start.year)
+        if end is not None:
+            archives = archives.filter(year__lte=end.year)
+        self.archives = list(archives.order_by('-year'))
+        self._decoded = {}
+
+    def _sessions_of(self, archive):
+        if archive.pk not in self._decoded:
+            archive.refresh_from_db(fields=['data'])
+            data = ArchiveData.from_bytes(archive.data)
+            self._decoded[archive.pk] = _hydrate(archive, data, _date_mask(data, self.start, self.end))
+        return self._decoded[archive.pk]
+
+    def _count_of(self, archive):
+        if self.start is None and self.end is None:
+            return archive.session_count
+        return len(self._sessions_of(archive))
+
+    def __len__(self):
+        return sum(self._count_of(archive) for archive in self.archives)
+
+    def slice(self, offset, limit):
+        result = []
+        for archive in self.archives:
+            if len(result) >= limit:
+                break
+            count = self._count_of(archive)
+            if offset >= count:
+                offset -= count
+                continue
+            sessions = self._sessions_of(archive)
+            result.extend(sessions[offset:offset + limit - len(result)])
+            offset = 0
+        return result
+
+
+class SessionHistory:
+    """
+    Hot sessions followed by archived ones, sliceable for the paginator.
+    Archived sessions all predate the horizon, so newest-first order holds.
+    """
+
+    def __init__(self, hot_queryset, user, start=None, end=None):
+        self.hot = hot_queryset
+        self.archived = ArchivedSessions(user, start, end)
+        self._hot_count = None
+
+    def _count_hot(self):
+        if self._hot_count is None:
+            self._hot_count = self.hot.count()
+        return self._hot_count
+
+    def count(self):
+        return self._count_hot() + len(self.archived)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+
+        start = key.start or 0
+        stop = key.stop if key.stop is not None else self.count()
+        hot_count = self._count_hot()
+
+        result = list(self.hot[start:min(stop, hot_count)]) if start < hot_count else []
+        if stop > hot_count:
+            offset = max(start - hot_count, 0)
+            result.extend(self.archived.slice(offset, stop - hot_count - offset))
+        return result
+
+    def __iter__(self):
+        return iter(self[0:self.count()])
+
+
+def archived_exercise_sets(user, exercise_id, before=None, limit=None):
+    """
+    Archived sets of one exercise as column dicts, newest first (then by set
+    number), performed before ``before``. Archives are decoded newest year
+    first and only until ``limit`` sets are found.
+    """
+    archives = SessionArchive.objects.filter(user=user).defer('data').order_by('-year')
+    if before is not None:
+        archives = archives.filter(year__lte=before.year)
+
+    rows = []
+    for archive in archives:
+        if limit is not None and len(rows) >= limit:
+            break
+        archive.refresh_from_db(fields=['data'])
+        sets = ArchiveData.from_bytes(archive.data)
+        mask = sets.sets['exercise_id'] == exercise_id
+        if before is not None:
+            mask &= sets.sets['performed_at'] < _encode_value('performed_at', before)
+        indices = np.flatnonzero(mask)
+        order = np.lexsort((sets.sets['set_number'][indices], -sets.sets['performed_at'][indices]))
+        rows.extend(sets.set_rows(indices=indices[order]))
+    return rows[:limit]
+
+
+def iter_archived_rows(user, kind):
+    """Export rows (oldest first) of archived 'session' or 'set' records"""
+    for archive in SessionArchive.objects.filter(user=user).order_by('year'):
+        data = ArchiveData.from_bytes(archive.data)
+        if kind == 'session':
+            yield from data.session_rows()
+        else:
+            # Same order as the hot export: by performed_at, then within the session
+            yield from sorted(
+                data.set_rows(),
+                key=lambda row: (row['performed_at'], row['session_id'], row['set_number'], row['id'])
+            )
@@ -0,0 +1,236 @@
+"""
+Async variants of the read-heavy workout endpoints.
+
+They share querysets and serializers with the sync views in views.py but load
+data through Django's async ORM, so under an ASGI server (uvicorn workers) a
+slow query only suspends its own request instead of blocking a worker.
+Writes keep going through the sync DRF views.
+"""
+
+import functools
+
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from config.db_routing import read_from_replica
+from config.renderers import ORJSONRenderer
+from config.throttling import AnalyticsRateThrottle
+from .archive import find_archived_session
+from .models import WorkoutSession
+from .serializers import (
+    ExerciseSerializer,
+    WorkoutRoutineListSerializer,
+    WorkoutSessionListSerializer,
+    WorkoutSessionDetailSerializer
+)
+from .views import (
+    exercise_queryset,
+    routine_list_queryset,
+    session_history,
+    session_list_queryset,
+    with_session_sets
+)
+
+
+# ============= HELPERS =============
+
+def _json(data, status_code=status.HTTP_200_OK):
+    """Render like the sync endpoints' default renderer so output matches byte for byte"""
+    return HttpResponse(
+        ORJSONRenderer().render(data),
+        status=status_code,
+        content_type='application/json'
+    )
+
+
+def async_api_view(view=None, *, throttle_classes=()):
+    """
+    Authenticate with the same JWT backend as DRF, apply ``throttle_classes``,
+    then await the view. Only GET is routed here; writes stay on the sync views.
+    """
+    if view is None:
+        return functools.partial(async_api_view, throttle_classes=throttle_classes)
+    authenticator = JWTAuthentication()
+
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return _json(
+                {'detail': f'Method "{request.method}" not allowed.'},
+                status.HTTP_405_METHOD_NOT_ALLOWED
+            )
+
+        try:
+            result = await sync_to_async(authenticator.authenticate)(request)
+        except exceptions.APIException as e:
+            return _json({'detail': e.detail}, e.status_code)
+
+        if result is None:
+            return _json(
+                {'detail': 'Authentication credentials were not provided.'},
+                status.HTTP_401_UNAUTHORIZED
+            )
+
+        request.user, request.auth = result
+
+        for throttle_class in throttle_classes:
+            throttle = throttle_class()
+            if not await sync_to_async(throttle.allow_request)(request, None):
+                wait = throttle.wait()
+                response = _json(
+                    {'detail': exceptions.Throttled(wait).detail},
+                    status.HTTP_429_TOO_MANY_REQUESTS
+                )
+                if wait:
+                    response['Retry-After'] = str(wait)
+                return response
+
+        return await view(request, *args, **kwargs)
+
+    wrapper.__name__ = view.__name__
+    wrapper.__doc__ = view.__doc__
+    return wrapper
+
+
+async def _count(source):
+    if isinstance(source, QuerySet):
+        return await source.acount()
+    return await sync_to_async(source.count)()
+
+
+async def _fetch(source, start=0, stop=None):
+    """Rows of a queryset or of a SessionHistory (archived pages decode synchronously)"""
+    if isinstance(source, QuerySet):
+        return [obj async for obj in source[start:stop]]
+    return await sync_to_async(source.__getitem__)(slice(start, stop))
+
+
+async def _paginate(request, queryset, serializer_class):
+    """Async equivalent of the configured PageNumberPagination"""
+    context = {'request': request}
+    page_size = api_settings.PAGE_SIZE
+    if not api_settings.DEFAULT_PAGINATION_CLASS or not page_size:
+        rows = await _fetch(queryset)
+        return serializer_class(rows, many=True, context=context).data
+
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        return None
+    if page < 1:
+        return None
+
+    count = await _count(queryset)
+    offset = (page - 1) * page_size
+    if offset and offset >= count:
+        return None
+
+    rows = await _fetch(queryset, offset, offset + page_size)
+    url = request.build_absolute_uri()
+
+    next_link = None
+    if offset + page_size < count:
+        next_link = replace_query_param(url, 'page', page + 1)
+
+    previous_link = None
+    if page > 1:
+        previous_link = (
+            remove_query_param(url, 'page') if page == 2
+            else replace_query_param(url, 'page', page - 1)
+        )
+
+    return {
+        'count': count,
+        'next': next_link,
+        'previous': previous_link,
+        'results': serializer_class(rows, many=True, context=context).data,
+    }
+
+
+async def _list_response(request, queryset, serializer_class):
+    data = await _paginate(request, queryset, serializer_class)
+    if data is None:
+        return _json({'detail': 'Invalid page.'}, status.HTTP_404_NOT_FOUND)
+    return _json(data)
+
+
+# ============= ENDPOINTS =============
+
+@read_from_replica
+@async_api_view
+async def exercise_list(request):
+    """
+    GET /api/workouts/async/exercises/
+    Async variant of the exercise catalog
+    """
+    return await _list_response(request, exercise_queryset(request.GET), ExerciseSerializer)
+
+
+@read_from_replica
+@async_api_view
+async def routine_list(request):
+    """
+    GET /api/workouts/async/routines/
+    Async variant of the routine list
+    """
+    queryset = routine_list_queryset(request.user, request.GET)
+    return await _list_response(request, queryset, WorkoutRoutineListSerializer)
+
+
+@read_from_replica
+@async_api_view
+async def session_list(request):
+    """
+    GET /api/workouts/async/sessions/
+    Async variant of the session list
+    """
+    queryset = session_list_queryset(request.user, request.GET)
+    history = await sync_to_async(session_history)(queryset, request.user, request.GET)
+    if history is not None:
+        queryset = history
+    return await _list_response(request, queryset, WorkoutSessionListSerializer)
+
+
+@async_api_view
+async def session_detail(request, pk):
+    """
+    GET /api/workouts/async/sessions/<id>/
+    Async variant of the session detail
+    """
+    queryset = with_session_sets(WorkoutSession.objects.filter(user=request.user))
+    try:
+        session = await queryset.aget(pk=pk)
+    except WorkoutSession.DoesNotExist:
+        session = await sync_to_async(find_archived_session)(request.user, pk)
+        if session is None:
+            return _json({'detail': 'Not found.'}, status.HTTP_404_NOT_FOUND)
+
+    return _json(WorkoutSessionDetailSerializer(session, context={'request': request}).data)
+
+
+@read_from_replica
+@async_api_view(throttle_classes=[AnalyticsRateThrottle])
+async def workout_stats(request):
+    """
+    GET /api/workouts/async/stats/
+    Async variant of the user's workout statistics
+    """
+    recent_sessions = [
+        session async for session in with_session_sets(
+            WorkoutSession.objects.filter(user=request.user, is_completed=True)
+        )[:10]
+    ]
+
+    total_sessions = len(recent_sessions)
+    total_volume = sum(s.total_volume for s in recent_sessions)
+    avg_duration = sum(s.duration_minutes or 0 for s in recent_sessions) / total_sessions if total_sessions > 0 else 0
+
+    return _json({
+        'total_sessions': total_sessions,
+        'total_volume': total_volume,
+        'average_duration': round(avg_duration, 1),
+        'recent_sessions': WorkoutSessionListSerializer(recent_sessions, many=True).data
+    })
@@ -0,0 +1,79 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from .events import session_group
+from .models import WorkoutSession
+
+# new WebSocket(url, ['bearer', accessToken]): browsers can't set headers on
+# WebSockets, and a token in the query string would end up in access logs
+BEARER_PROTOCOL = 'bearer'
+
+
+class SessionConsumer(AsyncJsonWebsocketConsumer):
+    """
+    ws/sessions/<session_id>/   subprotocols ['bearer', <access token>]
+    Streams set create/update/delete and completion events for one session.
+    Closes with 4401 without a valid token and 4403 for someone else's session.
+    """
+
+    async def connect(self):
+        self.session_id = self.scope['url_route']['kwargs']['session_id']
+        self.joined = False
+        user = await self._authenticate()
+
+        if user is None:
+            await self._reject(4401)
+            return
+        if not await self._owns_session(user):
+            await self._reject(4403)
+            return
+
+        await self.channel_layer.group_add(session_group(self.session_id), self.channel_name)
+        self.joined = True
+        await self.accept(self._subprotocol())
+
+    async def disconnect(self, code):
+        if self.joined:
+            await self.channel_layer.group_discard(session_group(self.session_id), self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        # Push-only channel; writes go through the REST API
+        if content.get('type') == 'ping':
+            await self.send_json({'type': 'pong'})
+
+    async def session_event(self, message):
+        await self.send_json({
+            'type': message['event'],
+            'session': message['session'],
+            'payload': message['payload'],
+        })
+
+    def _subprotocol(self):
+        return BEARER_PROTOCOL if BEARER_PROTOCOL in self.scope.get('subprotocols', []) else None
+
+    async def _reject(self, code):
+        # A close before the handshake completes reaches the client as a bare
+        # failure, so accept first for the code to be seen
+        await self.accept(self._subprotocol())
+        await self.close(code=code)
+
+    @database_sync_to_async
+    def _authenticate(self):
+        protocols = self.scope.get('subprotocols', [])
+        if BEARER_PROTOCOL not in protocols:
+            return None
+        index = protocols.index(BEARER_PROTOCOL) + 1
+        if index >= len(protocols):
+            return None
+
+        authenticator = JWTAuthentication()
+        try:
+            return authenticator.get_user(authenticator.get_validated_token(protocols[index]))
+        except (InvalidToken, TokenError, AuthenticationFailed):
+            return None
+
+    @database_sync_to_async
+    def _owns_session(self, user):
+        return WorkoutSession.objects.filter(pk=self.session_id, user=user).exists()
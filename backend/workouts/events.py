@@ -0,0 +1,32 @@
+"""
+Live workout events pushed to everyone watching a session
+(ActiveWorkout page, watch, second phone, coach screen).
+
+Events are sent after the surrounding transaction commits, so subscribers
+never see a set that was rolled back.
+"""
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+
+def session_group(session_id):
+    return f'session_{session_id}'
+
+
+def broadcast_session_event(session_id, event, payload):
+    """Queue ``event`` (e.g. 'set.created') for subscribers of ``session_id``"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    message = {
+        'type': 'session.event',
+        'event': event,
+        'session': session_id,
+        'payload': payload,
+    }
+    transaction.on_commit(
+        lambda: async_to_sync(channel_layer.group_send)(session_group(session_id), message)
+    )
@@ -0,0 +1,243 @@
+"""
+Fast rendering path for hot list endpoints.
+
+A FieldMap is compiled once from an existing ModelSerializer: every field is
+mapped to a ``.values()`` lookup plus the cheapest converter that yields the
+same representation (most fields need none). List views then build response
+dicts straight from value rows instead of instantiating a serializer field by
+field per object, and the output stays identical to the serializer's.
+"""
+
+import copy
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.response import Response
+from config.fieldsets import requested_selection
+
+# Fields whose to_representation() is the identity for the DB value
+IDENTITY_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.ChoiceField,
+    serializers.PrimaryKeyRelatedField,
+    serializers.ReadOnlyField,
+    serializers.JSONField,
+)
+
+# Fields whose to_representation() is cheap and exact to call directly
+CONVERTED_FIELDS = (
+    serializers.DecimalField,
+    serializers.DateTimeField,
+    serializers.DateField,
+    serializers.TimeField,
+    serializers.FloatField,
+)
+
+
+def fast_path_enabled():
+    """Off unless the FAST_LIST_RENDERING setting turns it on"""
+    return getattr(settings, 'FAST_LIST_RENDERING', False)
+
+
+class FieldMap:
+    """
+    Precompiled mapping from a serializer's fields to value lookups.
+
+    ``computed`` supplies values for fields that aren't plain columns
+    (properties, SerializerMethodFields): ``{name: (lookups, fn(row))}``.
+    ``nested`` renders a many-relation from one extra query:
+    ``{name: (child FieldMap, fk lookup on the child)}``; a computed fn can
+    read the raw child rows from ``row['__children'][name]``.
+    """
+
+    def __init__(self, serializer_class, computed=None, nested=None):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.nested = nested or {}
+        computed = computed or {}
+
+        self.entries = []
+        self.entry_lookups = {}
+
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+
+            if name in self.nested:
+                self.entries.append((name, None, 'nested', None))
+                self.entry_lookups[name] = []
+                continue
+
+            if name in computed:
+                extra, fn = computed[name]
+                self.entry_lookups[name] = list(extra)
+                self.entries.append((name, None, 'computed', fn))
+                continue
+
+            lookup, relation = self._lookup_for(name, field)
+            self.entry_lookups[name] = [lookup, relation] if relation else [lookup]
+            self.entries.append((name, lookup, relation, self._converter_for(name, field)))
+
+        self.lookups = self._collect_lookups()
+
+    def _collect_lookups(self):
+        # Keep order stable and unique for .values()
+        lookups = ['pk']
+        for name, *_ in self.entries:
+            lookups.extend(self.entry_lookups[name])
+        return list(dict.fromkeys(lookups))
+
+    def _lookup_for(self, name, field):
+        """``.values()`` lookup for the field, and the FK whose null means 'skip'"""
+        source_attrs = field.source_attrs
+        if not source_attrs or field.source == '*':
+            raise ImproperlyConfigured(
+                f'{self.serializer_class.__name__}.{name} needs a computed value'
+            )
+
+        try:
+            self.model._meta.get_field(source_attrs[0])
+        except FieldDoesNotExist:
+            raise ImproperlyConfigured(
+                f'{self.serializer_class.__name__}.{name} is not a model column; '
+                'pass it as a computed value'
+            )
+
+        lookup = '__'.join(source_attrs)
+        # DRF omits a dotted read-only field when the relation is null
+        relation = source_attrs[0] if len(source_attrs) > 1 else None
+        if relation and (field.allow_null or field.default is not serializers.empty or field.required):
+            relation = None
+        return lookup, relation
+
+    def _converter_for(self, name, field):
+        if isinstance(field, serializers.FileField):
+            storage = self.model._meta.get_field(field.source).storage
+
+            def file_url(value, request):
+                if not value:
+                    return None
+                url = storage.url(value)
+                return request.build_absolute_uri(url) if request is not None else url
+            return file_url
+
+        if isinstance(field, serializers.ListField):
+            if isinstance(field.child, (serializers.CharField, serializers.ChoiceField)):
+                return None
+            return lambda value, request: field.to_representation(value)
+
+        if isinstance(field, CONVERTED_FIELDS):
+            return lambda value, request: field.to_representation(value)
+
+        if isinstance(field, IDENTITY_FIELDS):
+            return None
+
+        raise ImproperlyConfigured(
+            f'{self.serializer_class.__name__}.{name} ({type(field).__name__}) '
+            'has no fast-path converter; pass it as a computed value'
+        )
+
+    def select(self, fields_tree, expand_tree):
+        """
+        Copy of this map pruned like SparseFieldsMixin prunes the serializer.
+        Nested rows are still fetched (not rendered) when a kept computed
+        field may read them.
+        """
+        serializer = self.serializer_class()
+        serializer.apply_selection(fields_tree, expand_tree)
+
+        subset = copy.copy(self)
+        subset.entries = [entry for entry in self.entries if entry[0] in serializer.fields]
+        kept = {entry[0]: entry[2] for entry in subset.entries}
+        needs_children = 'computed' in kept.values()
+
+        subset.nested = {}
+        for name, (child_map, fk) in self.nested.items():
+            if name in kept:
+                pruned = child_map.select(
+                    (fields_tree or {}).get(name) or None,
+                    (expand_tree or {}).get(name) if expand_tree is not None else None,
+                )
+                if needs_children:
+                    pruned.lookups = child_map.lookups
+                child_map = pruned
+            elif not needs_children:
+                continue
+            subset.nested[name] = (child_map, fk)
+
+        subset.lookups = subset._collect_lookups()
+        return subset
+
+    def values(self, queryset):
+        """Value-row queryset for this map (prefetches don't apply to dicts)"""
+        return queryset.prefetch_related(None).values(*self.lookups)
+
+    def render(self, rows, request=None):
+        rows = list(rows)
+        self._attach_children(rows)
+
+        result = []
+        for row in rows:
+            out = {}
+            for name, lookup, relation, converter in self.entries:
+                if relation == 'nested':
+                    child_map = self.nested[name][0]
+                    out[name] = child_map.render(row['__children'][name], request)
+                elif relation == 'computed':
+                    out[name] = converter(row)
+                else:
+                    value = row[lookup]
+                    if value is None:
+                        if relation and row[relation] is None:
+                            continue
+                        out[name] = None
+                    elif converter is None:
+                        out[name] = value
+                    else:
+                        out[name] = converter(value, request)
+            result.append(out)
+        return result
+
+    def _attach_children(self, rows):
+        if not self.nested or not rows:
+            return
+
+        ids = [row['pk'] for row in rows]
+        for row in rows:
+            row['__children'] = {name: [] for name in self.nested}
+
+        by_id = {row['pk']: row for row in rows}
+        for name, (child_map, fk) in self.nested.items():
+            child_rows = child_map.model.objects.filter(**{f'{fk}__in': ids}).order_by(
+                *child_map.model._meta.ordering
+            ).values(*dict.fromkeys([*child_map.lookups, fk]))
+            for child in child_rows:
+                by_id[child[fk]]['__children'][name].append(child)
+
+
+class FastListMixin:
+    """
+    Opt-in fast GET for ListAPIView subclasses: set ``fast_field_map`` to a
+    FieldMap compiled from the view's list serializer.
+    """
+
+    fast_field_map = None
+
+    def list(self, request, *args, **kwargs):
+        if self.fast_field_map is None or not fast_path_enabled():
+            return super().list(request, *args, **kwargs)
+
+        field_map = self.fast_field_map
+        fields_tree, expand_tree = requested_selection(request)
+        if fields_tree is not None or expand_tree is not None:
+            field_map = field_map.select(fields_tree, expand_tree)
+
+        rows = field_map.values(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(field_map.render(page, request))
+        return Response(field_map.render(rows, request))
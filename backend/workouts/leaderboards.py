@@ -0,0 +1,309 @@
+"""
+Leaderboards kept as sorted sets.
+
+    e1rm:<exercise id>   user id -> best estimated 1RM (Epley, reps <= MAX_REPS,
+                         warm-ups and planned sets excluded), public profiles only
+    routines             routine id -> total_uses, public routines only
+
+Bests cover archived sets too, through the per-archive maxima stored on
+SessionArchive.e1rm_bests when sessions are archived.
+
+A board lives in Redis when LEADERBOARD_REDIS_URL is set and in process
+memory otherwise. It is built from the database on first read and then kept
+current as things happen: a logged set raises its lifter's best on that
+exercise (only ever upwards, ZADD GT), completing a session moves its routine,
+and profiles or routines going private leave their boards. A page is one
+ZREVRANGE and a rank one ZREVRANK, both O(log n). Deleting or editing a set
+down never lowers a best; ``manage.py rebuild_leaderboards`` recomputes.
+
+While Redis is failing, reads compute the board from the database.
+"""
+
+import bisect
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import F, FloatField, Max
+from .models import ExerciseSet, SessionArchive, WorkoutRoutine
+from .trends import MAX_REPS
+
+try:
+    import redis
+except ImportError:  # optional, in-process boards only
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'leaderboard'
+BUILT_KEY = f'{KEY_PREFIX}:built'
+ROUTINES_BOARD = 'routines'
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def exercise_board(exercise_id):
+    return f'e1rm:{exercise_id}'
+
+
+def e1rm(weight, reps):
+    """Epley estimate, as in trends.py; None for sets that don't count"""
+    if not weight or not reps or reps > MAX_REPS:
+        return None
+    return round(float(weight) * (1 + reps / 30), 2)
+
+
+# ============= STORES =============
+
+class LocalBoards:
+    """Boards in this process's memory, for development and tests"""
+
+    def __init__(self):
+        self._scores = {}   # board -> {member: score}
+        self._order = {}    # board -> sorted [(-score, member)]
+        self._lock = threading.Lock()
+
+    def add(self, board, member, score, only_higher=False):
+        with self._lock:
+            if board not in self._scores:
+                return  # built from the database on first read
+            scores, order = self._scores[board], self._order[board]
+            current = scores.get(member)
+            if current is not None:
+                if only_higher and current >= score:
+                    return
+                del order[bisect.bisect_left(order, (-current, member))]
+            scores[member] = score
+            bisect.insort(order, (-score, member))
+
+    def remove(self, board, member):
+        with self._lock:
+            current = self._scores.get(board, {}).pop(member, None)
+            if current is not None:
+                order = self._order[board]
+                del order[bisect.bisect_left(order, (-current, member))]
+
+    def store(self, board, scores):
+        with self._lock:
+            self._scores[board] = dict(scores)
+            self._order[board] = sorted((-score, member) for member, score in scores.items())
+
+    def lookup(self, board, offset, limit, member=None):
+        """``(entries, (rank, score) of member or None, size)``; None if not built"""
+        with self._lock:
+            if board not in self._order:
+                return None
+            order, scores = self._order[board], self._scores[board]
+            entries = [(entry_member, -score) for score, entry_member in order[offset:offset + limit]]
+            mine = None
+            if member in scores:
+                mine = (bisect.bisect_left(order, (-scores[member], member)), scores[member])
+            return entries, mine, len(order)
+
+
+class RedisBoards:
+    """Boards shared by every instance"""
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+
+    @staticmethod
+    def key(board):
+        return f'{KEY_PREFIX}:{board}'
+
+    def add(self, board, member, score, only_higher=False):
+        self.client.zadd(self.key(board), {member: score}, gt=only_higher)
+
+    def remove(self, board, member):
+        self.client.zrem(self.key(board), member)
+
+    def store(self, board, scores):
+        pipe = self.client.pipeline()
+        pipe.delete(self.key(board))
+        if scores:
+            pipe.zadd(self.key(board), scores)
+        pipe.sadd(BUILT_KEY, board)
+        pipe.execute()
+
+    def lookup(self, board, offset, limit, member=None):
+        key = self.key(board)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.sismember(BUILT_KEY, board)
+        pipe.zrevrange(key, offset, offset + limit - 1, withscores=True)
+        pipe.zcard(key)
+        if member is not None:
+            pipe.zrevrank(key, member)
+            pipe.zscore(key, member)
+        built, entries, size, *mine = pipe.execute()
+        if not built:
+            return None
+        entries = [(int(entry_member), score) for entry_member, score in entries]
+        mine = (mine[0], mine[1]) if mine and mine[0] is not None else None
+        return entries, mine, size
+
+
+_local = LocalBoards()
+_redis = None
+_redis_lock = threading.Lock()
+_redis_down_until = 0.0
+
+# Seconds to skip Redis after it fails
+REDIS_RETRY_INTERVAL = 5
+
+STORE_ERRORS = (redis.RedisError,) if redis is not None else ()
+
+
+def get_boards():
+    """The shared boards, this process's without Redis, or None while Redis is failing"""
+    global _redis
+    url = getattr(settings, 'LEADERBOARD_REDIS_URL', None)
+    if not url or redis is None:
+        return _local
+    if time.monotonic() < _redis_down_until:
+        return None
+    if _redis is None:
+        with _redis_lock:
+            if _redis is None:
+                _redis = RedisBoards(url)
+    return _redis
+
+
+def _store_failed(error):
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + REDIS_RETRY_INTERVAL
+    logger.warning('Leaderboard store unavailable: %s', error)
+
+
+def _write(method, *args, **kwargs):
+    boards = get_boards()
+    if boards is None:
+        return
+    try:
+        getattr(boards, method)(*args, **kwargs)
+    except STORE_ERRORS as e:
+        _store_failed(e)
+
+
+# ============= SOURCES =============
+
+def _counted_sets():
+    e1rm_expression = F('weight') * (1.0 + F('reps') / 30.0)
+    return ExerciseSet.objects.filter(
+        weight__gt=0, reps__lte=MAX_REPS, is_planned=False
+    ).exclude(set_type='warmup'), Max(e1rm_expression, output_field=FloatField())
+
+
+def _keep_best(scores, key, score):
+    if score > scores.get(key, 0):
+        scores[key] = score
+
+
+def exercise_scores(exercise_id):
+    """``{user id: best e1RM}`` of public profiles on one exercise, hot and archived"""
+    sets, best = _counted_sets()
+    scores = {
+        user_id: round(score, 2)
+        for user_id, score in sets.filter(exercise_id=exercise_id, user__is_profile_public=True)
+        .values('user_id').annotate(best=best).order_by().values_list('user_id', 'best')
+    }
+    key = str(exercise_id)
+    for user_id, bests in SessionArchive.objects.filter(
+        user__is_profile_public=True, e1rm_bests__has_key=key
+    ).values_list('user_id', 'e1rm_bests'):
+        _keep_best(scores, user_id, bests[key])
+    return scores
+
+
+def user_scores(user_id):
+    """``{exercise id: best e1RM}`` of one user, hot and archived"""
+    sets, best = _counted_sets()
+    scores = {
+        exercise_id: round(score, 2)
+        for exercise_id, score in sets.filter(user_id=user_id)
+        .values('exercise_id').annotate(best=best).order_by().values_list('exercise_id', 'best')
+    }
+    for bests in SessionArchive.objects.filter(user_id=user_id).values_list('e1rm_bests', flat=True):
+        for exercise_id, score in bests.items():
+            _keep_best(scores, int(exercise_id), score)
+    return scores
+
+
+def routine_scores():
+    return dict(WorkoutRoutine.objects.filter(is_public=True).values_list('pk', 'total_uses'))
+
+
+def _source(board):
+    if board == ROUTINES_BOARD:
+        return routine_scores()
+    return exercise_scores(int(board.split(':', 1)[1]))
+
+
+# ============= UPDATES =============
+
+def record_set(exercise_set, user):
+    """A logged set: raise the lifter's best on its exercise"""
+    if exercise_set.is_planned or exercise_set.set_type == 'warmup' or not user.is_profile_public:
+        return
+    score = e1rm(exercise_set.weight, exercise_set.reps)
+    if score is not None:
+        _write('add', exercise_board(exercise_set.exercise_id), user.pk, score, only_higher=True)
+
+
+def record_routine(routine):
+    """A routine's uses or visibility changed"""
+    if routine.is_public:
+        _write('add', ROUTINES_BOARD, routine.pk, routine.total_uses)
+    else:
+        _write('remove', ROUTINES_BOARD, routine.pk)
+
+
+def remove_routine(routine_id):
+    _write('remove', ROUTINES_BOARD, routine_id)
+
+
+def profile_visibility_changed(user):
+    """Enter or leave the exercise boards with the profile"""
+    for exercise_id, score in user_scores(user.pk).items():
+        if user.is_profile_public:
+            _write('add', exercise_board(exercise_id), user.pk, score, only_higher=True)
+        else:
+            _write('remove', exercise_board(exercise_id), user.pk)
+
+
+def rebuild(board):
+    """Recompute one board from the database; returns its size"""
+    scores = _source(board)
+    _write('store', board, scores)
+    return len(scores)
+
+
+# ============= READING =============
+
+def _from_database(board, offset, limit, member):
+    scores = _source(board)
+    order = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    mine = next(
+        ((rank, score) for rank, (entry_member, score) in enumerate(order) if entry_member == member),
+        None
+    )
+    return order[offset:offset + limit], mine, len(order)
+
+
+def lookup(board, offset=0, limit=DEFAULT_LIMIT, member=None):
+    """
+    ``(entries [(member, score)], (rank, score) of ``member`` or None, size)``
+    with 0-based ranks; the board is built on first use
+    """
+    boards = get_boards()
+    if boards is not None:
+        try:
+            result = boards.lookup(board, offset, limit, member)
+            if result is None:
+                boards.store(board, _source(board))
+                result = boards.lookup(board, offset, limit, member)
+            return result
+        except STORE_ERRORS as e:
+            _store_failed(e)
+    return _from_database(board, offset, limit, member)
@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from workouts.archive import archive_sessions, horizon_days
+
+
+class Command(BaseCommand):
+    help = (
+        'Move completed sessions older than the archive horizon into '
+        'per-user yearly SessionArchive blobs. Safe to re-run; new sessions '
+        'are merged into the existing archive for their year'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help=f'Archive sessions older than this many days (default: {horizon_days()})'
+        )
+        parser.add_argument(
+            '--user',
+            help='Only archive this user (email)'
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            User = get_user_model()
+            try:
+                user = User.objects.get(email=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"No user with email {options['user']}")
+
+        total_sessions = total_sets = 0
+        for user_id, year, sessions, sets in archive_sessions(options['days'], user):
+            self.stdout.write(f'  user {user_id} / {year}: {sessions} sessions, {sets} sets')
+            total_sessions += sessions
+            total_sets += sets
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Archived {total_sessions} sessions ({total_sets} sets).')
+        )
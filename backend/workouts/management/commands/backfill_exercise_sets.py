@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from workouts.partitioning import BACKFILL_BATCH_SIZE, backfill_set_ownership
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill ExerciseSet.user / performed_at from their sessions in batches. '
+        'Run between `migrate workouts 0007` and the rest of the migrations: '
+        '0008 (NOT NULL + partitioning) refuses to run on a large unfilled table'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database alias to backfill'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BACKFILL_BATCH_SIZE,
+            help='Id range updated per transaction'
+        )
+
+    def handle(self, *args, **options):
+        def progress(position, high, updated):
+            self.stdout.write(f'  up to id {position}/{high}: {updated} rows')
+
+        updated = backfill_set_ownership(
+            connections[options['database']],
+            batch_size=options['batch_size'],
+            progress=progress
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Backfilled {updated} exercise sets.')
+        )
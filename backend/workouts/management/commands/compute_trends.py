@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from workouts.trends import USER_BATCH_SIZE, compute_trends
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the per-user, per-exercise strength trends (e1RM slope, '
+        'plateau, deload suggestion) served by /api/workouts/analytics/trends/. '
+        'Schedule nightly'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Only compute this user (email)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=USER_BATCH_SIZE,
+            help='Users fetched and fitted together'
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            User = get_user_model()
+            try:
+                user = User.objects.get(email=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"No user with email {options['user']}")
+
+        users = trends = 0
+        for batch_users, batch_trends in compute_trends(user, options['batch_size']):
+            users += batch_users
+            trends += batch_trends
+            self.stdout.write(f'  {users} users: {trends} trends')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Computed {trends} trends for {users} users.')
+        )
@@ -0,0 +1,264 @@
+import argparse
+import math
+import random
+from collections import Counter
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from users.models import UserStats
+from workouts.partitioning import create_month_partitions, is_partitioned
+from workouts.training_calendar import rebuild_user
+from workouts.models import (
+    Exercise,
+    WorkoutRoutine,
+    RoutineExercise,
+    WorkoutSession,
+    ExerciseSet,
+    WorkoutLike,
+    BodyWeightLog
+)
+
+User = get_user_model()
+
+
+def parse_end_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'"{value}" is not a YYYY-MM-DD date')
+
+
+class Command(BaseCommand):
+    help = 'Generate a deterministic, production-scale synthetic dataset for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Number of users to create')
+        parser.add_argument('--years', type=float, default=2, help='Years of training history per user')
+        parser.add_argument('--sessions-per-week', type=int, default=4, help='Average sessions per week')
+        parser.add_argument('--routines', type=int, default=3, help='Routines per user (at least 1)')
+        parser.add_argument(
+            '--end-date', type=parse_end_date, default=None,
+            help='History runs up to midnight of this date, YYYY-MM-DD (default: today)'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=7,
+            help='Random seed (same seed and --end-date, same data)'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create batch')
+        parser.add_argument('--prefix', default='load', help='Username/email prefix for generated users')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        prefix = options['prefix']
+        if options['routines'] < 1:
+            raise CommandError('--routines must be at least 1; every session follows a routine')
+
+        exercises = list(
+            Exercise.objects.filter(category='strength', is_custom=False).order_by('pk')
+        )
+        if len(exercises) < 4:
+            raise CommandError('Not enough strength exercises - run seed_exercises first')
+
+        if User.objects.filter(username__startswith=f'{prefix}_user_').exists():
+            raise CommandError(
+                f'Users with prefix "{prefix}" already exist - pick another --prefix'
+            )
+
+        # Hashing is deliberately slow, so every generated user shares one hash
+        password = make_password('loadtest123')
+        # History is laid out from midnight of the end date, so a seeded run
+        # only depends on --end-date and not on the time it was started
+        end_date = options['end_date'] or timezone.now().date()
+        now = datetime.combine(end_date, time.min, tzinfo=timezone.get_current_timezone())
+        history_days = int(options['years'] * 365)
+        self._create_partitions(now - timedelta(days=history_days), now)
+
+        totals = {'users': 0, 'sessions': 0, 'sets': 0}
+        public_routines = []
+
+        for index in range(options['users']):
+            with transaction.atomic():
+                user = User.objects.create(
+                    username=f'{prefix}_user_{index}',
+                    email=f'{prefix}_user_{index}@example.com',
+                    password=password,
+                    fitness_goal=rng.choice([choice[0] for choice in User.GOAL_CHOICES]),
+                    weight=Decimal(rng.randint(55, 110)),
+                )
+                routines = self._create_routines(user, exercises, options['routines'], rng)
+                public_routines.extend(r for r in routines if r.is_public)
+
+                sessions, sets, volume, last_date = self._create_history(
+                    user, routines, now, history_days, options['sessions_per_week'], rng
+                )
+                self._create_body_weight(user, now, history_days, rng)
+
+                UserStats.objects.create(
+                    user=user,
+                    total_workouts=sessions,
+                    total_volume=volume,
+                    last_workout_date=last_date,
+                )
+                # Bulk-created sessions skip the signals that keep calendars
+                rebuild_user(user.pk)
+
+            totals['users'] += 1
+            totals['sessions'] += sessions
+            totals['sets'] += sets
+            self.stdout.write(f'{user.username}: {sessions} sessions, {sets} sets')
+
+        self._create_likes(public_routines, rng)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nGenerated {totals['users']} users, {totals['sessions']} sessions "
+                f"and {totals['sets']} sets!"
+            )
+        )
+
+    def _create_partitions(self, first, last):
+        """Month partitions for the whole history, so sets skip the DEFAULT partition"""
+        if not is_partitioned(connection):
+            return
+        with transaction.atomic(), connection.cursor() as cursor:
+            created = create_month_partitions(cursor, first, last)
+        if created:
+            self.stdout.write(f'Created {len(created)} month partitions')
+
+    def _create_routines(self, user, exercises, count, rng):
+        routines = WorkoutRoutine.objects.bulk_create([
+            WorkoutRoutine(
+                user=user,
+                name=f'Program {chr(65 + i)}',
+                is_public=rng.random() < 0.3,
+            )
+            for i in range(count)
+        ])
+
+        routine_exercises = []
+        for routine in routines:
+            picked = rng.sample(exercises, k=min(len(exercises), rng.randint(4, 7)))
+            routine.picked_exercises = picked
+            for order, exercise in enumerate(picked):
+                routine_exercises.append(RoutineExercise(
+                    routine=routine,
+                    exercise=exercise,
+                    order=order,
+                    default_sets=rng.choice([3, 3, 4, 5]),
+                    default_reps=rng.choice([5, 8, 10, 12]),
+                ))
+        RoutineExercise.objects.bulk_create(routine_exercises, batch_size=self.batch_size)
+        return routines
+
+    def _create_history(self, user, routines, now, history_days, per_week, rng):
+        """
+        Sessions spread over ``history_days`` with per-exercise strength
+        following a diminishing-returns curve, periodic deload weeks and noise.
+        """
+        # Starting working weight and monthly gain per exercise for this user
+        baseline = {}
+        for routine in routines:
+            for exercise in routine.picked_exercises:
+                baseline.setdefault(exercise.pk, (rng.uniform(20, 80), rng.uniform(0.03, 0.09)))
+
+        start = now - timedelta(days=history_days)
+        sessions = []
+        for day in range(history_days):
+            if rng.random() >= per_week / 7:
+                continue
+            start_time = start + timedelta(days=day, hours=rng.randint(6, 20), minutes=rng.randint(0, 59))
+            duration = rng.randint(40, 95)
+            routine = rng.choice(routines)
+            session = WorkoutSession(
+                user=user,
+                routine=routine,
+                name=routine.name,
+                start_time=start_time,
+                end_time=start_time + timedelta(minutes=duration),
+                duration_minutes=duration,
+                is_completed=True,
+            )
+            session.history_day = day
+            sessions.append(session)
+
+        uses = Counter(session.routine for session in sessions)
+        for routine in routines:
+            routine.total_uses = uses[routine]
+        WorkoutRoutine.objects.bulk_update(routines, ['total_uses'])
+
+        total_sets = 0
+        total_volume = Decimal('0')
+
+        for chunk_start in range(0, len(sessions), self.batch_size):
+            chunk = sessions[chunk_start:chunk_start + self.batch_size]
+            chunk_sets = []
+            for session in chunk:
+                session_volume = Decimal('0')
+                set_count = 0
+                months = session.history_day / 30
+                deload = 0.85 if (session.history_day // 7) % 8 == 7 else 1.0
+
+                for exercise in session.routine.picked_exercises:
+                    base, gain = baseline[exercise.pk]
+                    working = base * (1 + gain * 10 * math.log1p(months / 10)) * deload
+                    for set_number in range(1, rng.choice([3, 3, 4, 5]) + 1):
+                        reps = max(1, int(rng.gauss(8, 2)))
+                        weight = Decimal(round(max(2.5, working * rng.uniform(0.95, 1.03)) / 2.5) * 2.5)
+                        set_count += 1
+                        chunk_sets.append(ExerciseSet(
+                            session=session,
+                            exercise=exercise,
+                            user=user,
+                            performed_at=session.start_time,
+                            set_number=set_number,
+                            set_type='warmup' if set_number == 1 and rng.random() < 0.3 else 'normal',
+                            reps=reps,
+                            weight=weight,
+                            rest_seconds=rng.choice([60, 90, 120, 180]),
+                            difficulty=min(10, max(1, int(rng.gauss(7, 1.5)))),
+                        ))
+                        session_volume += weight * reps
+
+                # Totals are known up front, so sessions are written once
+                session.total_volume = session_volume
+                session.total_sets = set_count
+                total_sets += set_count
+                total_volume += session_volume
+
+            WorkoutSession.objects.bulk_create(chunk)
+            ExerciseSet.objects.bulk_create(chunk_sets, batch_size=self.batch_size)
+
+        last_date = sessions[-1].start_time.date() if sessions else None
+        return len(sessions), total_sets, total_volume, last_date
+
+    def _create_body_weight(self, user, now, history_days, rng):
+        weight = float(user.weight)
+        drift = rng.uniform(-0.01, 0.02)
+        logs = []
+        for day in range(0, history_days, 7):
+            weight += drift + rng.gauss(0, 0.4)
+            logs.append(BodyWeightLog(
+                user=user,
+                weight=Decimal(f'{weight:.2f}'),
+                date=(now - timedelta(days=history_days - day)).date(),
+            ))
+        BodyWeightLog.objects.bulk_create(logs, batch_size=self.batch_size)
+
+    def _create_likes(self, public_routines, rng):
+        if not public_routines:
+            return
+        users = list(User.objects.filter(
+            pk__in={routine.user_id for routine in public_routines}
+        ).order_by('pk'))
+        likes = []
+        for user in users:
+            for routine in rng.sample(public_routines, k=min(len(public_routines), 5)):
+                if routine.user_id != user.pk:
+                    likes.append(WorkoutLike(user=user, routine=routine))
+        WorkoutLike.objects.bulk_create(likes, batch_size=self.batch_size, ignore_conflicts=True)
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from workouts import leaderboards
+from workouts.models import ExerciseSet
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the e1RM and routine leaderboards from the database. '
+        'Sets are only ever added to a board incrementally, so run after '
+        'deleting or correcting sets in bulk, and nightly'
+    )
+
+    def handle(self, *args, **options):
+        exercise_ids = ExerciseSet.objects.order_by().values_list('exercise_id', flat=True).distinct()
+        boards = entries = 0
+        for exercise_id in exercise_ids.iterator():
+            entries += leaderboards.rebuild(leaderboards.exercise_board(exercise_id))
+            boards += 1
+        entries += leaderboards.rebuild(leaderboards.ROUTINES_BOARD)
+        boards += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {boards} leaderboards with {entries} entries.')
+        )
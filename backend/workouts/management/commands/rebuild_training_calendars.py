@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from workouts.training_calendar import rebuild_calendars
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the per-user yearly training calendars from hot and '
+        'archived sessions. Run once after deploying migration 0010, and '
+        'after writing sessions in bulk'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Only rebuild this user (email)'
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            User = get_user_model()
+            try:
+                user = User.objects.get(email=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"No user with email {options['user']}")
+
+        users = calendars = 0
+        for user_id, years in rebuild_calendars(user):
+            if years:
+                self.stdout.write(f"  user {user_id}: {', '.join(map(str, years))}")
+            users += 1
+            calendars += len(years)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {calendars} calendars for {users} users.')
+        )
@@ -0,0 +1,69 @@
+import time
+from contextlib import contextmanager
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+from workouts.partitioning import ensure_future_partitions
+
+# Arbitrary but fixed key shared by every instance running the release phase
+RELEASE_LOCK_ID = 7_107_107
+
+
+class Command(BaseCommand):
+    help = 'Release phase: apply pending migrations and seed the exercise catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database alias to release against'
+        )
+        parser.add_argument(
+            '--skip-seed',
+            action='store_true',
+            help='Only migrate, do not seed the exercise catalog'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        database = options['database']
+        connection = connections[database]
+
+        with self._advisory_lock(connection):
+            # Another instance may have migrated while we waited for the lock
+            if self._pending_migrations(connection):
+                call_command('migrate', '--noinput', database=database)
+            else:
+                self.stdout.write('Migrations already applied.')
+
+            created = ensure_future_partitions(connection)
+            if created:
+                self.stdout.write(f'Created exercise set partitions: {", ".join(created)}')
+
+        if not options['skip_seed']:
+            call_command('seed_exercises')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\nRelease complete in {time.monotonic() - started:.2f}s')
+        )
+
+    def _pending_migrations(self, connection):
+        executor = MigrationExecutor(connection)
+        return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+    @contextmanager
+    def _advisory_lock(self, connection):
+        """Session-level PostgreSQL advisory lock; a no-op on other backends"""
+        if connection.vendor != 'postgresql':
+            yield
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_lock(%s)', [RELEASE_LOCK_ID])
+        try:
+            yield
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [RELEASE_LOCK_ID])
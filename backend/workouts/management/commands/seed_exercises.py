@@ -1,282 +1,132 @@
-from django.core.management.base import BaseCommand
-from workouts.models import Exercise
+import hashlib
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.text import slugify
+from workouts.models import Exercise, CatalogSeed
+from workouts.muscles import invalidate_matrix, validate_weights
+
+DEFAULT_CATALOG = Path(__file__).resolve().parents[2] / 'data' / 'exercises.json'
+
+CATALOG_KEY = 'exercises'
+
+# Columns the upsert overwrites when a catalog entry already exists
+UPDATE_FIELDS = [
+    'name', 'description', 'category', 'muscle_group', 'equipment',
+    'secondary_muscles', 'muscle_weights', 'instructions', 'video_url',
+]
 
 
 class Command(BaseCommand):
     help = 'Populate database with common exercises'
 
-    def handle(self, *args, **kwargs):
-        exercises = [
-            # Chest
-            {
-                'name': 'Bench Press',
-                'description': 'Classic chest exercise',
-                'category': 'strength',
-                'muscle_group': 'chest',
-                'equipment': 'barbell',
-                'secondary_muscles': ['shoulders', 'triceps'],  # ✅ Changed to list
-                'instructions': 'Lie on bench, lower bar to chest, press up',
-            },
-            {
-                'name': 'Dumbbell Chest Press',
-                'description': 'Chest press with dumbbells',
-                'category': 'strength',
-                'muscle_group': 'chest',
-                'equipment': 'dumbbell',
-                'secondary_muscles': ['shoulders', 'triceps'],  # ✅ Changed to list
-            },
-            {
-                'name': 'Push-ups',
-                'description': 'Bodyweight chest exercise',
-                'category': 'strength',
-                'muscle_group': 'chest',
-                'equipment': 'bodyweight',
-                'secondary_muscles': ['shoulders', 'triceps'],  # ✅ Changed to list
-            },
-            {
-                'name': 'Incline Dumbbell Press',
-                'description': 'Upper chest focus',
-                'category': 'strength',
-                'muscle_group': 'chest',
-                'equipment': 'dumbbell',
-                'secondary_muscles': ['shoulders', 'triceps'],  # ✅ Changed to list
-            },
-            
-            # Back
-            {
-                'name': 'Deadlift',
-                'description': 'Full body compound movement',
-                'category': 'strength',
-                'muscle_group': 'back',
-                'equipment': 'barbell',
-                'secondary_muscles': [],  # ✅ Empty list is fine
-            },
-            {
-                'name': 'Pull-ups',
-                'description': 'Bodyweight back exercise',
-                'category': 'strength',
-                'muscle_group': 'back',
-                'equipment': 'bodyweight',
-                'secondary_muscles': ['biceps'],  # ✅ Changed to list
-            },
-            {
-                'name': 'Barbell Row',
-                'description': 'Back thickness builder',
-                'category': 'strength',
-                'muscle_group': 'back',
-                'equipment': 'barbell',
-                'secondary_muscles': ['biceps'],  # ✅ Changed to list
-            },
-            {
-                'name': 'Lat Pulldown',
-                'description': 'Machine back exercise',
-                'category': 'strength',
-                'muscle_group': 'back',
-                'equipment': 'machine',
-                'secondary_muscles': ['biceps'],  # ✅ Changed to list
-            },
-            
-            # Legs
-            {
-                'name': 'Squat',
-                'description': 'King of leg exercises',
-                'category': 'strength',
-                'muscle_group': 'legs',
-                'equipment': 'barbell',
-                'secondary_muscles': [],  # ✅ Empty list
-            },
-            {
-                'name': 'Leg Press',
-                'description': 'Machine leg exercise',
-                'category': 'strength',
-                'muscle_group': 'legs',
-                'equipment': 'machine',
-                'secondary_muscles': [],  # ✅ Empty list
-            },
-            {
-                'name': 'Romanian Deadlift',
-                'description': 'Hamstring focus',
-                'category': 'strength',
-                'muscle_group': 'legs',
-                'equipment': 'barbell',
-                'secondary_muscles': ['back'],  # ✅ Changed to list
-            },
-            {
-                'name': 'Lunges',
-                'description': 'Unilateral leg exercise',
-                'category': 'strength',
-                'muscle_group': 'legs',
-                'equipment': 'dumbbell',
-                'secondary_muscles': [],  # ✅ Empty list
-            },
-            {
-                'name': 'Leg Curl',
-                'description': 'Hamstring isolation',
-                'category': 'strength',
-                'muscle_group': 'legs',
-                'equipment': 'machine',
-                'secondary_muscles': [],  # ✅ Empty list
-            },
-            {
-                'name': 'Calf Raises',
-                'description': 'Calf muscle exercise',
-                'category': 'strength',
-                'muscle_group': 'legs',
-                'equipment': 'machine',
-                'secondary_muscles': ['calves'],  # ✅ Changed to list
-            },
-            
-            # Shoulders
-            {
-                'name': 'Overhead Press',
-                'description': 'Shoulder builder',
-                'category': 'strength',
-                'muscle_group': 'shoulders',
-                'equipment': 'barbell',
-                'secondary_muscles': ['triceps'],  # ✅ Changed to list
-            },
-            {
-                'name': 'Dumbbell Shoulder Press',
-                'description': 'Dumbbell overhead press',
-                'category': 'strength',
-                'muscle_group': 'shoulders',
-                'equipment': 'dumbbell',
-                'secondary_muscles': ['triceps'],  # ✅ Changed to list
-            },
-            {
-                'name': 'Lateral Raises',
-                'description': 'Side delt focus',
-                'category': 'strength',
-                'muscle_group': 'shoulders',
-                'equipment': 'dumbbell',
-                'secondary_muscles': [],  # ✅ Empty list
-            },
-            {
-                'name': 'Face Pulls',
-                'description': 'Rear delt exercise',
-                'category': 'strength',
-                'muscle_group': 'shoulders',
-                'equipment': 'cable',
-                'secondary_muscles': ['back'],  # ✅ Changed to list
-            },
-            
-            # Arms
-            {
-                'name': 'Barbell Curl',
-                'description': 'Bicep builder',
-                'category': 'strength',
-                'muscle_group': 'arms',
-                'equipment': 'barbell',
-                'secondary_muscles': ['biceps', 'forearms'],  # ✅ Changed to list
-            },
-            {
-                'name': 'Tricep Dips',
-                'description': 'Tricep exercise',
-                'category': 'strength',
-                'muscle_group': 'arms',
-                'equipment': 'bodyweight',
-                'secondary_muscles': ['triceps', 'chest'],  # ✅ Changed to list
-            },
-            {
-                'name': 'Hammer Curls',
-                'description': 'Neutral grip curls',
-                'category': 'strength',
-                'muscle_group': 'arms',
-                'equipment': 'dumbbell',
-                'secondary_muscles': ['biceps', 'forearms'],  # ✅ Changed to list
-            },
-            {
-                'name': 'Tricep Pushdown',
-                'description': 'Cable tricep exercise',
-                'category': 'strength',
-                'muscle_group': 'arms',
-                'equipment': 'cable',
-                'secondary_muscles': ['triceps'],  # ✅ Changed to list
-            },
-            
-            # Core
-            {
-                'name': 'Plank',
-                'description': 'Core stability',
-                'category': 'strength',
-                'muscle_group': 'core',
-                'equipment': 'bodyweight',
-                'secondary_muscles': [],  # ✅ Empty list
-            },
-            {
-                'name': 'Russian Twists',
-                'description': 'Oblique exercise',
-                'category': 'strength',
-                'muscle_group': 'core',
-                'equipment': 'bodyweight',
-                'secondary_muscles': [],  # ✅ Empty list
-            },
-            {
-                'name': 'Leg Raises',
-                'description': 'Lower ab exercise',
-                'category': 'strength',
-                'muscle_group': 'core',
-                'equipment': 'bodyweight',
-                'secondary_muscles': [],  # ✅ Empty list
-            },
-            {
-                'name': 'Cable Crunches',
-                'description': 'Weighted ab exercise',
-                'category': 'strength',
-                'muscle_group': 'core',
-                'equipment': 'cable',
-                'secondary_muscles': [],  # ✅ Empty list
-            },
-            
-            # Cardio
-            {
-                'name': 'Running',
-                'description': 'Cardiovascular exercise',
-                'category': 'cardio',
-                'muscle_group': 'cardio',
-                'equipment': 'bodyweight',
-                'secondary_muscles': [],  # ✅ Empty list
-            },
-            {
-                'name': 'Cycling',
-                'description': 'Low impact cardio',
-                'category': 'cardio',
-                'muscle_group': 'cardio',
-                'equipment': 'machine',
-                'secondary_muscles': [],  # ✅ Empty list
-            },
-            {
-                'name': 'Rowing Machine',
-                'description': 'Full body cardio',
-                'category': 'cardio',
-                'muscle_group': 'full_body',
-                'equipment': 'machine',
-                'secondary_muscles': ['back'],  # ✅ Changed to list
-            },
-            {
-                'name': 'Jump Rope',
-                'description': 'High intensity cardio',
-                'category': 'cardio',
-                'muscle_group': 'cardio',
-                'equipment': 'other',
-                'secondary_muscles': ['calves'],  # ✅ Changed to list
-            },
-        ]
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default=str(DEFAULT_CATALOG),
+            help='JSON catalog to load (list of exercise objects)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Upsert even if the catalog hash has not changed'
+        )
+
+    def handle(self, *args, **options):
+        raw = self._read_catalog(options['file'])
+        entries = self._validate(raw)
 
-        created_count = 0
-        for exercise_data in exercises:
-            exercise, created = Exercise.objects.get_or_create(
-                name=exercise_data['name'],
-                defaults=exercise_data
+        # Canonical JSON so formatting-only edits to the file don't trigger a reseed
+        content_hash = hashlib.sha256(
+            json.dumps(entries, sort_keys=True, separators=(',', ':')).encode()
+        ).hexdigest()
+
+        applied = CatalogSeed.objects.filter(key=CATALOG_KEY).values_list(
+            'content_hash', flat=True
+        ).first()
+        if applied == content_hash and not options['force']:
+            self.stdout.write(
+                self.style.SUCCESS('Exercise catalog unchanged, nothing to seed.')
+            )
+            return
+
+        with transaction.atomic():
+            Exercise.objects.bulk_create(
+                [Exercise(is_custom=False, **entry) for entry in entries],
+                update_conflicts=True,
+                unique_fields=['slug'],
+                update_fields=UPDATE_FIELDS,
+            )
+            CatalogSeed.objects.update_or_create(
+                key=CATALOG_KEY,
+                defaults={'content_hash': content_hash, 'item_count': len(entries)}
             )
-            if created:
-                created_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(f'Created exercise: {exercise.name}')
-                )
+            # bulk_create skips the save signals that usually do this
+            transaction.on_commit(invalidate_matrix)
 
         self.stdout.write(
             self.style.SUCCESS(
-                f'\nSuccessfully created {created_count} exercises!'
+                f'\nSuccessfully seeded {len(entries)} exercises!'
             )
-        )
\ No newline at end of file
+        )
+
+    def _read_catalog(self, path):
+        try:
+            with open(path, encoding='utf-8') as handle:
+                data = json.load(handle)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Could not read exercise catalog {path}: {e}')
+
+        if not isinstance(data, list):
+            raise CommandError('Exercise catalog must be a JSON list')
+        return data
+
+    def _validate(self, raw):
+        """Check every entry against the model choices and derive its slug"""
+        choices = {
+            'category': {c[0] for c in Exercise.CATEGORY_CHOICES},
+            'muscle_group': {c[0] for c in Exercise.MUSCLE_GROUP_CHOICES},
+            'equipment': {c[0] for c in Exercise.EQUIPMENT_CHOICES},
+        }
+        secondary = {c[0] for c in Exercise.SECONDARY_MUSCLE_CHOICES}
+
+        entries = []
+        seen = set()
+        for position, item in enumerate(raw):
+            name = item.get('name') if isinstance(item, dict) else None
+            if not name:
+                raise CommandError(f'Entry {position} has no name')
+
+            for field, allowed in choices.items():
+                if item.get(field) not in allowed:
+                    raise CommandError(f'{name}: invalid {field} {item.get(field)!r}')
+
+            muscles = item.get('secondary_muscles', [])
+            if not set(muscles) <= secondary:
+                raise CommandError(f'{name}: invalid secondary_muscles {muscles!r}')
+
+            try:
+                weights = validate_weights(item.get('muscle_weights', {}))
+            except ValueError as e:
+                raise CommandError(f'{name}: invalid muscle_weights: {e}')
+
+            slug = item.get('slug') or slugify(name)
+            if slug in seen:
+                raise CommandError(f'Duplicate exercise in catalog: {slug}')
+            seen.add(slug)
+
+            entries.append({
+                'slug': slug,
+                'name': name,
+                'description': item.get('description', ''),
+                'category': item['category'],
+                'muscle_group': item['muscle_group'],
+                'equipment': item['equipment'],
+                'secondary_muscles': list(muscles),
+                'muscle_weights': weights,
+                'instructions': item.get('instructions', ''),
+                'video_url': item.get('video_url'),
+            })
+        return entries
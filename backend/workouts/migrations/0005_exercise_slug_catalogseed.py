@@ -0,0 +1,42 @@
+# Generated by Django 5.0.1 on 2026-10-19 16:03
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def backfill_slugs(apps, schema_editor):
+    """Give existing system exercises their natural key so reseeding updates them in place"""
+    Exercise = apps.get_model('workouts', 'Exercise')
+    seen = set()
+    for exercise in Exercise.objects.filter(is_custom=False).order_by('pk'):
+        slug = slugify(exercise.name)
+        if slug and slug not in seen:
+            seen.add(slug)
+            exercise.slug = slug
+            exercise.save(update_fields=['slug'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0004_routineexercise_custom_sets_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogSeed',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=50, unique=True)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('item_count', models.PositiveIntegerField(default=0)),
+                ('applied_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='exercise',
+            name='slug',
+            field=models.SlugField(blank=True, help_text='Natural key for system exercises (seed catalog)', max_length=200, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_slugs, migrations.RunPython.noop),
+    ]
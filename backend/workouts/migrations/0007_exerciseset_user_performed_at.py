@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-19 17:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    # Schema only: nullable columns, each committed on its own. Existing rows
+    # are filled by `manage.py backfill_exercise_sets` before 0008 runs.
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('workouts', '0006_workoutsession_version_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exerciseset',
+            name='user',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='exercise_sets', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='exerciseset',
+            name='performed_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='exerciseset',
+            index=models.Index(fields=['user', 'exercise', 'performed_at'], name='workouts_ex_user_id_f65c56_idx'),
+        ),
+    ]
@@ -0,0 +1,162 @@
+# Generated by Django 5.0.1 on 2026-10-19 17:40
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# SQL frozen from workouts/partitioning.py as of this migration, so later
+# changes there can't change what this migration does
+TABLE = 'workouts_exerciseset'
+SESSION_TABLE = 'workouts_workoutsession'
+DEFAULT_PARTITION = f'{TABLE}_default'
+PARTITION_MONTHS_AHEAD = 3
+BACKFILL_BATCH_SIZE = 50_000
+
+
+def _month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _next_month(month):
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def require_backfill(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT COUNT(*) FROM "{TABLE}" WHERE user_id IS NULL OR performed_at IS NULL'
+        )
+        unfilled = cursor.fetchone()[0]
+        if unfilled > BACKFILL_BATCH_SIZE:
+            raise RuntimeError(
+                f'{unfilled} exercise sets have no user/performed_at yet. Deploy in two '
+                'steps: `manage.py migrate workouts 0007`, then '
+                '`manage.py backfill_exercise_sets`, then migrate the rest.'
+            )
+        # Small tables (development, fresh installs) are filled in place
+        if unfilled:
+            cursor.execute(
+                f'UPDATE "{TABLE}" SET user_id = s.user_id, performed_at = s.start_time '
+                f'FROM "{SESSION_TABLE}" AS s WHERE "{TABLE}".session_id = s.id '
+                f'AND ("{TABLE}".user_id IS NULL OR "{TABLE}".performed_at IS NULL)'
+            )
+
+
+def partition(apps, schema_editor):
+    """
+    Rebuild the table as partitioned by month of ``performed_at``, keeping its
+    indexes, foreign keys and id sequence; PostgreSQL only
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    old = f'{TABLE}_unpartitioned'
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE relname = %s', [TABLE])
+        if cursor.fetchone()[0] == 'p':
+            return
+
+        # Capture what must be recreated while the names still point at TABLE
+        cursor.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype IN ('p', 'f')",
+            [TABLE]
+        )
+        constraints = cursor.fetchall()
+        pk_name = next(name for name, kind, _ in constraints if kind == 'p')
+        foreign_keys = [(name, definition) for name, kind, definition in constraints if kind == 'f']
+
+        cursor.execute(
+            'SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s',
+            [TABLE, pk_name]
+        )
+        indexes = cursor.fetchall()
+
+        cursor.execute(
+            "SELECT attidentity <> '' FROM pg_attribute "
+            "WHERE attrelid = %s::regclass AND attname = 'id'",
+            [TABLE]
+        )
+        identity = cursor.fetchone()[0]
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [TABLE])
+        sequence = cursor.fetchone()[0]
+
+        cursor.execute(f'SELECT MIN(performed_at) FROM "{TABLE}"')
+        oldest = cursor.fetchone()[0] or datetime.now(dt_timezone.utc)
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{old}"')
+        # Identity columns can't be copied onto a partitioned table before
+        # PostgreSQL 17; the id gets a plain owned sequence below instead
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{old}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            'PARTITION BY RANGE (performed_at)'
+        )
+
+        last = _month_start(datetime.now(dt_timezone.utc))
+        for _ in range(PARTITION_MONTHS_AHEAD):
+            last = _next_month(last)
+        month = _month_start(oldest)
+        while month <= last:
+            cursor.execute(
+                f'CREATE TABLE "{TABLE}_y{month.year}m{month.month:02d}" PARTITION OF "{TABLE}" '
+                'FOR VALUES FROM (%s) TO (%s)',
+                [month, _next_month(month)]
+            )
+            month = _next_month(month)
+        cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{old}"')
+
+        if not identity and sequence:
+            # serial column: the copied default still uses the old sequence
+            cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY "{TABLE}".id')
+        cursor.execute(f'DROP TABLE "{old}"')
+        if identity:
+            cursor.execute(f'CREATE SEQUENCE "{TABLE}_id_seq" OWNED BY "{TABLE}".id')
+            cursor.execute(
+                f'ALTER TABLE "{TABLE}" ALTER COLUMN id '
+                f"SET DEFAULT nextval('\"{TABLE}_id_seq\"')"
+            )
+
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{pk_name}" PRIMARY KEY (id, performed_at)'
+        )
+        for _, definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+            f'COALESCE((SELECT MAX(id) FROM "{TABLE}"), 0) + 1, false)',
+            [TABLE]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('workouts', '0007_exerciseset_user_performed_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(require_backfill, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='exerciseset',
+            name='user',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='exercise_sets', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='exerciseset',
+            name='performed_at',
+            field=models.DateTimeField(editable=False),
+        ),
+        # PostgreSQL only; other backends keep a plain table
+        migrations.RunPython(partition, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-19 18:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0008_partition_exerciseset'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('session_count', models.PositiveIntegerField(default=0)),
+                ('set_count', models.PositiveIntegerField(default=0)),
+                ('first_session_id', models.BigIntegerField()),
+                ('last_session_id', models.BigIntegerField()),
+                ('format_version', models.PositiveSmallIntegerField(default=1)),
+                ('data', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='session_archives', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-year'],
+                'unique_together': {('user', 'year')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0010_trainingcalendar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='muscle_weights',
+            field=models.JSONField(blank=True, default=dict, help_text='Share of a set\'s volume per muscle, e.g. {"legs": 1.0, "core": 0.3}; empty splits it over muscle_group and secondary_muscles'),
+        ),
+    ]
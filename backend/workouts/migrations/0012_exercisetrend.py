@@ -0,0 +1,39 @@
+# Generated by Django 5.0.1 on 2026-10-19 21:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0011_exercise_muscle_weights'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExerciseTrend',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sessions', models.PositiveSmallIntegerField(help_text='Training days in the window')),
+                ('first_date', models.DateField()),
+                ('last_date', models.DateField()),
+                ('latest_e1rm', models.FloatField()),
+                ('best_e1rm', models.FloatField()),
+                ('slope_per_week', models.FloatField(help_text='e1RM change per week, kg')),
+                ('slope_percent', models.FloatField(help_text='slope_per_week as % of the mean e1RM')),
+                ('is_plateau', models.BooleanField(default=False)),
+                ('plateau_since', models.DateField(blank=True, null=True)),
+                ('deload_suggested', models.BooleanField(default=False)),
+                ('computed_at', models.DateTimeField()),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trends', to='workouts.exercise')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exercise_trends', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['exercise__name'],
+                'unique_together': {('user', 'exercise')},
+            },
+        ),
+    ]
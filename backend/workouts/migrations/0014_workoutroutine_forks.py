@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-19 23:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0013_workloadwindow'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workoutroutine',
+            name='fork_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workoutroutine',
+            name='forked_from',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='forks', to='workouts.workoutroutine'),
+        ),
+    ]
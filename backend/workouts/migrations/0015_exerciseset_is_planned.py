@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 23:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0014_workoutroutine_forks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exerciseset',
+            name='is_planned',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 5.0.1 on 2026-10-19 23:40
+
+import django.contrib.postgres.indexes
+import workouts.set_plans
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+# Frozen copy of set_plans.CUSTOM_SETS_SCHEMA as of this migration
+MAX_SETS = 50
+SET_TYPES = {'normal', 'warmup', 'dropset', 'failure'}
+
+
+def _integer(value, minimum, maximum):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError
+    if not minimum <= value <= maximum:
+        raise ValueError
+    return value
+
+
+def _weight(value):
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError
+    if isinstance(value, str) and value.strip().lower() in ('nan', 'inf', '-inf', 'infinity', '-infinity'):
+        raise ValueError
+    value = round(float(value), 2)
+    if not 0 <= value <= 9999.99:
+        raise ValueError
+    return value
+
+
+def _text(value, max_length):
+    if not isinstance(value, str) or len(value) > max_length:
+        raise ValueError
+    return value
+
+
+def _set_type(value):
+    if value not in SET_TYPES:
+        raise ValueError
+    return value
+
+
+# (key, check, default) in stored key order
+PROPERTIES = [
+    ('set_number', lambda value: _integer(value, 1, float('inf')), None),
+    ('set_type', _set_type, 'normal'),
+    ('reps', lambda value: _integer(value, 1, 1000), None),
+    ('weight', _weight, None),
+    ('rest_seconds', lambda value: _integer(value, 0, 3600), 60),
+    ('set_name', lambda value: _text(value, 100), ''),
+    ('notes', lambda value: _text(value, 500), ''),
+]
+
+
+def repair_custom_sets(value, default_reps):
+    """
+    Stored form of a plan written before validation: values that don't match
+    the schema fall back to their default, non-object sets and unknown keys
+    are dropped, and sets are renumbered 1..n
+    """
+    if not isinstance(value, list):
+        return []
+    plan = []
+    for item in value[:MAX_SETS]:
+        if not isinstance(item, dict):
+            continue
+        planned = {}
+        for name, check, default in PROPERTIES:
+            try:
+                planned[name] = check(item[name]) if name in item else default
+            except (TypeError, ValueError):
+                planned[name] = default
+        if planned['reps'] is None:
+            planned['reps'] = max(default_reps or 1, 1)
+        plan.append(planned)
+    for number, planned in enumerate(plan, start=1):
+        planned['set_number'] = number
+    return plan
+
+
+def normalize_plans(apps, schema_editor):
+    # Plans written before validation: bring them to the stored form
+    RoutineExercise = apps.get_model('workouts', 'RoutineExercise')
+    changed = []
+    rows = RoutineExercise.objects.only('pk', 'default_reps', 'custom_sets').order_by('pk')
+    for item in rows.iterator(chunk_size=BATCH_SIZE):
+        plan = repair_custom_sets(item.custom_sets, item.default_reps)
+        if plan != item.custom_sets:
+            item.custom_sets = plan
+            changed.append(item)
+        if len(changed) >= BATCH_SIZE:
+            RoutineExercise.objects.bulk_update(changed, ['custom_sets'])
+            changed = []
+    RoutineExercise.objects.bulk_update(changed, ['custom_sets'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0015_exerciseset_is_planned'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='routineexercise',
+            name='custom_sets',
+            field=workouts.set_plans.SetPlanField(blank=True, default=list, null=True),
+        ),
+        migrations.RunPython(normalize_plans, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='routineexercise',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['custom_sets'], name='routine_ex_custom_sets_gin', opclasses=['jsonb_path_ops']),
+        ),
+    ]
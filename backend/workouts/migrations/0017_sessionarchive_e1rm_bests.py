@@ -0,0 +1,57 @@
+# Generated by Django 5.0.1 on 2026-10-19 23:55
+
+import io
+
+import django.contrib.postgres.indexes
+import numpy as np
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen from archive.py (format version 1) and trends.py as of this migration
+WARMUP = 1  # index of 'warmup' in ExerciseSet.SET_TYPE_CHOICES
+MAX_REPS = 12
+
+
+def e1rm_bests(blob):
+    """Best Epley e1RM per exercise id (string keys) of one archive blob"""
+    with np.load(io.BytesIO(bytes(blob)), allow_pickle=False) as columns:
+        exercise_ids = columns['set.exercise_id']
+        set_types = columns['set.set_type']
+        reps = columns['set.reps']
+        weights = columns['set.weight']  # hundredths, NULL stored negative
+    counted = (weights > 0) & (reps > 0) & (reps <= MAX_REPS) & (set_types != WARMUP)
+    if not counted.any():
+        return {}
+    e1rm = weights[counted] / 100 * (1 + reps[counted] / 30)
+    ids, rows = np.unique(exercise_ids[counted], return_inverse=True)
+    best = np.zeros(len(ids))
+    np.maximum.at(best, rows, e1rm)
+    return {str(exercise_id): round(float(score), 2) for exercise_id, score in zip(ids, best)}
+
+
+def fill_bests(apps, schema_editor):
+    SessionArchive = apps.get_model('workouts', 'SessionArchive')
+    for archive in SessionArchive.objects.order_by('pk').iterator(chunk_size=100):
+        archive.e1rm_bests = e1rm_bests(archive.data)
+        archive.save(update_fields=['e1rm_bests'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0016_routineexercise_set_plans'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sessionarchive',
+            name='e1rm_bests',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(fill_bests, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='sessionarchive',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['e1rm_bests'], name='session_archive_e1rm_gin'),
+        ),
+    ]
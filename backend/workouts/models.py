@@ -1,7 +1,10 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.utils import timezone
+from .set_plans import SetPlanField
 
 User = get_user_model()
 
@@ -49,6 +52,13 @@ class Exercise(models.Model):
     ]
     
     name = models.CharField(max_length=200)
+    slug = models.SlugField(
+        max_length=200,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text="Natural key for system exercises (seed catalog)"
+    )
     description = models.TextField(blank=True)
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)
     muscle_group = models.CharField(max_length=20, choices=MUSCLE_GROUP_CHOICES)
@@ -58,6 +68,12 @@ class Exercise(models.Model):
     default=list,
     blank=True
 )
+    muscle_weights = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Share of a set's volume per muscle, e.g. {\"legs\": 1.0, \"core\": 0.3}; "
+                  "empty splits it over muscle_group and secondary_muscles"
+    )
     
     # Optional fields
     instructions = models.TextField(blank=True, help_text="How to perform the exercise")
@@ -83,6 +99,34 @@ class Exercise(models.Model):
     
     def __str__(self):
         return self.name
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_name = instance.__dict__.get('name')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        loaded = getattr(self, '_loaded_name', None)
+        if loaded is not None and loaded != self.name:
+            # Session details embed each set's exercise name
+            WorkoutSession.bump_versions(
+                pk__in=ExerciseSet.objects.filter(exercise=self).values('session_id')
+            )
+            self._loaded_name = self.name
+
+
+class CatalogSeed(models.Model):
+    """Content hash of the last applied seed catalog, so unchanged catalogs are skipped"""
+    
+    key = models.CharField(max_length=50, unique=True)
+    content_hash = models.CharField(max_length=64)
+    item_count = models.PositiveIntegerField(default=0)
+    applied_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.key} ({self.content_hash[:12]})"
 
 
 class WorkoutRoutine(models.Model):
@@ -102,6 +146,16 @@ class WorkoutRoutine(models.Model):
         help_text="Average duration in minutes"
     )
     
+    # Lineage: the routine this one was forked from, and how often it was forked
+    forked_from = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='forks'
+    )
+    fork_count = models.PositiveIntegerField(default=0)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -110,6 +164,20 @@ class WorkoutRoutine(models.Model):
     
     def __str__(self):
         return f"{self.user.username} - {self.name}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_name = instance.__dict__.get('name')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        loaded = getattr(self, '_loaded_name', None)
+        if loaded is not None and loaded != self.name:
+            # Session details embed the routine name
+            WorkoutSession.bump_versions(routine=self)
+            self._loaded_name = self.name
 
 
 class RoutineExercise(models.Model):
@@ -139,11 +207,15 @@ class RoutineExercise(models.Model):
     
     notes = models.TextField(blank=True)
     use_custom_sets = models.BooleanField(default=False)
-    custom_sets = models.JSONField(default=list, blank=True, null=True)
+    # Normalised on write, see set_plans.py
+    custom_sets = SetPlanField(default=list, blank=True, null=True)
     
     class Meta:
         ordering = ['order']
         unique_together = ['routine', 'order']
+        indexes = [
+            GinIndex(fields=['custom_sets'], name='routine_ex_custom_sets_gin', opclasses=['jsonb_path_ops']),
+        ]
     
     def __str__(self):
         return f"{self.routine.name} - {self.exercise.name}"
@@ -182,7 +254,11 @@ class WorkoutSession(models.Model):
     # Status
     is_completed = models.BooleanField(default=False)
     
+    # Bumped on every change to the session or its sets (HTTP validators)
+    version = models.PositiveIntegerField(default=1)
+    
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-start_time']
@@ -193,6 +269,45 @@ class WorkoutSession(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.start_time.date()}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored start so save() knows when sets must follow it
+        instance._loaded_start_time = instance.__dict__.get('start_time')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        
+        loaded = getattr(self, '_loaded_start_time', None)
+        moved = loaded is not None and loaded != self.start_time
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(type(self))):
+            # Sets follow the start before post_save, so receivers that read
+            # them (workload rollups) already see the new date
+            if moved:
+                self.exercise_sets.update(performed_at=self.start_time)
+            # Increment in SQL so a stale in-memory value can't roll it back, and
+            # leave the field deferred: it is only read back if something uses it
+            self.version = models.F('version') + 1
+            super().save(*args, **kwargs)
+        del self.__dict__['version']
+        if moved:
+            self._loaded_start_time = self.start_time
+    
+    @classmethod
+    def bump_version(cls, session_id):
+        """Mark a session changed without loading it (e.g. one of its sets changed)"""
+        cls.bump_versions(pk=session_id)
+    
+    @classmethod
+    def bump_versions(cls, **filters):
+        """bump_version for every session matching ``filters``"""
+        cls.objects.filter(**filters).update(
+            version=models.F('version') + 1,
+            updated_at=timezone.now()
+        )
+    
     def calculate_duration(self):
         """Calculate duration in minutes"""
         if self.end_time:
@@ -202,13 +317,14 @@ class WorkoutSession(models.Model):
     
     def calculate_total_volume(self):
         """Calculate total volume from all sets"""
+        logged = self.exercise_sets.filter(is_planned=False)
         total = sum(
             exercise_set.weight * exercise_set.reps 
-            for exercise_set in self.exercise_sets.all()
+            for exercise_set in logged
             if exercise_set.weight and exercise_set.reps
         )
         self.total_volume = total
-        self.total_sets = self.exercise_sets.count()
+        self.total_sets = logged.count()
         self.save()
 
 
@@ -229,6 +345,16 @@ class ExerciseSet(models.Model):
     )
     exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE)
     
+    # Denormalized from the session so per-user history skips the join;
+    # performed_at is also the monthly partition key on PostgreSQL
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='exercise_sets',
+        editable=False
+    )
+    performed_at = models.DateTimeField(editable=False)
+    
     # Set details
     set_number = models.PositiveIntegerField()
     set_type = models.CharField(max_length=20, choices=SET_TYPE_CHOICES, default='normal')
@@ -265,17 +391,34 @@ class ExerciseSet(models.Model):
     # Personal record
     is_personal_record = models.BooleanField(default=False)
     
+    # Written from the routine plan when the workout started, not logged yet
+    is_planned = models.BooleanField(default=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['set_number']
         indexes = [
             models.Index(fields=['session', 'exercise', 'set_number']),
+            models.Index(fields=['user', 'exercise', 'performed_at']),
         ]
     
     def __str__(self):
         return f"{self.exercise.name} - Set {self.set_number}"
     
+    def save(self, *args, **kwargs):
+        if self.user_id is None or self.performed_at is None:
+            self.user_id = self.session.user_id
+            self.performed_at = self.session.start_time
+        super().save(*args, **kwargs)
+        WorkoutSession.bump_version(self.session_id)
+    
+    def delete(self, *args, **kwargs):
+        session_id = self.session_id
+        result = super().delete(*args, **kwargs)
+        WorkoutSession.bump_version(session_id)
+        return result
+    
     @property
     def volume(self):
         """Calculate volume for this set (weight × reps)"""
@@ -320,4 +463,115 @@ class BodyWeightLog(models.Model):
         unique_together = ['user', 'date']
     
     def __str__(self):
-        return f"{self.user.username} - {self.weight}kg on {self.date}"
\ No newline at end of file
+        return f"{self.user.username} - {self.weight}kg on {self.date}"
+
+class SessionArchive(models.Model):
+    """
+    Completed sessions older than the archive horizon, moved out of the hot
+    tables: one compressed columnar blob per user and year (see archive.py)
+    """
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='session_archives')
+    year = models.PositiveSmallIntegerField()
+    
+    session_count = models.PositiveIntegerField(default=0)
+    set_count = models.PositiveIntegerField(default=0)
+    
+    # Id range of the archived sessions, to find the blob holding one session
+    first_session_id = models.BigIntegerField()
+    last_session_id = models.BigIntegerField()
+    
+    format_version = models.PositiveSmallIntegerField(default=1)
+    data = models.BinaryField()
+    
+    # {exercise id: best e1RM} of the archived sets, so leaderboards don't
+    # decode blobs
+    e1rm_bests = models.JSONField(default=dict, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-year']
+        unique_together = ['user', 'year']
+        indexes = [
+            GinIndex(fields=['e1rm_bests'], name='session_archive_e1rm_gin'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.year} ({self.session_count} sessions)"
+
+
+class TrainingCalendar(models.Model):
+    """
+    One user's training days of one year for the heatmap: per-day session
+    counts and volume as fixed-size arrays (see training_calendar.py)
+    """
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='training_calendars')
+    year = models.PositiveSmallIntegerField()
+    
+    # 366 uint8 session counts and 366 little-endian uint32 kg, by day of year
+    sessions = models.BinaryField()
+    volume = models.BinaryField()
+    training_days = models.PositiveSmallIntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-year']
+        unique_together = ['user', 'year']
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.year} ({self.training_days} days)"
+
+
+class ExerciseTrend(models.Model):
+    """
+    Nightly strength trend of one user on one exercise: regression of the
+    best estimated 1RM per day over the trailing window (see trends.py)
+    """
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='exercise_trends')
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE, related_name='trends')
+    
+    sessions = models.PositiveSmallIntegerField(help_text="Training days in the window")
+    first_date = models.DateField()
+    last_date = models.DateField()
+    
+    # Epley e1RM in kg
+    latest_e1rm = models.FloatField()
+    best_e1rm = models.FloatField()
+    slope_per_week = models.FloatField(help_text="e1RM change per week, kg")
+    slope_percent = models.FloatField(help_text="slope_per_week as % of the mean e1RM")
+    
+    is_plateau = models.BooleanField(default=False)
+    plateau_since = models.DateField(null=True, blank=True)
+    deload_suggested = models.BooleanField(default=False)
+    
+    computed_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['exercise__name']
+        unique_together = ['user', 'exercise']
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.exercise.name} ({self.slope_percent:+.1f}%/wk)"
+
+
+class WorkloadWindow(models.Model):
+    """
+    One user's last 28 days of training load: daily rollups (overall and
+    per muscle) plus running acute/chronic sums (see workload.py)
+    """
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='workload_window')
+    end_date = models.DateField(help_text="Last day of the window")
+    
+    # float64 (28 daily rows + acute + chronic) x (overall + muscles)
+    data = models.BinaryField()
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user.username} - until {self.end_date}"
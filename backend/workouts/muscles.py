@@ -0,0 +1,210 @@
+"""
+Exercise-by-muscle weight matrix for muscle volume attribution.
+
+Every exercise spreads the volume of its sets over muscles by a row of
+weighting factors: ``Exercise.muscle_weights`` when set, otherwise the
+primary ``muscle_group`` takes the full volume and each secondary muscle an
+even share of it (``1 / (len(secondary_muscles) + 1)``).
+
+The rows of the whole catalog are kept in memory as one NumPy array, so
+attributing any batch of sets is a bincount and one matrix multiply. Exercise
+saves bump a version in the shared cache and every process rebuilds its copy
+on next use.
+"""
+
+import threading
+import uuid
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+from .models import Exercise, ExerciseSet
+
+# Primary groups first, then the secondary-only muscles, in choice order
+MUSCLES = list(dict.fromkeys(
+    [choice[0] for choice in Exercise.MUSCLE_GROUP_CHOICES]
+    + [choice[0] for choice in Exercise.SECONDARY_MUSCLE_CHOICES]
+))
+MUSCLE_INDEX = {muscle: index for index, muscle in enumerate(MUSCLES)}
+
+# Largest factor one muscle may take of a set's volume
+MAX_WEIGHT = 1.0
+
+VERSION_KEY = 'muscles:matrix-version'
+
+_matrix = None
+_matrix_version = None
+_lock = threading.Lock()
+
+
+def validate_weights(weights):
+    """``{muscle: factor}`` with known muscles and 0 <= factor <= 1, or ValueError"""
+    if not isinstance(weights, dict):
+        raise ValueError('Muscle weights must be an object of {muscle: factor}')
+    unknown = set(weights) - set(MUSCLE_INDEX)
+    if unknown:
+        raise ValueError(f"Unknown muscles: {', '.join(sorted(unknown))}")
+    cleaned = {}
+    for muscle, factor in weights.items():
+        if isinstance(factor, bool) or not isinstance(factor, (int, float)):
+            raise ValueError(f'{muscle}: factor must be a number')
+        if not 0 <= factor <= MAX_WEIGHT:
+            raise ValueError(f'{muscle}: factor must be between 0 and {MAX_WEIGHT}')
+        cleaned[muscle] = float(factor)
+    return cleaned
+
+
+def default_weights(muscle_group, secondary_muscles):
+    """Full volume to the primary group, an even share to each secondary muscle"""
+    secondary_muscles = secondary_muscles or []
+    share = 1 / (len(secondary_muscles) + 1)
+    weights = {muscle_group: 1.0}
+    for muscle in secondary_muscles:
+        weights[muscle] = weights.get(muscle, 0.0) + share
+    return weights
+
+
+def exercise_weights(muscle_group, secondary_muscles, muscle_weights):
+    return muscle_weights or default_weights(muscle_group, secondary_muscles)
+
+
+class MuscleMatrix:
+    """Weights of every exercise (rows, sorted by id) over MUSCLES (columns)"""
+
+    def __init__(self, ids, weights):
+        self.ids = ids          # int64, sorted
+        self.weights = weights  # float64, len(ids) x len(MUSCLES)
+
+    @classmethod
+    def build(cls):
+        rows = list(
+            Exercise.objects.order_by('pk')
+            .values_list('pk', 'muscle_group', 'secondary_muscles', 'muscle_weights')
+        )
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        weights = np.zeros((len(rows), len(MUSCLES)))
+        for position, (_, group, secondary, configured) in enumerate(rows):
+            for muscle, factor in exercise_weights(group, secondary, configured).items():
+                if muscle in MUSCLE_INDEX:
+                    weights[position, MUSCLE_INDEX[muscle]] = factor
+        return cls(ids, weights)
+
+    def rows(self, exercise_ids):
+        """Matrix row of each exercise id, -1 for ids the matrix doesn't know"""
+        exercise_ids = np.asarray(exercise_ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.full(len(exercise_ids), -1, dtype=np.int64)
+        rows = np.searchsorted(self.ids, exercise_ids)
+        rows[rows == len(self.ids)] = 0
+        return np.where(self.ids[rows] == exercise_ids, rows, -1)
+
+    def attribute(self, exercise_ids, volumes, groups=None, n_groups=1):
+        """
+        Volume per muscle: ``n_groups x len(MUSCLES)``. ``groups`` (0-based,
+        aligned with the sets) buckets the result, e.g. by day; one bucket
+        without it.
+        """
+        rows = self.rows(exercise_ids)
+        volumes = np.asarray(volumes, dtype=np.float64)
+        groups = np.zeros(len(rows), dtype=np.int64) if groups is None else np.asarray(groups)
+        known = rows >= 0
+        # Volume per (bucket, exercise), then every bucket through the weights at once
+        per_exercise = np.bincount(
+            groups[known] * len(self.ids) + rows[known],
+            weights=volumes[known],
+            minlength=n_groups * len(self.ids),
+        ).reshape(n_groups, len(self.ids))
+        return per_exercise @ self.weights
+
+    def predates(self, exercise_ids):
+        """True if any id is newer than the matrix (ids of deleted exercises aren't)"""
+        if not len(exercise_ids):
+            return False
+        return not len(self.ids) or int(np.max(exercise_ids)) > int(self.ids[-1])
+
+
+def invalidate_matrix():
+    """Make every process rebuild its matrix on next use"""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def get_matrix(exercise_ids=()):
+    """
+    This process's matrix, rebuilt when the catalog version changed or any of
+    ``exercise_ids`` is newer than it (an exercise created moments ago)
+    """
+    global _matrix, _matrix_version
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+
+    matrix = _matrix
+    if matrix is not None and _matrix_version == version and not matrix.predates(exercise_ids):
+        return matrix
+    with _lock:
+        if _matrix is None or _matrix_version != version or _matrix.predates(exercise_ids):
+            _matrix = MuscleMatrix.build()
+            _matrix_version = version
+        return _matrix
+
+
+def attribute_volume(exercise_ids, volumes, groups=None, n_groups=1):
+    """``get_matrix().attribute(...)`` for a batch of sets"""
+    exercise_ids = np.asarray(exercise_ids, dtype=np.int64)
+    return get_matrix(np.unique(exercise_ids)).attribute(exercise_ids, volumes, groups, n_groups)
+
+
+def _on_exercise_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(invalidate_matrix)
+
+
+def connect_signals():
+    post_save.connect(_on_exercise_change, sender=Exercise, dispatch_uid='muscles_exercise_save')
+    post_delete.connect(_on_exercise_change, sender=Exercise, dispatch_uid='muscles_exercise_delete')
+
+
+# ============= ANALYTICS =============
+
+BUCKETS = ('day', 'week', 'total')
+
+
+def muscle_volume(user, start, end, bucket='day'):
+    """
+    Volume per muscle of the user's sets performed on ``start``..``end``
+    (dates), summed per day, per week (starting Monday) or over the range.
+    Returns ``(bucket start dates, muscles, len(dates) x len(muscles) kg)``.
+    """
+    start_dt = timezone.make_aware(datetime.combine(start, time.min))
+    end_dt = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+    rows = ExerciseSet.objects.filter(
+        user=user,
+        performed_at__gte=start_dt,
+        performed_at__lt=end_dt,
+        weight__isnull=False,
+        is_planned=False,
+    ).values_list('exercise_id', 'weight', 'reps', 'performed_at')
+
+    exercise_ids, volumes, days = [], [], []
+    for exercise_id, weight, reps, performed_at in rows.iterator():
+        exercise_ids.append(exercise_id)
+        volumes.append(float(weight) * reps)
+        days.append((timezone.localdate(performed_at) - start).days)
+    days = np.asarray(days, dtype=np.int64)
+
+    if bucket == 'total':
+        dates = [start]
+        groups = np.zeros(len(days), dtype=np.int64)
+    elif bucket == 'week':
+        first = start - timedelta(days=start.weekday())
+        groups = (days + start.weekday()) // 7
+        dates = [first + timedelta(weeks=week) for week in range((end - first).days // 7 + 1)]
+    else:
+        groups = days
+        dates = [start + timedelta(days=day) for day in range((end - start).days + 1)]
+
+    return dates, MUSCLES, attribute_volume(exercise_ids, volumes, groups, len(dates))
@@ -0,0 +1,255 @@
+"""
+Monthly range partitioning of the ExerciseSet table on PostgreSQL.
+
+``workouts_exerciseset`` is partitioned by ``performed_at`` into one table per
+calendar month (UTC) plus a DEFAULT partition that only catches rows outside
+the prepared range, until release upkeep moves them into their own month.
+The primary key becomes ``(id, performed_at)`` because PostgreSQL requires
+the partition key in every unique constraint; ids still come from a single
+sequence, so Django keeps treating ``id`` as the key.
+
+Every function here is a no-op on other database backends.
+"""
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+
+TABLE = 'workouts_exerciseset'
+SESSION_TABLE = 'workouts_workoutsession'
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+# Future months kept ready so inserts never land in the default partition
+PARTITION_MONTHS_AHEAD = 3
+
+BACKFILL_BATCH_SIZE = 50_000
+
+
+def _month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _next_month(month):
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_y{month.year}m{month.month:02d}'
+
+
+def is_partitioned(connection):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE relname = %s', [TABLE])
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def backfill_set_ownership(connection, batch_size=BACKFILL_BATCH_SIZE, progress=None):
+    """
+    Copy ``user_id``/``performed_at`` from each set's session, in id-range
+    batches so a large table is never locked as a whole. Returns rows updated.
+    """
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT MIN(id), MAX(id) FROM {qn(TABLE)} '
+            'WHERE user_id IS NULL OR performed_at IS NULL'
+        )
+        low, high = cursor.fetchone()
+    if low is None:
+        return 0
+
+    updated = 0
+    for start in range(low, high + 1, batch_size):
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {qn(TABLE)} SET user_id = s.user_id, performed_at = s.start_time '
+                f'FROM {qn(SESSION_TABLE)} AS s '
+                f'WHERE {qn(TABLE)}.session_id = s.id '
+                f'AND {qn(TABLE)}.id >= %s AND {qn(TABLE)}.id < %s '
+                f'AND ({qn(TABLE)}.user_id IS NULL OR {qn(TABLE)}.performed_at IS NULL)',
+                [start, start + batch_size]
+            )
+            updated += cursor.rowcount
+        if progress:
+            progress(min(start + batch_size - 1, high), high, updated)
+    return updated
+
+
+def _create_partition(cursor, name, start, end):
+    """
+    Create one month's partition. PostgreSQL refuses a new partition while
+    the DEFAULT partition holds rows of its range, so any such rows are moved
+    into the new table before it is attached. Must run in a transaction.
+    """
+    cursor.execute('SELECT 1 FROM pg_class WHERE relname = %s', [DEFAULT_PARTITION])
+    if cursor.fetchone() is not None:
+        # Nothing can be inserted into the default partition until commit
+        cursor.execute(f'LOCK TABLE "{DEFAULT_PARTITION}" IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(
+            f'SELECT 1 FROM "{DEFAULT_PARTITION}" '
+            'WHERE performed_at >= %s AND performed_at < %s LIMIT 1',
+            [start, end]
+        )
+        if cursor.fetchone() is not None:
+            cursor.execute(
+                f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+            )
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" '
+                'WHERE performed_at >= %s AND performed_at < %s RETURNING *) '
+                f'INSERT INTO "{name}" SELECT * FROM moved',
+                [start, end]
+            )
+            # Indexes, the primary key and foreign keys are added on attach
+            cursor.execute(
+                f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)',
+                [start, end]
+            )
+            return
+    cursor.execute(
+        f'CREATE TABLE "{name}" PARTITION OF "{TABLE}" FOR VALUES FROM (%s) TO (%s)',
+        [start, end]
+    )
+
+
+def create_month_partitions(cursor, first_month, last_month):
+    """Create missing partitions for every month in [first_month, last_month]"""
+    month = _month_start(first_month)
+    created = []
+    while month <= last_month:
+        name = partition_name(month)
+        cursor.execute('SELECT 1 FROM pg_class WHERE relname = %s', [name])
+        if cursor.fetchone() is None:
+            _create_partition(cursor, name, month, _next_month(month))
+            created.append(name)
+        month = _next_month(month)
+    return created
+
+
+def split_default_partition(cursor):
+    """
+    Give every month with rows in the DEFAULT partition (backdated sessions,
+    imports) its own partition, moving the rows. Must run in a transaction.
+    """
+    cursor.execute(
+        "SELECT DISTINCT date_trunc('month', performed_at AT TIME ZONE 'UTC') "
+        f'FROM "{DEFAULT_PARTITION}" ORDER BY 1'
+    )
+    created = []
+    for (month,) in cursor.fetchall():
+        month = month.replace(tzinfo=dt_timezone.utc)
+        created.extend(create_month_partitions(cursor, month, month))
+    return created
+
+
+def ensure_future_partitions(connection, months_ahead=PARTITION_MONTHS_AHEAD, now=None):
+    """
+    Keep the next ``months_ahead`` months partitioned and empty the DEFAULT
+    partition into monthly ones; run at every release, by one process at a time
+    """
+    if not is_partitioned(connection):
+        return []
+
+    now = now or datetime.now(dt_timezone.utc)
+    last = _month_start(now)
+    for _ in range(months_ahead):
+        last = _next_month(last)
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        created = create_month_partitions(cursor, _month_start(now), last)
+        return created + split_default_partition(cursor)
+
+
+def count_unfilled_sets(connection):
+    """Sets still missing ``user_id`` or ``performed_at``"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT COUNT(*) FROM "{TABLE}" WHERE user_id IS NULL OR performed_at IS NULL'
+        )
+        return cursor.fetchone()[0]
+
+
+def partition_exercise_sets(connection, months_ahead=PARTITION_MONTHS_AHEAD):
+    """
+    Rebuild ``workouts_exerciseset`` as a partitioned table, keeping its
+    indexes, foreign keys and id sequence. Expects ``performed_at`` filled.
+    """
+    if connection.vendor != 'postgresql' or is_partitioned(connection):
+        return False
+
+    old = f'{TABLE}_unpartitioned'
+    with connection.cursor() as cursor:
+        # Capture what must be recreated while the names still point at TABLE
+        cursor.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype IN ('p', 'f')",
+            [TABLE]
+        )
+        constraints = cursor.fetchall()
+        pk_name = next(name for name, kind, _ in constraints if kind == 'p')
+        foreign_keys = [(name, definition) for name, kind, definition in constraints if kind == 'f']
+
+        cursor.execute(
+            'SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s',
+            [TABLE, pk_name]
+        )
+        indexes = cursor.fetchall()
+
+        cursor.execute(
+            "SELECT attidentity <> '' FROM pg_attribute "
+            "WHERE attrelid = %s::regclass AND attname = 'id'",
+            [TABLE]
+        )
+        identity = cursor.fetchone()[0]
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [TABLE])
+        sequence = cursor.fetchone()[0]
+
+        cursor.execute(f'SELECT MIN(performed_at) FROM "{TABLE}"')
+        oldest = cursor.fetchone()[0] or datetime.now(dt_timezone.utc)
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{old}"')
+        # Identity columns can't be copied onto a partitioned table before
+        # PostgreSQL 17; the id gets a plain owned sequence below instead
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{old}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            'PARTITION BY RANGE (performed_at)'
+        )
+
+        last = _month_start(datetime.now(dt_timezone.utc))
+        for _ in range(months_ahead):
+            last = _next_month(last)
+        create_month_partitions(cursor, oldest, last)
+        cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{old}"')
+
+        if not identity and sequence:
+            # serial column: the copied default still uses the old sequence
+            cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY "{TABLE}".id')
+        cursor.execute(f'DROP TABLE "{old}"')
+        if identity:
+            cursor.execute(f'CREATE SEQUENCE "{TABLE}_id_seq" OWNED BY "{TABLE}".id')
+            cursor.execute(
+                f'ALTER TABLE "{TABLE}" ALTER COLUMN id '
+                f"SET DEFAULT nextval('\"{TABLE}_id_seq\"')"
+            )
+
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{pk_name}" PRIMARY KEY (id, performed_at)'
+        )
+        for _, definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+            f'COALESCE((SELECT MAX(id) FROM "{TABLE}"), 0) + 1, false)',
+            [TABLE]
+        )
+    return True
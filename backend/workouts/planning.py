@@ -0,0 +1,117 @@
+"""
+Planned sets for a workout started from a routine.
+
+The routine's plan for each exercise is its ``custom_sets`` when
+``use_custom_sets`` is on, otherwise ``default_sets`` copies of the default
+reps, weight and rest. Reps and weight are then overlaid with what the user
+did on the same set number the last time they performed the exercise.
+
+The plan is written as ExerciseSet rows with ``is_planned=True`` in one
+bulk_create, so logging a set during the workout is a PATCH of its row. Sets
+still planned when the session completes, through the complete endpoint or a
+PATCH of ``is_completed``, were never done and are deleted.
+"""
+
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Max, Q
+from sync.signals import record_changes
+from .models import ExerciseSet
+
+
+def _weight(value):
+    if value in (None, ''):
+        return None
+    try:
+        weight = Decimal(str(value)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return None
+    return weight if weight > 0 else None
+
+
+def routine_plan(item):
+    """``[{set_number, set_type, reps, weight, rest_seconds, notes}, ...]`` of one RoutineExercise"""
+    if item.use_custom_sets and item.custom_sets:
+        # Stored normalised (set_plans.py), so every key is there
+        return [
+            {
+                'set_number': planned['set_number'],
+                'set_type': planned['set_type'],
+                'reps': planned['reps'],
+                'weight': _weight(planned['weight']),
+                'rest_seconds': planned['rest_seconds'],
+                'notes': planned['set_name'] or planned['notes'],
+            }
+            for planned in item.custom_sets
+        ]
+    return [
+        {
+            'set_number': number,
+            'set_type': 'normal',
+            'reps': item.default_reps or 1,
+            'weight': _weight(item.default_weight),
+            'rest_seconds': item.default_rest_seconds,
+            'notes': '',
+        }
+        for number in range(1, (item.default_sets or 0) + 1)
+    ]
+
+
+def last_performance(user, exercise_ids):
+    """``{exercise id: {set number: (reps, weight)}}`` from each exercise's latest session"""
+    latest = (
+        ExerciseSet.objects.filter(
+            user=user,
+            exercise_id__in=exercise_ids,
+            is_planned=False,
+            session__is_completed=True,
+        )
+        .values('exercise_id').annotate(last=Max('performed_at')).order_by()
+        .values_list('exercise_id', 'last')
+    )
+    condition = Q()
+    for exercise_id, performed_at in latest:
+        condition |= Q(exercise_id=exercise_id, performed_at=performed_at)
+    if not condition:
+        return {}
+
+    performance = {}
+    rows = ExerciseSet.objects.filter(condition, user=user, is_planned=False).values_list(
+        'exercise_id', 'set_number', 'reps', 'weight'
+    )
+    for exercise_id, set_number, reps, weight in rows:
+        performance.setdefault(exercise_id, {})[set_number] = (reps, weight)
+    return performance
+
+
+def create_planned_sets(session, routine):
+    """Write the routine's plan into ``session`` as planned sets; returns them"""
+    items = list(routine.exercises.order_by('order'))
+    previous = last_performance(session.user, {item.exercise_id for item in items})
+
+    planned, numbers = [], {}
+    for item in items:
+        done = previous.get(item.exercise_id, {})
+        for values in routine_plan(item):
+            # An exercise listed twice keeps counting its sets
+            values['set_number'] = numbers[item.exercise_id] = numbers.get(item.exercise_id, 0) + 1
+            last = done.get(values['set_number'])
+            if last is not None:
+                values['reps'], values['weight'] = last
+            planned.append(ExerciseSet(
+                session=session,
+                exercise_id=item.exercise_id,
+                user_id=session.user_id,
+                performed_at=session.start_time,
+                is_planned=True,
+                **values,
+            ))
+
+    sets = ExerciseSet.objects.bulk_create(planned)
+    record_changes('exercise_set', session.user_id, [exercise_set.pk for exercise_set in sets], 'upsert')
+    return sets
+
+
+def discard_planned_sets(session):
+    """Delete the sets still planned; run whenever ``session`` becomes completed"""
+    session.exercise_sets.filter(is_planned=True).delete()
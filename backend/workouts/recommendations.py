@@ -0,0 +1,238 @@
+"""
+Public routine similarity and recommendations.
+
+Every public routine is a vector over exercises (planned sets per exercise)
+and muscles (the same sets spread through the muscle matrix, scaled by
+MUSCLE_FEATURE_WEIGHT so sharing muscles counts for less than sharing
+exercises), L2-normalised so a dot product is the cosine similarity.
+
+Each process keeps the vectors of all public routines in one NumPy array.
+It is built once, then kept current incrementally by tailing the sync change
+log for routine and routine exercise changes: only the routines that changed
+are re-vectorised, and deleted or now private ones are dropped. As with the
+sync feed, the log is read in commit order and the cursor never moves past a
+transaction that is still running, so one that commits late is still
+applied. A query is one matrix-vector product and a partial sort.
+
+"Recommended for you" uses the same space: the user's profile is the sets
+they logged per exercise over the last PROFILE_DAYS days.
+"""
+
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import Count
+from django.utils import timezone
+from sync.models import ChangeLog, settled_txid
+from .models import ExerciseSet, RoutineExercise, WorkoutRoutine
+from .muscles import MUSCLES, get_matrix
+
+MUSCLE_FEATURE_WEIGHT = 0.5
+PROFILE_DAYS = 90
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+# The change log is checked at most this often per process
+REFRESH_INTERVAL = 2.0
+
+ROUTINE_RESOURCES = ('workout_routine', 'routine_exercise')
+
+
+def _planned_sets(default_sets, use_custom_sets, custom_sets):
+    if use_custom_sets and custom_sets:
+        return len(custom_sets)
+    return default_sets or 1
+
+
+class RoutineIndex:
+    """Normalised vectors of public routines, one row per routine"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.columns = {}                 # exercise id -> column after the muscles
+        self.rows = {}                    # routine id -> row
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.vectors = np.zeros((0, len(MUSCLES)), dtype=np.float32)
+        self.active = np.zeros(0, dtype=bool)
+        self.cursor = None                # (txid, id) of the last settled change log entry applied
+        self.checked_at = 0.0
+
+    # ----- vectors -----
+
+    def _column(self, exercise_id):
+        column = self.columns.get(exercise_id)
+        if column is None:
+            column = self.columns[exercise_id] = len(MUSCLES) + len(self.columns)
+        return column
+
+    def vectorize(self, sets_by_exercise):
+        """``{exercise id: sets}`` -> normalised vector (may add columns)"""
+        exercise_ids = list(sets_by_exercise)
+        sets = np.array([sets_by_exercise[pk] for pk in exercise_ids], dtype=np.float64)
+        columns = [self._column(pk) for pk in exercise_ids]
+        vector = np.zeros(len(MUSCLES) + len(self.columns), dtype=np.float32)
+        if not exercise_ids:
+            return vector
+
+        vector[columns] = sets
+        muscles = get_matrix(exercise_ids).attribute(exercise_ids, sets)[0]
+        vector[:len(MUSCLES)] = muscles * MUSCLE_FEATURE_WEIGHT
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _widen(self, width):
+        if width > self.vectors.shape[1]:
+            extra = np.zeros((self.vectors.shape[0], width - self.vectors.shape[1]), dtype=np.float32)
+            self.vectors = np.hstack([self.vectors, extra])
+
+    def _put(self, vectors):
+        """Store ``{routine id: vector}``, appending new routines in one go"""
+        self._widen(len(MUSCLES) + len(self.columns))
+        width = self.vectors.shape[1]
+        new_ids, new_rows = [], []
+        for routine_id, vector in vectors.items():
+            vector = np.pad(vector, (0, width - len(vector)))
+            row = self.rows.get(routine_id)
+            if row is None:
+                self.rows[routine_id] = len(self.ids) + len(new_ids)
+                new_ids.append(routine_id)
+                new_rows.append(vector)
+            else:
+                self.vectors[row] = vector
+                self.active[row] = True
+        if new_ids:
+            self.ids = np.concatenate([self.ids, np.array(new_ids, dtype=np.int64)])
+            self.vectors = np.vstack([self.vectors, np.array(new_rows, dtype=np.float32)])
+            self.active = np.concatenate([self.active, np.ones(len(new_ids), dtype=bool)])
+
+    def _drop(self, routine_id):
+        row = self.rows.get(routine_id)
+        if row is not None:
+            self.active[row] = False
+            self.vectors[row] = 0
+
+    # ----- loading -----
+
+    def _load(self, routine_ids=None):
+        """Re-vectorise public routines (all, or those of ``routine_ids``)"""
+        routines = WorkoutRoutine.objects.filter(is_public=True)
+        items = RoutineExercise.objects.filter(routine__is_public=True)
+        if routine_ids is not None:
+            routines = routines.filter(pk__in=routine_ids)
+            items = items.filter(routine_id__in=routine_ids)
+
+        plans = {pk: {} for pk in routines.values_list('pk', flat=True)}
+        for routine_id, exercise_id, default_sets, use_custom, custom in items.values_list(
+            'routine_id', 'exercise_id', 'default_sets', 'use_custom_sets', 'custom_sets'
+        ).iterator():
+            plan = plans.setdefault(routine_id, {})
+            plan[exercise_id] = plan.get(exercise_id, 0) + _planned_sets(default_sets, use_custom, custom)
+
+        for routine_id in routine_ids or ():
+            if routine_id not in plans:
+                self._drop(routine_id)
+        self._put({routine_id: self.vectorize(plan) for routine_id, plan in plans.items()})
+
+    def refresh(self):
+        """Build on first use, then apply routine changes logged since"""
+        now = time.monotonic()
+        if self.cursor is not None and now - self.checked_at < REFRESH_INTERVAL:
+            return
+        with self.lock:
+            if self.cursor is not None and now - self.checked_at < REFRESH_INTERVAL:
+                return
+            # Read before the log: every entry below it is then visible
+            horizon = settled_txid()
+            if self.cursor is None:
+                # Changes still running (or logged while loading) are applied again next time
+                self.cursor = (horizon, 0)
+                self._load()
+            else:
+                changes = list(
+                    ChangeLog.objects.filter(ChangeLog.after(self.cursor), resource__in=ROUTINE_RESOURCES)
+                    .order_by('txid', 'id').values_list('id', 'resource', 'object_id', 'txid')
+                )
+                # Unsettled entries are applied now and again until they settle
+                settled = [(txid, entry_id) for entry_id, _, _, txid in changes if txid < horizon]
+                if len(settled) == len(changes):
+                    # Nothing else can appear below the horizon
+                    self.cursor = max(self.cursor, (horizon, 0))
+                elif settled:
+                    self.cursor = settled[-1]
+                if changes:
+                    routine_ids = {pk for _, resource, pk, _ in changes if resource == 'workout_routine'}
+                    # Deleted routine exercises can't be traced, but every
+                    # routine edit also saves the routine itself
+                    routine_ids.update(RoutineExercise.objects.filter(
+                        pk__in=[pk for _, resource, pk, _ in changes if resource == 'routine_exercise']
+                    ).values_list('routine_id', flat=True))
+                    self._load(routine_ids)
+            self.checked_at = time.monotonic()
+
+    # ----- queries -----
+
+    def routine_vector(self, routine):
+        """The vector of any routine (private ones are vectorised on the fly)"""
+        row = self.rows.get(routine.pk)
+        if row is not None and self.active[row]:
+            return self.vectors[row]
+        plan = {}
+        for exercise_id, default_sets, use_custom, custom in routine.exercises.values_list(
+            'exercise_id', 'default_sets', 'use_custom_sets', 'custom_sets'
+        ):
+            plan[exercise_id] = plan.get(exercise_id, 0) + _planned_sets(default_sets, use_custom, custom)
+        with self.lock:
+            return self.vectorize(plan)
+
+    def top(self, vector, limit, exclude=()):
+        """``[(routine id, similarity), ...]`` best first"""
+        with self.lock:
+            vectors, ids, active = self.vectors, self.ids, self.active
+        if not len(ids) or not np.any(vector):
+            return []
+        vector = np.pad(vector, (0, max(vectors.shape[1] - len(vector), 0)))[:vectors.shape[1]]
+        scores = vectors @ vector
+        scores[~active] = -1
+        if exclude:
+            scores[np.isin(ids, list(exclude))] = -1
+        count = min(limit, int(np.count_nonzero(scores > 0)))
+        if not count:
+            return []
+        best = np.argpartition(-scores, count - 1)[:count]
+        best = best[np.argsort(-scores[best])]
+        return [(int(ids[row]), round(float(scores[row]), 4)) for row in best]
+
+
+_index = RoutineIndex()
+
+
+def get_index():
+    _index.refresh()
+    return _index
+
+
+def similar_routines(routine, limit=DEFAULT_LIMIT):
+    index = get_index()
+    return index.top(index.routine_vector(routine), limit, exclude={routine.pk})
+
+
+def user_profile(user, index):
+    """Sets per exercise the user logged over the last PROFILE_DAYS days"""
+    since = timezone.now() - timedelta(days=PROFILE_DAYS)
+    counts = dict(
+        ExerciseSet.objects.filter(user=user, performed_at__gte=since, is_planned=False)
+        .values('exercise_id').annotate(sets=Count('id')).order_by()
+        .values_list('exercise_id', 'sets')
+    )
+    with index.lock:
+        return index.vectorize(counts)
+
+
+def recommended_routines(user, limit=DEFAULT_LIMIT):
+    """Public routines of other users closest to what the user trains"""
+    index = get_index()
+    own = set(WorkoutRoutine.objects.filter(user=user, is_public=True).values_list('pk', flat=True))
+    return index.top(user_profile(user, index), limit, exclude=own)
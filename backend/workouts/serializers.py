@@ -1,15 +1,19 @@
 from rest_framework import serializers
+from config.fieldsets import SparseFieldsMixin
 from .models import (
     Exercise, 
     WorkoutRoutine, 
     RoutineExercise, 
     WorkoutSession, 
     ExerciseSet,
-    WorkoutLike
+    WorkoutLike,
+    ExerciseTrend
 )
+from .muscles import validate_weights
+from .set_plans import PlanError, normalize_custom_sets
 
 
-class ExerciseSerializer(serializers.ModelSerializer):
+class ExerciseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for Exercise model"""
 
     secondary_muscles = serializers.ListField(
@@ -21,14 +25,20 @@ class ExerciseSerializer(serializers.ModelSerializer):
         model = Exercise
         fields = [
             'id', 'name', 'description', 'category', 'muscle_group',
-            'equipment', 'secondary_muscles', 'instructions', 'video_url', 'image',
-            'is_custom', 'created_by', 'created_at'
+            'equipment', 'secondary_muscles', 'muscle_weights', 'instructions',
+            'video_url', 'image', 'is_custom', 'created_by', 'created_at'
         ]
         read_only_fields = ['created_by', 'created_at']
 
+    def validate_muscle_weights(self, value):
+        try:
+            return validate_weights(value or {})
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
 
 
-class ExerciseSetSerializer(serializers.ModelSerializer):
+
+class ExerciseSetSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for ExerciseSet model"""
     
     exercise_name = serializers.CharField(source='exercise.name', read_only=True)
@@ -48,12 +58,12 @@ class ExerciseSetSerializer(serializers.ModelSerializer):
             'id', 'exercise', 'exercise_name', 'exercise_muscle_group', 'exercise_secondary_muscles',
             'set_number', 'set_type', 'reps', 'weight', 'rest_seconds', 'duration_seconds',
             'distance_meters', 'difficulty', 'notes', 'is_personal_record',
-            'volume', 'created_at'
+            'is_planned', 'volume', 'created_at'
         ]
         read_only_fields = ['created_at']
 
 
-class RoutineExerciseSerializer(serializers.ModelSerializer):
+class RoutineExerciseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for exercises within a routine"""
     
     exercise_details = ExerciseSerializer(source='exercise', read_only=True)
@@ -67,9 +77,16 @@ class RoutineExerciseSerializer(serializers.ModelSerializer):
             'use_custom_sets',
             'custom_sets',
         ]
+        expandable_fields = ['exercise_details']
+    
+    def validate_custom_sets(self, value):
+        try:
+            return normalize_custom_sets(value)
+        except PlanError as e:
+            raise serializers.ValidationError(str(e))
 
 
-class WorkoutRoutineListSerializer(serializers.ModelSerializer):
+class WorkoutRoutineListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for listing workout routines"""
     
     exercise_count = serializers.SerializerMethodField()
@@ -82,25 +99,34 @@ class WorkoutRoutineListSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'description', 'is_public',
             'exercise_count', 'total_uses', 'average_duration',
-            'is_liked', 'likes_count', 'username',
+            'is_liked', 'likes_count', 'username', 'forked_from', 'fork_count',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'total_uses', 'average_duration', 'forked_from', 'fork_count',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['total_uses', 'average_duration', 'created_at', 'updated_at']
     
     def get_exercise_count(self, obj):
+        if hasattr(obj, 'exercises_total'):
+            return obj.exercises_total
         return obj.exercises.count()
     
     def get_is_liked(self, obj):
+        if hasattr(obj, 'liked_by_user'):
+            return obj.liked_by_user
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return WorkoutLike.objects.filter(user=request.user, routine=obj).exists()
         return False
     
     def get_likes_count(self, obj):
+        if hasattr(obj, 'likes_total'):
+            return obj.likes_total
         return obj.likes.count()
 
 
-class WorkoutRoutineDetailSerializer(serializers.ModelSerializer):
+class WorkoutRoutineDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for detailed workout routine view"""
     
     exercises = RoutineExerciseSerializer(many=True, read_only=True)
@@ -115,24 +141,34 @@ class WorkoutRoutineDetailSerializer(serializers.ModelSerializer):
             'id', 'name', 'description', 'is_public',
             'exercises', 'exercise_count', 'total_uses',
             'average_duration', 'is_liked', 'likes_count',
-            'username', 'created_at', 'updated_at'
+            'username', 'forked_from', 'fork_count', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['total_uses', 'average_duration', 'created_at', 'updated_at']
+        read_only_fields = [
+            'total_uses', 'average_duration', 'forked_from', 'fork_count',
+            'created_at', 'updated_at'
+        ]
+        expandable_fields = ['exercises']
     
     def get_exercise_count(self, obj):
+        if hasattr(obj, 'exercises_total'):
+            return obj.exercises_total
         return obj.exercises.count()
     
     def get_is_liked(self, obj):
+        if hasattr(obj, 'liked_by_user'):
+            return obj.liked_by_user
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return WorkoutLike.objects.filter(user=request.user, routine=obj).exists()
         return False
     
     def get_likes_count(self, obj):
+        if hasattr(obj, 'likes_total'):
+            return obj.likes_total
         return obj.likes.count()
 
 
-class WorkoutRoutineCreateSerializer(serializers.ModelSerializer):
+class WorkoutRoutineCreateSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for creating/updating workout routines"""
     
     exercises = RoutineExerciseSerializer(many=True, required=False)
@@ -168,7 +204,7 @@ class WorkoutRoutineCreateSerializer(serializers.ModelSerializer):
         return instance
 
 
-class WorkoutSessionListSerializer(serializers.ModelSerializer):
+class WorkoutSessionListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for listing workout sessions"""
     
     routine_name = serializers.CharField(source='routine.name', read_only=True)
@@ -184,12 +220,16 @@ class WorkoutSessionListSerializer(serializers.ModelSerializer):
             'is_completed', 'exercise_sets', 'created_at'  # Add exercise_sets here!
         ]
         read_only_fields = ['duration_minutes', 'total_volume', 'total_sets', 'created_at']
+        expandable_fields = ['exercise_sets']
     
     def get_exercise_count(self, obj):
+        # Use the prefetched sets when the view loaded them
+        if 'exercise_sets' in getattr(obj, '_prefetched_objects_cache', {}):
+            return len({s.exercise_id for s in obj.exercise_sets.all()})
         return obj.exercise_sets.values('exercise').distinct().count()
 
 
-class WorkoutSessionDetailSerializer(serializers.ModelSerializer):
+class WorkoutSessionDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for detailed workout session view"""
     
     routine_name = serializers.CharField(source='routine.name', read_only=True)
@@ -204,9 +244,10 @@ class WorkoutSessionDetailSerializer(serializers.ModelSerializer):
             'exercise_sets', 'created_at'
         ]
         read_only_fields = ['duration_minutes', 'total_volume', 'total_sets', 'created_at']
+        expandable_fields = ['exercise_sets']
 
 
-class WorkoutSessionCreateSerializer(serializers.ModelSerializer):
+class WorkoutSessionCreateSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for creating workout sessions"""
     
     class Meta:
@@ -223,7 +264,7 @@ class WorkoutSessionCreateSerializer(serializers.ModelSerializer):
         return session
 
 
-class ExerciseSetCreateSerializer(serializers.ModelSerializer):
+class ExerciseSetCreateSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for creating exercise sets"""
     
     class Meta:
@@ -235,10 +276,23 @@ class ExerciseSetCreateSerializer(serializers.ModelSerializer):
         ]
 
 
-class WorkoutLikeSerializer(serializers.ModelSerializer):
+class WorkoutLikeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for workout likes"""
     
     class Meta:
         model = WorkoutLike
         fields = ['id', 'routine', 'created_at']
-        read_only_fields = ['created_at']
\ No newline at end of file
+        read_only_fields = ['created_at']
+
+class ExerciseTrendSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Nightly strength trend of one exercise"""
+    
+    exercise_name = serializers.CharField(source='exercise.name', read_only=True)
+    
+    class Meta:
+        model = ExerciseTrend
+        fields = [
+            'exercise', 'exercise_name', 'sessions', 'first_date', 'last_date',
+            'latest_e1rm', 'best_e1rm', 'slope_per_week', 'slope_percent',
+            'is_plateau', 'plateau_since', 'deload_suggested', 'computed_at'
+        ]
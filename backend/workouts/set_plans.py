@@ -0,0 +1,194 @@
+"""
+Custom set plans of routine exercises (``RoutineExercise.custom_sets``).
+
+A plan is a list of sets described by CUSTOM_SETS_SCHEMA, a small subset of
+JSON Schema. The schema is compiled once at import into a tree of plain
+checks, so validating a write doesn't interpret the schema again.
+
+Plans are stored normalised: every set has exactly the declared keys, with
+defaults filled in and ``set_number`` renumbered 1..n. Reads hand the stored
+list straight to the response (decoded with orjson), and containment queries
+work on any key, e.g. routines with drop sets::
+
+    RoutineExercise.objects.filter(use_custom_sets=True, custom_sets__contains=[{'set_type': 'dropset'}])
+
+which the GIN index on ``custom_sets`` serves on PostgreSQL.
+"""
+
+import orjson
+from django.db import models
+
+MAX_SETS = 50
+
+# Same as ExerciseSet.SET_TYPE_CHOICES, which planned sets are created with
+SET_TYPES = ['normal', 'warmup', 'dropset', 'failure']
+
+CUSTOM_SETS_SCHEMA = {
+    'type': 'array',
+    'maxItems': MAX_SETS,
+    'items': {
+        'type': 'object',
+        'additionalProperties': False,
+        'required': ['reps'],
+        'properties': {
+            'set_number': {'type': 'integer', 'minimum': 1},
+            'set_type': {'type': 'string', 'enum': SET_TYPES, 'default': 'normal'},
+            'reps': {'type': 'integer', 'minimum': 1, 'maximum': 1000},
+            'weight': {'type': ['number', 'null'], 'minimum': 0, 'maximum': 9999.99, 'default': None},
+            'rest_seconds': {'type': 'integer', 'minimum': 0, 'maximum': 3600, 'default': 60},
+            'set_name': {'type': 'string', 'maxLength': 100, 'default': ''},
+            'notes': {'type': 'string', 'maxLength': 500, 'default': ''},
+        },
+    },
+}
+
+
+class PlanError(ValueError):
+    """A plan that doesn't match the schema; ``path`` locates the bad value"""
+
+    def __init__(self, path, message):
+        self.path = path
+        super().__init__(f'{path}: {message}' if path else message)
+
+
+# ============= SCHEMA COMPILER =============
+
+def _is_integer(value):
+    if isinstance(value, float) and value.is_integer():
+        return True
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value):
+    if isinstance(value, str):
+        # Decimal fields reach clients as strings, e.g. a copied default_weight
+        try:
+            float(value)
+        except ValueError:
+            return False
+        return value.strip().lower() not in ('nan', 'inf', '-inf', 'infinity', '-infinity')
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+TYPE_CHECKS = {
+    'integer': _is_integer,
+    'number': _is_number,
+    'string': lambda value: isinstance(value, str),
+    'null': lambda value: value is None,
+    'object': lambda value: isinstance(value, dict),
+    'array': lambda value: isinstance(value, list),
+}
+
+COERCE = {
+    'integer': int,
+    'number': lambda value: round(float(value), 2),
+}
+
+
+def compile_schema(schema):
+    """
+    Turn a schema into ``check(value, path) -> normalised value`` raising
+    PlanError. Supports type, enum, minimum/maximum, maxLength, maxItems,
+    items, properties, required, default and additionalProperties: false.
+    Numbers may be given as numeric strings.
+    """
+    types = schema['type'] if isinstance(schema['type'], list) else [schema['type']]
+    type_checks = [(name, TYPE_CHECKS[name]) for name in types]
+    enum = set(schema['enum']) if 'enum' in schema else None
+    minimum, maximum = schema.get('minimum'), schema.get('maximum')
+    max_length, max_items = schema.get('maxLength'), schema.get('maxItems')
+    items = compile_schema(schema['items']) if 'items' in schema else None
+    properties = [
+        (name, compile_schema(sub_schema), sub_schema.get('default'))
+        for name, sub_schema in schema.get('properties', {}).items()
+    ]
+    known = {name for name, _, _ in properties}
+    required = schema.get('required', [])
+    closed = schema.get('additionalProperties', True) is False
+
+    def check(value, path=''):
+        kind = next((name for name, test in type_checks if test(value)), None)
+        if kind is None:
+            raise PlanError(path, f"must be {' or '.join(types)}")
+        if kind in COERCE:
+            value = COERCE[kind](value)
+        if enum is not None and value not in enum:
+            raise PlanError(path, f"must be one of {', '.join(sorted(enum))}")
+        if minimum is not None and kind in COERCE and value < minimum:
+            raise PlanError(path, f'must be at least {minimum}')
+        if maximum is not None and kind in COERCE and value > maximum:
+            raise PlanError(path, f'must be at most {maximum}')
+        if max_length is not None and kind == 'string' and len(value) > max_length:
+            raise PlanError(path, f'must be at most {max_length} characters')
+        if kind == 'array':
+            if max_items is not None and len(value) > max_items:
+                raise PlanError(path, f'must have at most {max_items} items')
+            if items is not None:
+                value = [items(item, f'{path}[{index}]') for index, item in enumerate(value)]
+        elif kind == 'object':
+            for name in required:
+                if name not in value:
+                    raise PlanError(f'{path}.{name}', 'is required')
+            if closed:
+                unknown = set(value) - known
+                if unknown:
+                    raise PlanError(path, f"unknown keys: {', '.join(sorted(unknown))}")
+            value = {
+                name: sub_check(value[name], f'{path}.{name}') if name in value else default
+                for name, sub_check, default in properties
+            }
+        return value
+
+    check.items = items
+    check.properties = properties
+    return check
+
+
+_check_plan = compile_schema(CUSTOM_SETS_SCHEMA)
+
+
+def _renumber(plan):
+    for number, planned in enumerate(plan, start=1):
+        planned['set_number'] = number
+    return plan
+
+
+def normalize_custom_sets(value):
+    """The stored form of a custom set plan, or PlanError"""
+    return _renumber(_check_plan(value or [], 'custom_sets'))
+
+
+def repair_custom_sets(value, default_reps):
+    """
+    Best-effort stored form of a plan written before validation: values that
+    don't match the schema fall back to their default, non-object sets and
+    unknown keys are dropped
+    """
+    if not isinstance(value, list):
+        return []
+    plan = []
+    for item in value[:MAX_SETS]:
+        if not isinstance(item, dict):
+            continue
+        planned = {}
+        for name, check, default in _check_plan.items.properties:
+            try:
+                planned[name] = check(item[name]) if name in item else default
+            except PlanError:
+                planned[name] = default
+        if planned['reps'] is None:
+            planned['reps'] = max(default_reps or 1, 1)
+        plan.append(planned)
+    return _renumber(plan)
+
+
+class SetPlanField(models.JSONField):
+    """JSONField for normalised plans, decoded with orjson on read"""
+
+    def from_db_value(self, value, expression, connection):
+        if self.decoder is None and isinstance(value, str):
+            try:
+                return orjson.loads(value)
+            except orjson.JSONDecodeError:
+                pass
+        return super().from_db_value(value, expression, connection)
@@ -1,3 +1,54 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+
+from . import workload
+from .models import Exercise, ExerciseSet, WorkoutSession
+
+User = get_user_model()
+
+
+class WorkloadWindowTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('lifter', 'lifter@example.com', 'pw-lifter-1')
+        self.exercise = Exercise.objects.create(
+            name='Test Squat', category='strength', muscle_group='legs'
+        )
+
+    def _completed_session(self, start_time):
+        session = WorkoutSession.objects.create(
+            user=self.user, name='Legs', start_time=start_time
+        )
+        ExerciseSet.objects.create(
+            session=session, exercise=self.exercise, set_number=1,
+            reps=5, weight=Decimal('100'), difficulty=8
+        )
+        session.is_completed = True
+        session.save()
+        return session
+
+    def assertWindowMatchesRebuild(self):
+        stored = workload.current_window(self.user)
+        rebuilt = workload.build_window(self.user.pk, stored.end)
+        np.testing.assert_allclose(stored.ring, rebuilt.ring)
+        np.testing.assert_allclose(stored.acute, rebuilt.acute)
+        np.testing.assert_allclose(stored.chronic, rebuilt.chronic)
+
+    def test_start_time_edit_moves_load_to_new_day(self):
+        session = self._completed_session(timezone.now() - timedelta(days=3))
+        self.assertWindowMatchesRebuild()
+
+        session = WorkoutSession.objects.get(pk=session.pk)
+        session.start_time -= timedelta(days=2)
+        session.save()
 
-# Create your tests here.
+        self.assertWindowMatchesRebuild()
+        window = workload.current_window(self.user)
+        moved_to = timezone.localdate(session.start_time)
+        self.assertGreater(window.ring[window.slot(moved_to)][0], 0)
+        self.assertEqual(window.ring[window.slot(moved_to + timedelta(days=2))][0], 0)
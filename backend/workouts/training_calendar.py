@@ -0,0 +1,239 @@
+"""
+Per-user training calendars for the year heatmap.
+
+Each TrainingCalendar row holds one user's year as two fixed-size arrays
+indexed by day of year: completed sessions per day (uint8) and volume lifted
+per day in whole kg (uint32), ~1.8 KB in total. A heatmap is one row read.
+
+The arrays are kept up to date from WorkoutSession saves and deletes: every
+session remembers what it contributed when it was loaded, so completing,
+editing or deleting it applies just the difference to its day.
+``rebuild_calendars()`` recomputes them from hot and archived sessions.
+"""
+
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_init, post_save, post_delete
+from django.utils import timezone
+from .models import WorkoutSession, SessionArchive, TrainingCalendar
+
+User = get_user_model()
+
+DAYS = 366
+SESSIONS_DTYPE = np.dtype('u1')
+VOLUME_DTYPE = np.dtype('<u4')
+
+# Heatmap shades for training days, scaled to the year's heaviest day
+INTENSITY_LEVELS = 4
+
+_state = threading.local()
+
+
+@contextmanager
+def calendar_unchanged():
+    """
+    Leave calendars alone for session saves/deletes inside the block, for
+    sessions that move rather than change (e.g. to the cold archive)
+    """
+    previous = getattr(_state, 'paused', False)
+    _state.paused = True
+    try:
+        yield
+    finally:
+        _state.paused = previous
+
+
+def _empty(dtype):
+    return np.zeros(DAYS, dtype=dtype)
+
+
+def _decode(blob, dtype):
+    if not blob:
+        return _empty(dtype)
+    return np.frombuffer(bytes(blob), dtype=dtype).copy()
+
+
+def day_index(day):
+    return day.timetuple().tm_yday - 1
+
+
+def contribution(session):
+    """``(date, kg)`` a session adds to its calendar, or None if it adds nothing"""
+    values = session.__dict__
+    if not values.get('is_completed') or values.get('start_time') is None:
+        return None
+    volume = Decimal(values.get('total_volume') or 0).to_integral_value()
+    return timezone.localdate(values['start_time']), int(volume)
+
+
+def apply(user_id, changes):
+    """Add ``[(date, sessions, kg), ...]`` (negative to remove) to the calendars"""
+    by_year = {}
+    for day, sessions, volume in changes:
+        by_year.setdefault(day.year, []).append((day_index(day), sessions, volume))
+
+    with transaction.atomic():
+        for year, entries in by_year.items():
+            calendar = TrainingCalendar.objects.select_for_update().filter(
+                user_id=user_id, year=year
+            ).first()
+            if calendar is None:
+                calendar = TrainingCalendar(user_id=user_id, year=year)
+            sessions = _decode(calendar.sessions, SESSIONS_DTYPE).astype(np.int64)
+            volume = _decode(calendar.volume, VOLUME_DTYPE).astype(np.int64)
+            for index, session_delta, volume_delta in entries:
+                sessions[index] += session_delta
+                volume[index] += volume_delta
+            _store(calendar, sessions, volume)
+
+
+def _store(calendar, sessions, volume):
+    sessions = np.clip(sessions, 0, np.iinfo(SESSIONS_DTYPE).max).astype(SESSIONS_DTYPE)
+    volume = np.clip(volume, 0, np.iinfo(VOLUME_DTYPE).max).astype(VOLUME_DTYPE)
+    calendar.sessions = sessions.tobytes()
+    calendar.volume = volume.tobytes()
+    calendar.training_days = int(np.count_nonzero(sessions))
+    calendar.save()
+
+
+# ============= SIGNALS =============
+
+TRACKED_FIELDS = ('is_completed', 'start_time', 'total_volume')
+
+
+def _remember(sender, instance, **kwargs):
+    # Read from __dict__: touching a deferred field would cost a query per row
+    if all(name in instance.__dict__ for name in TRACKED_FIELDS):
+        instance._calendar_entry = contribution(instance)
+
+
+def _on_save(sender, instance, created=False, raw=False, **kwargs):
+    if raw or getattr(_state, 'paused', False):
+        return
+    if created:
+        old = None
+    elif hasattr(instance, '_calendar_entry'):
+        old = instance._calendar_entry
+    else:
+        # Loaded with tracked fields deferred: what it counted for is unknown
+        return
+    new = contribution(instance)
+    if old == new:
+        return
+    changes = []
+    if old is not None:
+        changes.append((old[0], -1, -old[1]))
+    if new is not None:
+        changes.append((new[0], 1, new[1]))
+    apply(instance.user_id, changes)
+    instance._calendar_entry = new
+
+
+def _on_delete(sender, instance, origin=None, **kwargs):
+    if getattr(_state, 'paused', False):
+        return
+    # The account's calendars are being deleted with it
+    if isinstance(origin, User) or (isinstance(origin, QuerySet) and origin.model is User):
+        return
+    entry = getattr(instance, '_calendar_entry', None)
+    if entry is not None:
+        apply(instance.user_id, [(entry[0], -1, -entry[1])])
+
+
+def connect_signals():
+    post_init.connect(_remember, sender=WorkoutSession, dispatch_uid='calendar_init')
+    post_save.connect(_on_save, sender=WorkoutSession, dispatch_uid='calendar_save')
+    post_delete.connect(_on_delete, sender=WorkoutSession, dispatch_uid='calendar_delete')
+
+
+# ============= REBUILD =============
+
+def _user_entries(user_id):
+    """``(date, kg)`` for every completed session, hot and archived"""
+    from .archive import ArchiveData
+
+    sessions = WorkoutSession.objects.filter(
+        user_id=user_id, is_completed=True
+    ).values_list('start_time', 'total_volume')
+    for start_time, total_volume in sessions.iterator():
+        yield timezone.localdate(start_time), int(Decimal(total_volume).to_integral_value())
+
+    for blob in SessionArchive.objects.filter(user_id=user_id).values_list('data', flat=True):
+        for row in ArchiveData.from_bytes(blob).session_rows():
+            volume = Decimal(row['total_volume'] or 0).to_integral_value()
+            yield timezone.localdate(row['start_time']), int(volume)
+
+
+def rebuild_user(user_id):
+    """Recompute one user's calendars; returns the years written"""
+    arrays = {}
+    for day, volume in _user_entries(user_id):
+        sessions, volumes = arrays.setdefault(
+            day.year, (np.zeros(DAYS, dtype=np.int64), np.zeros(DAYS, dtype=np.int64))
+        )
+        sessions[day_index(day)] += 1
+        volumes[day_index(day)] += volume
+
+    with transaction.atomic():
+        TrainingCalendar.objects.filter(user_id=user_id).exclude(year__in=list(arrays)).delete()
+        existing = {
+            calendar.year: calendar
+            for calendar in TrainingCalendar.objects.select_for_update().filter(user_id=user_id)
+        }
+        for year, (sessions, volumes) in arrays.items():
+            calendar = existing.get(year) or TrainingCalendar(user_id=user_id, year=year)
+            _store(calendar, sessions, volumes)
+    return sorted(arrays)
+
+
+def rebuild_calendars(user=None):
+    """Rebuild every user's calendars (or one user's); yields per user results"""
+    users = User.objects.order_by('pk')
+    if user is not None:
+        users = users.filter(pk=user.pk)
+    for user_id in users.values_list('pk', flat=True).iterator():
+        yield user_id, rebuild_user(user_id)
+
+
+# ============= READING =============
+
+def year_calendar(user, year):
+    """Training days and daily volume of one year, for the heatmap"""
+    calendar = TrainingCalendar.objects.filter(user=user, year=year).values(
+        'sessions', 'volume'
+    ).first() or {}
+    sessions = _decode(calendar.get('sessions'), SESSIONS_DTYPE)
+    volume = _decode(calendar.get('volume'), VOLUME_DTYPE)
+
+    trained = np.flatnonzero(sessions)
+    peak = int(volume.max())
+    if peak:
+        # Shades 1..INTENSITY_LEVELS; a training day without volume still shows
+        levels = np.ceil(volume[trained] * INTENSITY_LEVELS / peak).astype(np.int64)
+        levels = np.maximum(levels, 1)
+    else:
+        levels = np.ones(len(trained), dtype=np.int64)
+
+    start = np.datetime64(f'{year}-01-01')
+    return {
+        'year': year,
+        'training_days': len(trained),
+        'total_sessions': int(sessions.sum()),
+        'total_volume': int(volume.sum(dtype=np.int64)),
+        'max_volume': peak,
+        'days': [
+            {
+                'date': str(start + int(index)),
+                'sessions': int(sessions[index]),
+                'volume': int(volume[index]),
+                'intensity': int(level),
+            }
+            for index, level in zip(trained, levels)
+        ],
+    }
@@ -0,0 +1,179 @@
+"""
+Nightly strength trends per user and exercise.
+
+For every user/exercise trained in the trailing window the best estimated
+1RM (Epley, ``weight * (1 + reps / 30)``) of each training day is fitted with
+a least-squares line. The slope, relative to the mean e1RM, says whether the
+lift is still moving:
+
+    plateau           >= MIN_SESSIONS days and under PLATEAU_PERCENT %/week
+    deload suggested  a plateau that is declining (DECLINE_PERCENT %/week or
+                      worse) or has lasted DELOAD_AFTER_WEEKS
+
+``compute_trends()`` runs as a batch (``manage.py compute_trends``): the
+daily bests of a batch of users come from one grouped query, every series is
+fitted at once with NumPy sums, and the results are upserted into
+ExerciseTrend for the trends endpoint to read.
+"""
+
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, FloatField, Max
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import ExerciseSet, ExerciseTrend
+
+User = get_user_model()
+
+TREND_WEEKS = 8
+MIN_SESSIONS = 4
+# e1RM formulas stop meaning much past this many reps
+MAX_REPS = 12
+
+PLATEAU_PERCENT = 0.5
+DECLINE_PERCENT = -1.0
+DELOAD_AFTER_WEEKS = 3
+
+# Users whose series are fetched and fitted together
+USER_BATCH_SIZE = 500
+
+TREND_FIELDS = [
+    'sessions', 'first_date', 'last_date', 'latest_e1rm', 'best_e1rm',
+    'slope_per_week', 'slope_percent', 'is_plateau', 'plateau_since',
+    'deload_suggested', 'computed_at',
+]
+
+
+def daily_bests(user_ids, since):
+    """``(user_id, exercise_id, day, e1rm)`` rows ordered by user, exercise, day"""
+    e1rm = F('weight') * (1.0 + F('reps') / 30.0)
+    return (
+        ExerciseSet.objects.filter(
+            user_id__in=user_ids,
+            performed_at__gte=since,
+            weight__gt=0,
+            reps__lte=MAX_REPS,
+            is_planned=False,
+        )
+        .exclude(set_type='warmup')
+        .annotate(day=TruncDate('performed_at'))
+        .values('user_id', 'exercise_id', 'day')
+        .annotate(e1rm=Max(e1rm, output_field=FloatField()))
+        .order_by('user_id', 'exercise_id', 'day')
+        .values_list('user_id', 'exercise_id', 'day', 'e1rm')
+    )
+
+
+def fit(series_keys, days, e1rm):
+    """
+    Least-squares fit of every series at once. ``series_keys`` must be sorted
+    so each series is contiguous. Returns ``(starts, columns)`` where
+    ``starts`` indexes each series' first row and ``columns`` holds per-series
+    arrays.
+    """
+    starts = np.flatnonzero(np.r_[True, np.any(series_keys[1:] != series_keys[:-1], axis=1)])
+    ends = np.r_[starts[1:], len(days)] - 1
+    series = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(days)]))
+
+    weeks = (days - days.min()) / 7.0
+    n = np.bincount(series).astype(np.float64)
+    sx = np.bincount(series, weeks)
+    sy = np.bincount(series, e1rm)
+    sxx = np.bincount(series, weeks * weeks)
+    sxy = np.bincount(series, weeks * e1rm)
+
+    denominator = n * sxx - sx * sx
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(denominator > 0, (n * sxy - sx * sy) / denominator, 0.0)
+        slope_percent = np.where(sy > 0, slope * 100 / (sy / n), 0.0)
+
+    return starts, {
+        'sessions': n.astype(np.int64),
+        'first_day': days[starts],
+        'last_day': days[ends],
+        'latest_e1rm': e1rm[ends],
+        'best_e1rm': np.maximum.reduceat(e1rm, starts),
+        'slope_per_week': slope,
+        'slope_percent': slope_percent,
+    }
+
+
+def _trend_rows(user_ids, start, today, now):
+    since = timezone.make_aware(datetime.combine(start, time.min))
+    rows = list(daily_bests(user_ids, since))
+    if not rows:
+        return []
+
+    keys = np.array([(row[0], row[1]) for row in rows], dtype=np.int64)
+    days = np.fromiter(((row[2] - start).days for row in rows), dtype=np.int64, count=len(rows))
+    e1rm = np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows))
+
+    starts, columns = fit(keys, days, e1rm)
+    plateau = (columns['sessions'] >= MIN_SESSIONS) & (columns['slope_percent'] < PLATEAU_PERCENT)
+    declining = plateau & (columns['slope_percent'] <= DECLINE_PERCENT)
+
+    # Plateaus carry over from the previous run so their length is known
+    previous = {
+        (user_id, exercise_id): plateau_since
+        for user_id, exercise_id, plateau_since in ExerciseTrend.objects.filter(
+            user_id__in=user_ids, is_plateau=True
+        ).values_list('user_id', 'exercise_id', 'plateau_since')
+    }
+
+    trends = []
+    for index, first in enumerate(starts):
+        if columns['sessions'][index] < 2:
+            continue
+        user_id, exercise_id = (int(value) for value in keys[first])
+        plateau_since = None
+        deload = False
+        if plateau[index]:
+            plateau_since = previous.get((user_id, exercise_id)) or today
+            deload = bool(declining[index]) or (
+                today - plateau_since >= timedelta(weeks=DELOAD_AFTER_WEEKS)
+            )
+        trends.append(ExerciseTrend(
+            user_id=user_id,
+            exercise_id=exercise_id,
+            sessions=int(columns['sessions'][index]),
+            first_date=start + timedelta(days=int(columns['first_day'][index])),
+            last_date=start + timedelta(days=int(columns['last_day'][index])),
+            latest_e1rm=round(float(columns['latest_e1rm'][index]), 2),
+            best_e1rm=round(float(columns['best_e1rm'][index]), 2),
+            slope_per_week=round(float(columns['slope_per_week'][index]), 3),
+            slope_percent=round(float(columns['slope_percent'][index]), 3),
+            is_plateau=bool(plateau[index]),
+            plateau_since=plateau_since,
+            deload_suggested=deload,
+            computed_at=now,
+        ))
+    return trends
+
+
+def compute_trends(user=None, batch_size=USER_BATCH_SIZE):
+    """Recompute trends for every user (or one); yields ``(users, trends)`` per batch"""
+    now = timezone.now()
+    today = timezone.localdate(now)
+    start = today - timedelta(weeks=TREND_WEEKS)
+
+    users = User.objects.order_by('pk')
+    if user is not None:
+        users = users.filter(pk=user.pk)
+    user_ids = list(users.values_list('pk', flat=True))
+
+    for offset in range(0, len(user_ids), batch_size):
+        batch = user_ids[offset:offset + batch_size]
+        trends = _trend_rows(batch, start, today, now)
+        with transaction.atomic():
+            ExerciseTrend.objects.bulk_create(
+                trends,
+                update_conflicts=True,
+                unique_fields=['user', 'exercise'],
+                update_fields=TREND_FIELDS,
+            )
+            # Exercises not trained in the window any more
+            ExerciseTrend.objects.filter(user_id__in=batch, computed_at__lt=now).delete()
+        yield len(batch), len(trends)
@@ -1,10 +1,15 @@
 from django.urls import path
+from . import async_views
 from .views import (
     ExerciseListView,
     ExerciseDetailView,
+    exercise_history,
     WorkoutRoutineListView,
     WorkoutRoutineDetailView,
     like_routine,
+    fork_routine,
+    similar_routines,
+    recommended_routines,
     start_workout,  # ✅ ADD THIS
     WorkoutSessionListView,
     WorkoutSessionDetailView,
@@ -12,17 +17,27 @@ from .views import (
     ExerciseSetListCreateView,
     ExerciseSetDetailView,
     workout_stats,
+    training_calendar,
+    muscle_volume_analytics,
+    exercise_trends,
+    workload_analytics,
+    exercise_leaderboard,
+    routine_leaderboard,
 )
 
 urlpatterns = [
     # Exercises
     path('exercises/', ExerciseListView.as_view(), name='exercise_list'),
     path('exercises/<int:pk>/', ExerciseDetailView.as_view(), name='exercise_detail'),
+    path('exercises/<int:pk>/history/', exercise_history, name='exercise_history'),
     
     # Workout Routines
     path('routines/', WorkoutRoutineListView.as_view(), name='routine_list'),
+    path('routines/recommended/', recommended_routines, name='recommended_routines'),
     path('routines/<int:pk>/', WorkoutRoutineDetailView.as_view(), name='routine_detail'),
     path('routines/<int:pk>/like/', like_routine, name='like_routine'),
+    path('routines/<int:pk>/fork/', fork_routine, name='fork_routine'),
+    path('routines/<int:pk>/similar/', similar_routines, name='similar_routines'),
     path('routines/<int:pk>/start/', start_workout, name='start_workout'),  # ✅ FIX
 
     # Workout Sessions
@@ -36,4 +51,21 @@ urlpatterns = [
     
     # Stats
     path('stats/', workout_stats, name='workout_stats'),
+    path('calendar/', training_calendar, name='training_calendar'),
+    
+    # Analytics
+    path('analytics/muscles/', muscle_volume_analytics, name='muscle_volume_analytics'),
+    path('analytics/trends/', exercise_trends, name='exercise_trends'),
+    path('analytics/workload/', workload_analytics, name='workload_analytics'),
+    
+    # Leaderboards
+    path('leaderboards/exercises/<int:pk>/', exercise_leaderboard, name='exercise_leaderboard'),
+    path('leaderboards/routines/', routine_leaderboard, name='routine_leaderboard'),
+    
+    # Async read-only variants (serve under ASGI / uvicorn workers)
+    path('async/exercises/', async_views.exercise_list, name='async_exercise_list'),
+    path('async/routines/', async_views.routine_list, name='async_routine_list'),
+    path('async/sessions/', async_views.session_list, name='async_session_list'),
+    path('async/sessions/<int:pk>/', async_views.session_detail, name='async_session_detail'),
+    path('async/stats/', async_views.workout_stats, name='async_workout_stats'),
 ]
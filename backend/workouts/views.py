@@ -1,14 +1,40 @@
 from rest_framework import generics, permissions, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
+import hashlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import F, Q, Count, Exists, OuterRef, Prefetch
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+    quote_etag
+)
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import http_date
+from config.db_routing import REPLICA, read_from_replica
+from config.fieldsets import SparseQuerysetMixin
+from config.throttling import (
+    AnalyticsRateThrottle,
+    SearchRateThrottle,
+    SetWriteRateThrottle
+)
+from social.feed import publish_record, publish_routine, publish_session
+from sync.signals import record_changes
 from .models import (
     Exercise, 
     WorkoutRoutine, 
+    RoutineExercise,
     WorkoutSession, 
     ExerciseSet,
-    WorkoutLike
+    WorkoutLike,
+    ExerciseTrend
 )
 from .serializers import (
     ExerciseSerializer,
@@ -20,50 +46,244 @@ from .serializers import (
     WorkoutSessionCreateSerializer,
     ExerciseSetSerializer,
     ExerciseSetCreateSerializer,
-    WorkoutLikeSerializer
+    WorkoutLikeSerializer,
+    ExerciseTrendSerializer
+)
+from .archive import SessionHistory, archived_exercise_sets, find_archived_session, has_archives
+from .events import broadcast_session_event
+from .fastpath import FieldMap, FastListMixin
+from . import leaderboards
+from .muscles import BUCKETS as MUSCLE_BUCKETS, muscle_volume
+from .planning import create_planned_sets, discard_planned_sets
+from . import recommendations
+from .training_calendar import year_calendar
+from .workload import workload_summary
+
+
+# ============= QUERYSET HELPERS =============
+# Shared by the sync views and their async variants in async_views.py
+
+def with_routine_list_stats(queryset, user):
+    """Annotate the counters WorkoutRoutineListSerializer would otherwise query per row"""
+    return queryset.select_related('user').annotate(
+        exercises_total=Count('exercises', distinct=True),
+        likes_total=Count('likes', distinct=True),
+        liked_by_user=Exists(
+            WorkoutLike.objects.filter(user=user, routine=OuterRef('pk'))
+        ),
+    )
+
+
+SESSION_SETS_PREFETCH = Prefetch(
+    'exercise_sets', queryset=ExerciseSet.objects.select_related('exercise')
+)
+
+ROUTINE_EXERCISES_PREFETCH = Prefetch(
+    'exercises', queryset=RoutineExercise.objects.select_related('exercise')
+)
+
+
+def with_session_sets(queryset):
+    """Load routine and sets (with their exercise) in a fixed number of queries"""
+    return queryset.select_related('routine').prefetch_related(SESSION_SETS_PREFETCH)
+
+
+def routine_list_queryset(user, params):
+    """Routines visible to ``user`` filtered by the list endpoint's query params"""
+    # Show user's own routines + public routines
+    queryset = WorkoutRoutine.objects.filter(
+        Q(user=user) | Q(is_public=True)
+    ).distinct()
+    
+    # Filter by user's routines only
+    if params.get('my_routines') == 'true':
+        queryset = WorkoutRoutine.objects.filter(user=user)
+    
+    # Filter by public routines only
+    if params.get('public') == 'true':
+        queryset = WorkoutRoutine.objects.filter(is_public=True)
+    
+    # Search
+    search = params.get('search')
+    if search:
+        queryset = queryset.filter(name__icontains=search)
+    
+    # Routines with custom sets of a type, e.g. dropset (GIN index on custom_sets)
+    set_type = params.get('set_type')
+    if set_type:
+        queryset = queryset.filter(Exists(RoutineExercise.objects.filter(
+            routine=OuterRef('pk'),
+            use_custom_sets=True,
+            custom_sets__contains=[{'set_type': set_type}],
+        )))
+    
+    return with_routine_list_stats(queryset, user)
+
+
+def session_list_queryset(user, params):
+    """Sessions of ``user`` filtered by the list endpoint's query params"""
+    queryset = WorkoutSession.objects.filter(user=user)
+    
+    # Filter by completed status
+    is_completed = params.get('is_completed')
+    if is_completed is not None:
+        queryset = queryset.filter(is_completed=is_completed.lower() == 'true')
+    
+    # Filter by date range
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
+    if start_date:
+        queryset = queryset.filter(start_time__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(start_time__lte=end_date)
+    
+    return with_session_sets(queryset)
+
+
+def _parse_bound(value):
+    """start_date/end_date param as an aware datetime (a bare date means midnight UTC)"""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            return None
+        parsed = datetime(day.year, day.month, day.day)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def session_history(queryset, user, params):
+    """
+    ``queryset`` followed by the user's archived sessions (see archive.py),
+    or None when nothing archived can match the params
+    """
+    is_completed = params.get('is_completed')
+    if is_completed is not None and is_completed.lower() != 'true':
+        return None
+    if not has_archives(user):
+        return None
+    return SessionHistory(
+        queryset, user,
+        start=_parse_bound(params.get('start_date')),
+        end=_parse_bound(params.get('end_date'))
+    )
+
+
+def exercise_queryset(params):
+    """Exercise catalog filtered by the list endpoint's query params"""
+    queryset = Exercise.objects.all()
+    
+    # Filter by category
+    category = params.get('category')
+    if category:
+        queryset = queryset.filter(category=category)
+    
+    # Filter by muscle group
+    muscle_group = params.get('muscle_group')
+    if muscle_group:
+        queryset = queryset.filter(muscle_group=muscle_group)
+    
+    # Filter by equipment
+    equipment = params.get('equipment')
+    if equipment:
+        queryset = queryset.filter(equipment=equipment)
+    
+    # Search
+    search = params.get('search')
+    if search:
+        queryset = queryset.filter(name__icontains=search)
+    
+    return queryset
+
+
+# ============= SPARSE FIELDSET LOADERS =============
+# How non-column fields are loaded when ?fields= / ?expand= prune a query
+# (see config/fieldsets.py). Method fields backed by annotations load nothing.
+
+def _routine_exercises_loader(field):
+    # Join each item's exercise only when exercise_details is still rendered
+    if 'exercise_details' in field.child.fields:
+        return {'prefetch_related': [ROUTINE_EXERCISES_PREFETCH]}
+    return {'prefetch_related': ['exercises']}
+
+
+ROUTINE_SPARSE_LOADERS = {
+    'username': {'select_related': ['user'], 'only': ['user', 'user__username']},
+    'exercises': _routine_exercises_loader,
+    'exercise_count': {},
+    'is_liked': {},
+    'likes_count': {},
+}
+
+SESSION_SPARSE_LOADERS = {
+    'routine_name': {'select_related': ['routine'], 'only': ['routine', 'routine__name']},
+    'exercise_sets': {'prefetch_related': [SESSION_SETS_PREFETCH]},
+    'exercise_count': {'prefetch_related': [SESSION_SETS_PREFETCH]},
+}
+
+_SET_EXERCISE_LOADER = {'select_related': ['exercise']}
+
+EXERCISE_SET_SPARSE_LOADERS = {
+    'exercise_name': {**_SET_EXERCISE_LOADER, 'only': ['exercise', 'exercise__name']},
+    'exercise_muscle_group': {**_SET_EXERCISE_LOADER, 'only': ['exercise', 'exercise__muscle_group']},
+    'exercise_secondary_muscles': {
+        **_SET_EXERCISE_LOADER, 'only': ['exercise', 'exercise__secondary_muscles']
+    },
+    'volume': {'only': ['reps', 'weight']},
+}
+
+
+# ============= FAST LIST RENDERING =============
+# Precompiled field maps for the hot list endpoints (see fastpath.py)
+
+def _set_volume(row):
+    if row['weight'] and row['reps']:
+        return float(row['weight']) * row['reps']
+    return 0
+
+
+EXERCISE_FIELD_MAP = FieldMap(ExerciseSerializer)
+
+EXERCISE_SET_FIELD_MAP = FieldMap(
+    ExerciseSetSerializer,
+    computed={'volume': (['weight', 'reps'], _set_volume)},
+)
+
+SESSION_LIST_FIELD_MAP = FieldMap(
+    WorkoutSessionListSerializer,
+    computed={
+        'exercise_count': ([], lambda row: len({
+            s['exercise'] for s in row['__children']['exercise_sets']
+        })),
+    },
+    nested={'exercise_sets': (EXERCISE_SET_FIELD_MAP, 'session')},
 )
 
 
 # ============= EXERCISES =============
 
-class ExerciseListView(generics.ListCreateAPIView):
+class ExerciseListView(FastListMixin, SparseQuerysetMixin, generics.ListCreateAPIView):
     """
     GET/POST /api/workouts/exercises/
     List all exercises or create custom exercise
     """
     serializer_class = ExerciseSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [SearchRateThrottle]
+    fast_field_map = EXERCISE_FIELD_MAP
+    db_routing = REPLICA
     
     def get_queryset(self):
-        queryset = Exercise.objects.all()
-        
-        # Filter by category
-        category = self.request.query_params.get('category')
-        if category:
-            queryset = queryset.filter(category=category)
-        
-        # Filter by muscle group
-        muscle_group = self.request.query_params.get('muscle_group')
-        if muscle_group:
-            queryset = queryset.filter(muscle_group=muscle_group)
-        
-        # Filter by equipment
-        equipment = self.request.query_params.get('equipment')
-        if equipment:
-            queryset = queryset.filter(equipment=equipment)
-        
-        # Search
-        search = self.request.query_params.get('search')
-        if search:
-            queryset = queryset.filter(name__icontains=search)
-        
-        return queryset
+        return exercise_queryset(self.request.query_params)
     
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user, is_custom=True)
 
 
-class ExerciseDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ExerciseDetailView(SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     GET/PUT/DELETE /api/workouts/exercises/<id>/
     Retrieve, update, or delete a specific exercise
@@ -71,16 +291,70 @@ class ExerciseDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Exercise.objects.all()
     serializer_class = ExerciseSerializer
     permission_classes = [permissions.IsAuthenticated]
+    db_routing = REPLICA
+
+
+EXERCISE_HISTORY_LIMIT = 200
+EXERCISE_HISTORY_MAX_LIMIT = 1000
+
+
+@read_from_replica
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([AnalyticsRateThrottle])
+def exercise_history(request, pk):
+    """
+    GET /api/workouts/exercises/<id>/history/?limit=200&before=<iso datetime>
+    The user's sets of one exercise, newest first. Served from the
+    (user, exercise, performed_at) index, so only recent partitions are read;
+    archived sets follow once the hot ones run out.
+    """
+    try:
+        limit = max(min(int(request.query_params.get('limit', EXERCISE_HISTORY_LIMIT)), EXERCISE_HISTORY_MAX_LIMIT), 0)
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    queryset = ExerciseSet.objects.filter(user=request.user, exercise_id=pk, is_planned=False)
+    
+    before_dt = None
+    before = request.query_params.get('before')
+    if before:
+        before_dt = parse_datetime(before)
+        if before_dt is None:
+            return Response({'error': 'before must be an ISO datetime'}, status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(before_dt):
+            before_dt = timezone.make_aware(before_dt)
+        queryset = queryset.filter(performed_at__lt=before_dt)
+    
+    columns = [
+        'id', 'session_id', 'performed_at', 'set_number', 'set_type',
+        'reps', 'weight', 'is_personal_record'
+    ]
+    rows = list(queryset.order_by('-performed_at', 'set_number').values(*columns)[:limit])
+    if len(rows) < limit:
+        # Archived sessions all predate the hot ones
+        rows += [
+            {column: row[column] for column in columns}
+            for row in archived_exercise_sets(request.user, int(pk), before_dt, limit - len(rows))
+        ]
+    
+    return Response([
+        {**row, 'weight': str(row['weight']) if row['weight'] is not None else None}
+        for row in rows
+    ])
 
 
 # ============= WORKOUT ROUTINES =============
 
-class WorkoutRoutineListView(generics.ListCreateAPIView):
+class WorkoutRoutineListView(SparseQuerysetMixin, generics.ListCreateAPIView):
     """
     GET/POST /api/workouts/routines/
     List all routines or create new routine
     """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [SearchRateThrottle]
+    sparse_loaders = ROUTINE_SPARSE_LOADERS
+    db_routing = REPLICA
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -88,38 +362,22 @@ class WorkoutRoutineListView(generics.ListCreateAPIView):
         return WorkoutRoutineListSerializer
     
     def get_queryset(self):
-        user = self.request.user
-        
-        # Show user's own routines + public routines
-        queryset = WorkoutRoutine.objects.filter(
-            Q(user=user) | Q(is_public=True)
-        ).distinct()
-        
-        # Filter by user's routines only
-        if self.request.query_params.get('my_routines') == 'true':
-            queryset = WorkoutRoutine.objects.filter(user=user)
-        
-        # Filter by public routines only
-        if self.request.query_params.get('public') == 'true':
-            queryset = WorkoutRoutine.objects.filter(is_public=True)
-        
-        # Search
-        search = self.request.query_params.get('search')
-        if search:
-            queryset = queryset.filter(name__icontains=search)
-        
-        return queryset
+        return routine_list_queryset(self.request.user, self.request.query_params)
     
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        routine = serializer.save(user=self.request.user)
+        if routine.is_public:
+            publish_routine(routine)
+            leaderboards.record_routine(routine)
 
 
-class WorkoutRoutineDetailView(generics.RetrieveUpdateDestroyAPIView):
+class WorkoutRoutineDetailView(SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     GET/PUT/DELETE /api/workouts/routines/<id>/
     Retrieve, update, or delete a specific routine
     """
     permission_classes = [permissions.IsAuthenticated]
+    sparse_loaders = ROUTINE_SPARSE_LOADERS
     
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
@@ -128,9 +386,22 @@ class WorkoutRoutineDetailView(generics.RetrieveUpdateDestroyAPIView):
     
     def get_queryset(self):
         user = self.request.user
-        return WorkoutRoutine.objects.filter(
-            Q(user=user) | Q(is_public=True)
-        )
+        return with_routine_list_stats(
+            WorkoutRoutine.objects.filter(Q(user=user) | Q(is_public=True)), user
+        ).prefetch_related(ROUTINE_EXERCISES_PREFETCH)
+    
+    def perform_update(self, serializer):
+        was_public = serializer.instance.is_public
+        routine = serializer.save()
+        if routine.is_public and not was_public:
+            publish_routine(routine)
+        if routine.is_public != was_public:
+            leaderboards.record_routine(routine)
+    
+    def perform_destroy(self, instance):
+        routine_id = instance.pk
+        instance.delete()
+        leaderboards.remove_routine(routine_id)
 
 
 @api_view(['POST'])
@@ -153,14 +424,113 @@ def like_routine(request, pk):
     return Response({'message': 'Routine liked'}, status=status.HTTP_201_CREATED)
 
 
+
+# Columns copied from every RoutineExercise of the source routine
+FORK_EXERCISE_FIELDS = [
+    'exercise_id', 'order', 'default_sets', 'default_reps', 'default_weight',
+    'default_rest_seconds', 'notes', 'use_custom_sets', 'custom_sets',
+]
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def fork_routine(request, pk):
+    """
+    POST /api/workouts/routines/<id>/fork/
+    Copy a routine (own or public) and its exercises into a new private
+    routine of the user, in one transaction with a fixed number of queries
+    """
+    source = get_object_or_404(
+        WorkoutRoutine.objects.filter(Q(user=request.user) | Q(is_public=True)), pk=pk
+    )
+    
+    with transaction.atomic():
+        routine = WorkoutRoutine.objects.create(
+            user=request.user,
+            name=source.name,
+            description=source.description,
+            is_public=False,
+            forked_from=source,
+        )
+        items = RoutineExercise.objects.bulk_create([
+            RoutineExercise(routine=routine, **values)
+            for values in source.exercises.order_by('order').values(*FORK_EXERCISE_FIELDS)
+        ])
+        record_changes('routine_exercise', request.user.pk, [item.pk for item in items], 'upsert')
+        WorkoutRoutine.objects.filter(pk=source.pk).update(fork_count=F('fork_count') + 1)
+    
+    routine = WorkoutRoutine.objects.select_related('user').prefetch_related(
+        ROUTINE_EXERCISES_PREFETCH
+    ).get(pk=routine.pk)
+    serializer = WorkoutRoutineDetailSerializer(routine, context={'request': request})
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+def _ranked_routines(request, ranked):
+    """Routines of ``[(id, similarity), ...]`` in rank order, with their score"""
+    scores = dict(ranked)
+    routines = with_routine_list_stats(
+        WorkoutRoutine.objects.filter(pk__in=scores, is_public=True), request.user
+    ).in_bulk()
+    data = WorkoutRoutineListSerializer(
+        [routines[pk] for pk, _ in ranked if pk in routines],
+        many=True,
+        context={'request': request}
+    ).data
+    return [{**item, 'similarity': scores[item['id']]} for item in data]
+
+
+def _recommendation_limit(request):
+    try:
+        limit = int(request.query_params.get('limit', recommendations.DEFAULT_LIMIT))
+    except ValueError:
+        return None
+    return min(max(limit, 1), recommendations.MAX_LIMIT)
+
+
+@read_from_replica
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([AnalyticsRateThrottle])
+def similar_routines(request, pk):
+    """
+    GET /api/workouts/routines/<id>/similar/?limit=10
+    Public routines closest to this one by exercises and muscles worked
+    """
+    limit = _recommendation_limit(request)
+    if limit is None:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    routine = get_object_or_404(
+        WorkoutRoutine.objects.filter(Q(user=request.user) | Q(is_public=True)), pk=pk
+    )
+    return Response(_ranked_routines(request, recommendations.similar_routines(routine, limit)))
+
+
+@read_from_replica
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([AnalyticsRateThrottle])
+def recommended_routines(request):
+    """
+    GET /api/workouts/routines/recommended/?limit=10
+    Public routines of other users matching what the user has been training
+    """
+    limit = _recommendation_limit(request)
+    if limit is None:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(_ranked_routines(request, recommendations.recommended_routines(request.user, limit)))
+
 # ============= WORKOUT SESSIONS =============
 
-class WorkoutSessionListView(generics.ListCreateAPIView):
+class WorkoutSessionListView(FastListMixin, SparseQuerysetMixin, generics.ListCreateAPIView):
     """
     GET/POST /api/workouts/sessions/
     List all sessions or start new session
     """
     permission_classes = [permissions.IsAuthenticated]
+    sparse_loaders = SESSION_SPARSE_LOADERS
+    fast_field_map = SESSION_LIST_FIELD_MAP
+    db_routing = REPLICA
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -168,34 +538,32 @@ class WorkoutSessionListView(generics.ListCreateAPIView):
         return WorkoutSessionListSerializer
     
     def get_queryset(self):
-        user = self.request.user
-        queryset = WorkoutSession.objects.filter(user=user)
-        
-        # Filter by completed status
-        is_completed = self.request.query_params.get('is_completed')
-        if is_completed is not None:
-            queryset = queryset.filter(is_completed=is_completed.lower() == 'true')
-        
-        # Filter by date range
-        start_date = self.request.query_params.get('start_date')
-        end_date = self.request.query_params.get('end_date')
-        if start_date:
-            queryset = queryset.filter(start_time__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(start_time__lte=end_date)
+        return session_list_queryset(self.request.user, self.request.query_params)
+    
+    def list(self, request, *args, **kwargs):
+        history = session_history(
+            self.filter_queryset(self.get_queryset()), request.user, request.query_params
+        )
+        if history is None:
+            return super().list(request, *args, **kwargs)
         
-        return queryset
+        # Archived sessions are hydrated instances, so render through the serializer
+        page = self.paginate_queryset(history)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(list(history), many=True).data)
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class WorkoutSessionDetailView(generics.RetrieveUpdateDestroyAPIView):
+class WorkoutSessionDetailView(SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     GET/PUT/DELETE /api/workouts/sessions/<id>/
     Retrieve, update, or delete a specific session
     """
     permission_classes = [permissions.IsAuthenticated]
+    sparse_loaders = SESSION_SPARSE_LOADERS
     
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
@@ -203,9 +571,56 @@ class WorkoutSessionDetailView(generics.RetrieveUpdateDestroyAPIView):
         return WorkoutSessionDetailSerializer
     
     def get_queryset(self):
-        return WorkoutSession.objects.filter(user=self.request.user)
+        return with_session_sets(WorkoutSession.objects.filter(user=self.request.user))
+    
+    def retrieve(self, request, *args, **kwargs):
+        # Check validators with one narrow query before loading the sets
+        state = WorkoutSession.objects.filter(
+            user=request.user, pk=kwargs['pk']
+        ).values('version', 'updated_at', 'is_completed').first()
+        archived = None
+        if state is None:
+            archived = find_archived_session(request.user, kwargs['pk'])
+            if archived is None:
+                return super().retrieve(request, *args, **kwargs)
+            # Renames don't reach archived versions; the names were just
+            # loaded with the session, so they go into the validator instead
+            names = [archived.routine.name if archived.routine else '']
+            names += [exercise_set.exercise.name for exercise_set in archived.exercise_sets.all()]
+            state = {
+                'version': f"{archived.version}-{hashlib.md5(chr(0).join(names).encode()).hexdigest()[:8]}",
+                'updated_at': archived.updated_at,
+                'is_completed': True,
+            }
+        
+        # One representation per version, renderer and ?fields= selection
+        variant = hashlib.md5(
+            f'{request.accepted_media_type}?{request.META.get("QUERY_STRING", "")}'.encode()
+        ).hexdigest()[:12]
+        etag = quote_etag(f'{kwargs["pk"]}.{state["version"]}.{variant}')
+        last_modified = int(state['updated_at'].timestamp())
+        
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None and archived is not None:
+            response = Response(self.get_serializer(archived).data)
+        elif response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        if state['is_completed']:
+            patch_cache_control(
+                response, private=True, max_age=settings.COMPLETED_SESSION_MAX_AGE
+            )
+        else:
+            # Still being logged: clients must revalidate every time
+            patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
     
     def perform_update(self, serializer):
+        if serializer.validated_data.get('is_completed') and not serializer.instance.is_completed:
+            discard_planned_sets(serializer.instance)
         instance = serializer.save()
         if instance.end_time:
             instance.calculate_duration()
@@ -216,8 +631,11 @@ class WorkoutSessionDetailView(generics.RetrieveUpdateDestroyAPIView):
 @permission_classes([permissions.IsAuthenticated])
 def start_workout(request, pk):
     """
-    POST /api/workouts/routines/<id>/start/
-    Start a new workout session from a routine
+    POST /api/workouts/routines/<id>/start/  {"plan": true}
+    Start a new workout session from a routine. With ``plan`` the routine's
+    sets (overlaid with the user's last performance) are created up front as
+    planned sets and returned with the session; logging one is a PATCH of
+    /api/workouts/sets/<id>/.
     """
     routine = get_object_or_404(WorkoutRoutine, pk=pk)
     user = request.user
@@ -229,16 +647,20 @@ def start_workout(request, pk):
             status=status.HTTP_403_FORBIDDEN
         )
     
-    from django.utils import timezone
+    plan = str(request.data.get('plan', '')).lower() in ('true', '1')
     
-    # Create workout session
-    session = WorkoutSession.objects.create(
-        user=user,
-        routine=routine,
-        name=routine.name,
-        start_time=timezone.now(),
-        is_completed=False
-    )
+    with transaction.atomic():
+        # Create workout session
+        session = WorkoutSession.objects.create(
+            user=user,
+            routine=routine,
+            name=routine.name,
+            start_time=timezone.now(),
+            is_completed=False
+        )
+        if plan:
+            create_planned_sets(session, routine)
+            session = with_session_sets(WorkoutSession.objects.filter(pk=session.pk)).get()
     
     serializer = WorkoutSessionDetailSerializer(session)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -252,10 +674,13 @@ def complete_session(request, pk):
     Mark session as completed
     """
     session = get_object_or_404(WorkoutSession, pk=pk, user=request.user)
+    was_completed = session.is_completed
     
-    from django.utils import timezone
     from django.db.models import Avg
     
+    # Planned sets that were never logged weren't done
+    discard_planned_sets(session)
+    
     session.end_time = timezone.now()
     session.is_completed = True
     session.calculate_duration()
@@ -266,10 +691,11 @@ def complete_session(request, pk):
     user_stats.total_workouts += 1
     user_stats.total_volume += session.total_volume
     user_stats.last_workout_date = session.start_time.date()
-    user_stats.save()
+    # Only these: the social counters are incremented concurrently in SQL
+    user_stats.save(update_fields=['total_workouts', 'total_volume', 'last_workout_date', 'updated_at'])
     
-    # Update routine stats
-    if session.routine:
+    # Update routine stats; completing again doesn't count as another use
+    if session.routine and not was_completed:
         session.routine.total_uses += 1
         
         # Calculate average duration from all completed sessions of this routine
@@ -284,19 +710,30 @@ def complete_session(request, pk):
             session.routine.average_duration = round(avg_duration)
         
         session.routine.save()
+        leaderboards.record_routine(session.routine)
+    
+    if not was_completed:
+        publish_session(session)
     
     serializer = WorkoutSessionDetailSerializer(session)
+    broadcast_session_event(session.pk, 'session.completed', {
+        field: serializer.data[field]
+        for field in ['id', 'end_time', 'duration_minutes', 'total_volume', 'total_sets', 'is_completed']
+    })
     return Response(serializer.data)
 
 
 # ============= EXERCISE SETS =============
 
-class ExerciseSetListCreateView(generics.ListCreateAPIView):
+class ExerciseSetListCreateView(FastListMixin, SparseQuerysetMixin, generics.ListCreateAPIView):
     """
     GET/POST /api/workouts/sessions/<session_id>/sets/
     List or add sets to a session
     """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [SetWriteRateThrottle]
+    sparse_loaders = EXERCISE_SET_SPARSE_LOADERS
+    fast_field_map = EXERCISE_SET_FIELD_MAP
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -307,9 +744,20 @@ class ExerciseSetListCreateView(generics.ListCreateAPIView):
         session_id = self.kwargs.get('session_id')
         return ExerciseSet.objects.filter(
             session_id=session_id,
-            session__user=self.request.user
+            user=self.request.user
         )
     
+    def list(self, request, *args, **kwargs):
+        if not self.get_queryset().exists():
+            archived = find_archived_session(request.user, self.kwargs.get('session_id'))
+            if archived is not None:
+                sets = list(archived.exercise_sets.all())
+                page = self.paginate_queryset(sets)
+                if page is not None:
+                    return self.get_paginated_response(self.get_serializer(page, many=True).data)
+                return Response(self.get_serializer(sets, many=True).data)
+        return super().list(request, *args, **kwargs)
+    
     def perform_create(self, serializer):
         session_id = self.kwargs.get('session_id')
         session = get_object_or_404(
@@ -317,23 +765,47 @@ class ExerciseSetListCreateView(generics.ListCreateAPIView):
             pk=session_id, 
             user=self.request.user
         )
-        serializer.save(session=session)
+        instance = serializer.save(session=session)
+        if instance.is_personal_record:
+            publish_record(instance)
+        leaderboards.record_set(instance, self.request.user)
+        broadcast_session_event(
+            session.pk, 'set.created', ExerciseSetSerializer(instance).data
+        )
 
 
-class ExerciseSetDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ExerciseSetDetailView(SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     GET/PUT/DELETE /api/workouts/sets/<id>/
     Retrieve, update, or delete a specific set
     """
     serializer_class = ExerciseSetSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [SetWriteRateThrottle]
+    sparse_loaders = EXERCISE_SET_SPARSE_LOADERS
     
     def get_queryset(self):
-        return ExerciseSet.objects.filter(session__user=self.request.user)
+        return ExerciseSet.objects.filter(user=self.request.user)
+    
+    def perform_update(self, serializer):
+        was_record = serializer.instance.is_personal_record
+        # Writing a planned set logs it, unless the client says otherwise
+        instance = serializer.save(is_planned=serializer.validated_data.get('is_planned', False))
+        if instance.is_personal_record and not was_record:
+            publish_record(instance)
+        leaderboards.record_set(instance, self.request.user)
+        broadcast_session_event(instance.session_id, 'set.updated', serializer.data)
+    
+    def perform_destroy(self, instance):
+        session_id, set_id = instance.session_id, instance.pk
+        instance.delete()
+        broadcast_session_event(session_id, 'set.deleted', {'id': set_id})
 
 
+@read_from_replica
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@throttle_classes([AnalyticsRateThrottle])
 def workout_stats(request):
     """
     GET /api/workouts/stats/
@@ -342,13 +814,13 @@ def workout_stats(request):
     user = request.user
     
     # Get recent sessions
-    recent_sessions = WorkoutSession.objects.filter(
+    recent_sessions = list(with_session_sets(WorkoutSession.objects.filter(
         user=user, 
         is_completed=True
-    )[:10]
+    ))[:10])
     
     # Calculate stats
-    total_sessions = recent_sessions.count()
+    total_sessions = len(recent_sessions)
     total_volume = sum(s.total_volume for s in recent_sessions)
     avg_duration = sum(s.duration_minutes or 0 for s in recent_sessions) / total_sessions if total_sessions > 0 else 0
     
@@ -357,4 +829,184 @@ def workout_stats(request):
         'total_volume': total_volume,
         'average_duration': round(avg_duration, 1),
         'recent_sessions': WorkoutSessionListSerializer(recent_sessions, many=True).data
-    })
\ No newline at end of file
+    })
+
+@read_from_replica
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([AnalyticsRateThrottle])
+def training_calendar(request):
+    """
+    GET /api/workouts/calendar/?year=2026
+    Training days of one year with their sessions, volume and a 1-4
+    intensity for the heatmap. One TrainingCalendar row per user and year.
+    """
+    try:
+        year = int(request.query_params.get('year', timezone.localdate().year))
+    except ValueError:
+        return Response({'error': 'year must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= year <= 9999:
+        return Response({'error': 'year is out of range'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(year_calendar(request.user, year))
+
+
+MUSCLE_VOLUME_DAYS = 30
+MUSCLE_VOLUME_MAX_DAYS = 366
+
+
+@read_from_replica
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([AnalyticsRateThrottle])
+def muscle_volume_analytics(request):
+    """
+    GET /api/workouts/analytics/muscles/?days=30&bucket=day|week|total
+    Volume per muscle over the last ``days`` days, attributed through each
+    exercise's muscle weights (see muscles.py)
+    """
+    try:
+        days = int(request.query_params.get('days', MUSCLE_VOLUME_DAYS))
+    except ValueError:
+        return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= days <= MUSCLE_VOLUME_MAX_DAYS:
+        return Response(
+            {'error': f'days must be between 1 and {MUSCLE_VOLUME_MAX_DAYS}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    bucket = request.query_params.get('bucket', 'day')
+    if bucket not in MUSCLE_BUCKETS:
+        return Response(
+            {'error': f"bucket must be one of {', '.join(MUSCLE_BUCKETS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    end = timezone.localdate()
+    dates, muscles, volume = muscle_volume(request.user, end - timedelta(days=days - 1), end, bucket)
+    
+    # Only muscles that were trained, with the series in the chart's shape
+    trained = [index for index, total in enumerate(volume.sum(axis=0)) if total > 0]
+    return Response({
+        'bucket': bucket,
+        'start': dates[0],
+        'end': end,
+        'muscles': [muscles[index] for index in trained],
+        'totals': {muscles[index]: round(float(volume[:, index].sum()), 1) for index in trained},
+        'series': [
+            {'date': date, **{muscles[index]: round(float(row[index]), 1) for index in trained}}
+            for date, row in zip(dates, volume)
+        ],
+    })
+
+
+@read_from_replica
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([AnalyticsRateThrottle])
+def exercise_trends(request):
+    """
+    GET /api/workouts/analytics/trends/?exercise=<id>&plateau=true
+    The user's strength trend per exercise from the nightly batch (trends.py)
+    """
+    queryset = ExerciseTrend.objects.filter(user=request.user).select_related('exercise')
+    
+    exercise = request.query_params.get('exercise')
+    if exercise:
+        if not exercise.isdigit():
+            return Response({'error': 'exercise must be an id'}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = queryset.filter(exercise_id=exercise)
+    
+    plateau = request.query_params.get('plateau')
+    if plateau is not None:
+        queryset = queryset.filter(is_plateau=plateau.lower() == 'true')
+    
+    return Response(ExerciseTrendSerializer(queryset, many=True, context={'request': request}).data)
+
+
+@read_from_replica
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([AnalyticsRateThrottle])
+def workload_analytics(request):
+    """
+    GET /api/workouts/analytics/workload/
+    Acute (7-day) vs chronic (28-day) load ratio, overall and per muscle,
+    from the user's rolling daily rollups (workload.py)
+    """
+    return Response(workload_summary(request.user))
+
+
+# ============= LEADERBOARDS =============
+
+def _leaderboard_page(request):
+    """``(offset, limit)`` from the query string, or None if not integers"""
+    try:
+        offset = int(request.query_params.get('offset', 0))
+        limit = int(request.query_params.get('limit', leaderboards.DEFAULT_LIMIT))
+    except ValueError:
+        return None
+    return max(offset, 0), min(max(limit, 1), leaderboards.MAX_LIMIT)
+
+
+@read_from_replica
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([AnalyticsRateThrottle])
+def exercise_leaderboard(request, pk):
+    """
+    GET /api/workouts/leaderboards/exercises/<id>/?offset=0&limit=20
+    Public profiles ranked by best estimated 1RM on the exercise, and the
+    user's own place (null if not on the board)
+    """
+    page = _leaderboard_page(request)
+    if page is None:
+        return Response({'error': 'offset and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    offset, limit = page
+    exercise = get_object_or_404(Exercise, pk=pk)
+    
+    entries, mine, size = leaderboards.lookup(
+        leaderboards.exercise_board(exercise.pk), offset, limit, request.user.pk
+    )
+    usernames = dict(get_user_model().objects.filter(
+        pk__in=[user_id for user_id, _ in entries]
+    ).values_list('pk', 'username'))
+    return Response({
+        'exercise': exercise.pk,
+        'count': size,
+        'results': [
+            {'rank': offset + index + 1, 'user': user_id, 'username': usernames.get(user_id), 'e1rm': score}
+            for index, (user_id, score) in enumerate(entries)
+        ],
+        'me': {'rank': mine[0] + 1, 'e1rm': mine[1]} if mine else None,
+    })
+
+
+@read_from_replica
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([AnalyticsRateThrottle])
+def routine_leaderboard(request):
+    """
+    GET /api/workouts/leaderboards/routines/?offset=0&limit=20
+    Public routines ranked by how often they've been completed
+    """
+    page = _leaderboard_page(request)
+    if page is None:
+        return Response({'error': 'offset and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    offset, limit = page
+    
+    entries, _, size = leaderboards.lookup(leaderboards.ROUTINES_BOARD, offset, limit)
+    routines = with_routine_list_stats(
+        WorkoutRoutine.objects.filter(pk__in=[pk for pk, _ in entries], is_public=True), request.user
+    ).in_bulk()
+    ranked = [
+        (offset + index + 1, routines[routine_id])
+        for index, (routine_id, _) in enumerate(entries) if routine_id in routines
+    ]
+    data = WorkoutRoutineListSerializer(
+        [routine for _, routine in ranked], many=True, context={'request': request}
+    ).data
+    return Response({
+        'count': size,
+        'results': [{**item, 'rank': rank} for (rank, _), item in zip(ranked, data)],
+    })
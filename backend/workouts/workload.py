@@ -0,0 +1,293 @@
+"""
+Acute:chronic workload ratios, overall and per muscle.
+
+A set's load is its volume scaled by how hard it felt:
+``weight * reps * (difficulty or DEFAULT_DIFFICULTY) / 10``. Per-muscle load
+goes through the same weight matrix as muscle volume (see muscles.py).
+
+Each user has one WorkloadWindow row: a ring of the last CHRONIC_DAYS daily
+rollups (overall load plus one column per muscle) and the running acute
+(ACUTE_DAYS) and chronic sums. Completing, editing or deleting a completed
+session, or adding, editing or deleting one of its sets, recomputes the
+rollup of its day from that day's sets and adds only the difference to the
+sums; moving the window forward subtracts the days that
+fall out. Neither touches more than a day of sets.
+"""
+
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_init, post_save, post_delete
+from django.utils import timezone
+from .models import ExerciseSet, WorkoutSession, WorkloadWindow
+from .muscles import MUSCLES, attribute_volume
+
+User = get_user_model()
+
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+
+# Assumed for sets logged without a difficulty rating
+DEFAULT_DIFFICULTY = 7
+
+# Column 0 is the overall load, then one column per muscle
+COLUMNS = 1 + len(MUSCLES)
+
+# Ratio bands, as in the sports science literature on workload spikes
+RATIO_BANDS = [
+    (0.8, 'low'),
+    (1.3, 'optimal'),
+    (1.5, 'elevated'),
+    (float('inf'), 'high'),
+]
+
+TRACKED_FIELDS = ('is_completed', 'start_time', 'total_volume')
+
+
+class Window:
+    """Decoded WorkloadWindow: ring of daily rollups plus the running sums"""
+
+    def __init__(self, end, ring=None, acute=None, chronic=None):
+        self.end = end
+        self.ring = np.zeros((CHRONIC_DAYS, COLUMNS)) if ring is None else ring
+        self.acute = np.zeros(COLUMNS) if acute is None else acute
+        self.chronic = np.zeros(COLUMNS) if chronic is None else chronic
+
+    @classmethod
+    def from_row(cls, row):
+        data = np.frombuffer(bytes(row.data), dtype='<f8')
+        if data.size != (CHRONIC_DAYS + 2) * COLUMNS:
+            # Muscle list changed since it was written
+            return None
+        data = data.reshape(CHRONIC_DAYS + 2, COLUMNS).copy()
+        return cls(row.end_date, data[:CHRONIC_DAYS], data[CHRONIC_DAYS], data[CHRONIC_DAYS + 1])
+
+    def to_bytes(self):
+        return np.vstack([self.ring, self.acute, self.chronic]).astype('<f8').tobytes()
+
+    @staticmethod
+    def slot(day):
+        return day.toordinal() % CHRONIC_DAYS
+
+    def contains(self, day):
+        return self.end - timedelta(days=CHRONIC_DAYS - 1) <= day <= self.end
+
+    def advance(self, day):
+        """Move the window's last day forward to ``day``, one day at a time"""
+        if day <= self.end:
+            return
+        if (day - self.end).days >= CHRONIC_DAYS:
+            self.__init__(day)
+            return
+        while self.end < day:
+            self.end += timedelta(days=1)
+            # The day leaving the acute window is still in the chronic one
+            self.acute -= self.ring[self.slot(self.end - timedelta(days=ACUTE_DAYS))]
+            slot = self.slot(self.end)
+            self.chronic -= self.ring[slot]
+            self.ring[slot] = 0
+
+    def set_day(self, day, loads):
+        """Replace one day's rollup, adjusting the sums by the difference"""
+        if not self.contains(day):
+            return
+        slot = self.slot(day)
+        delta = loads - self.ring[slot]
+        self.ring[slot] = loads
+        self.chronic += delta
+        if day > self.end - timedelta(days=ACUTE_DAYS):
+            self.acute += delta
+
+
+def day_loads(user_id, days):
+    """``{day: COLUMNS loads}`` from the sets of the user's completed sessions"""
+    first, last = min(days), max(days)
+    rows = list(
+        ExerciseSet.objects.filter(
+            user_id=user_id,
+            performed_at__gte=timezone.make_aware(datetime.combine(first, time.min)),
+            performed_at__lt=timezone.make_aware(datetime.combine(last + timedelta(days=1), time.min)),
+            session__is_completed=True,
+            is_planned=False,
+            weight__isnull=False,
+        ).values_list('exercise_id', 'weight', 'reps', 'difficulty', 'performed_at')
+    )
+    loads = {day: np.zeros(COLUMNS) for day in days}
+    if not rows:
+        return loads
+
+    exercise_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    load = np.fromiter(
+        (float(row[1]) * row[2] * (row[3] or DEFAULT_DIFFICULTY) / 10 for row in rows),
+        dtype=np.float64, count=len(rows)
+    )
+    offsets = np.fromiter(
+        ((timezone.localdate(row[4]) - first).days for row in rows),
+        dtype=np.int64, count=len(rows)
+    )
+    span = (last - first).days + 1
+    per_muscle = attribute_volume(exercise_ids, load, offsets, span)
+    overall = np.bincount(offsets, weights=load, minlength=span)
+    for day in days:
+        offset = (day - first).days
+        loads[day] = np.r_[overall[offset], per_muscle[offset]]
+    return loads
+
+
+def build_window(user_id, end):
+    """A window ending on ``end`` computed from scratch"""
+    window = Window(end)
+    days = [end - timedelta(days=offset) for offset in range(CHRONIC_DAYS)]
+    for day, loads in day_loads(user_id, days).items():
+        window.set_day(day, loads)
+    return window
+
+
+def refresh_days(user_id, days):
+    """Recompute the rollups of ``days`` (those still in the window) for one user"""
+    today = timezone.localdate()
+    with transaction.atomic():
+        row = WorkloadWindow.objects.select_for_update().filter(user_id=user_id).first()
+        window = Window.from_row(row) if row is not None else None
+        if window is None:
+            window = build_window(user_id, today)
+        else:
+            window.advance(today)
+            days = [day for day in days if window.contains(day)]
+            for day, loads in (day_loads(user_id, days) if days else {}).items():
+                window.set_day(day, loads)
+        _save(user_id, window, row)
+
+
+def _save(user_id, window, row=None):
+    row = row or WorkloadWindow(user_id=user_id)
+    row.end_date = window.end
+    row.data = window.to_bytes()
+    row.save()
+
+
+def current_window(user):
+    """The user's window moved to today (built and stored on first use)"""
+    today = timezone.localdate()
+    row = WorkloadWindow.objects.filter(user=user).first()
+    window = Window.from_row(row) if row is not None else None
+    if window is None:
+        window = build_window(user.pk, today)
+        WorkloadWindow.objects.update_or_create(
+            user=user, defaults={'end_date': window.end, 'data': window.to_bytes()}
+        )
+        return window
+    window.advance(today)
+    return window
+
+
+def _band(ratio):
+    if ratio is None:
+        return None
+    return next(name for limit, name in RATIO_BANDS if ratio < limit)
+
+
+def _metrics(acute, chronic):
+    acute = max(float(acute), 0.0)
+    chronic = max(float(chronic), 0.0)
+    acute_daily = acute / ACUTE_DAYS
+    chronic_daily = chronic / CHRONIC_DAYS
+    ratio = round(acute_daily / chronic_daily, 2) if chronic_daily > 0 else None
+    return {
+        'acute_load': round(acute, 1),
+        'chronic_load': round(chronic, 1),
+        'ratio': ratio,
+        'band': _band(ratio),
+    }
+
+
+def workload_summary(user):
+    window = current_window(user)
+    muscles = {
+        muscle: _metrics(window.acute[index + 1], window.chronic[index + 1])
+        for index, muscle in enumerate(MUSCLES)
+        if window.chronic[index + 1] > 0
+    }
+    return {
+        'date': window.end,
+        'acute_days': ACUTE_DAYS,
+        'chronic_days': CHRONIC_DAYS,
+        'overall': _metrics(window.acute[0], window.chronic[0]),
+        'muscles': muscles,
+    }
+
+
+# ============= SIGNALS =============
+
+def _day(values):
+    """Day a completed session counts for, None if it can't be in the window"""
+    if not values.get('is_completed') or values.get('start_time') is None:
+        return None
+    day = timezone.localdate(values['start_time'])
+    if day <= timezone.localdate() - timedelta(days=CHRONIC_DAYS):
+        return None
+    return day
+
+
+def _remember(sender, instance, **kwargs):
+    # Read from __dict__: touching a deferred field would cost a query per row
+    if all(name in instance.__dict__ for name in TRACKED_FIELDS):
+        instance._workload_state = tuple(instance.__dict__[name] for name in TRACKED_FIELDS)
+
+
+def _on_save(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    state = tuple(instance.__dict__.get(name) for name in TRACKED_FIELDS)
+    previous = None if created else getattr(instance, '_workload_state', None)
+    if state == previous:
+        return
+    instance._workload_state = state
+    days = {
+        day for day in (_day(instance.__dict__), _day(dict(zip(TRACKED_FIELDS, previous or ()))))
+        if day is not None
+    }
+    if days:
+        refresh_days(instance.user_id, sorted(days))
+
+
+def _on_delete(sender, instance, origin=None, **kwargs):
+    # The account's window is being deleted with it
+    if isinstance(origin, User) or (isinstance(origin, QuerySet) and origin.model is User):
+        return
+    # Its sets are gone by now, so the day recomputes without them
+    day = _day(instance.__dict__)
+    if day is not None:
+        refresh_days(instance.user_id, [day])
+
+
+def _on_set_change(sender, instance, raw=False, origin=None, **kwargs):
+    # Set writes only bump the session's version in SQL, so no session signal fires
+    if raw or instance.is_planned:
+        return
+    # Deleted with its session or account: their own signals cover the day
+    if origin is not None:
+        model = origin.model if isinstance(origin, QuerySet) else type(origin)
+        if model is not ExerciseSet:
+            return
+    day = _day({'is_completed': True, 'start_time': instance.performed_at})
+    if day is None:
+        return
+    if ExerciseSet._meta.get_field('session').is_cached(instance):
+        completed = instance.session.is_completed
+    else:
+        completed = WorkoutSession.objects.filter(pk=instance.session_id, is_completed=True).exists()
+    if completed:
+        user_id = instance.user_id
+        transaction.on_commit(lambda: refresh_days(user_id, [day]))
+
+
+def connect_signals():
+    post_init.connect(_remember, sender=WorkoutSession, dispatch_uid='workload_init')
+    post_save.connect(_on_save, sender=WorkoutSession, dispatch_uid='workload_save')
+    post_delete.connect(_on_delete, sender=WorkoutSession, dispatch_uid='workload_delete')
+    post_save.connect(_on_set_change, sender=ExerciseSet, dispatch_uid='workload_set_save')
+    post_delete.connect(_on_set_change, sender=ExerciseSet, dispatch_uid='workload_set_delete')